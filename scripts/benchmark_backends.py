@@ -0,0 +1,84 @@
+"""
+Compare the cleaning backends on synthetic circulation data.
+
+Runs standardise_isbn -> standardize_dates -> remove_duplicates ->
+handle_missing_values on each installed backend. The reported time covers
+the cleaning chain plus materialising the result; converting the input
+frame to the backend is not timed.
+
+Usage:
+> python scripts/benchmark_backends.py --rows 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_processing.backends import BACKENDS, to_backend  # noqa: E402
+from src.data_processing.cleaning import (  # noqa: E402
+    remove_duplicates,
+    handle_missing_values,
+    standardize_dates,
+    standardise_isbn
+)
+
+
+def make_circulation(rows, seed=42):
+    """Synthetic circulation data with duplicates and missing values."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, rows), unit='D')
+    df = pd.DataFrame({
+        'transaction_id': [f'TXN{i:08d}' for i in rng.integers(0, int(rows * 0.98), rows)],
+        'member_id': [f'M{i}' for i in rng.integers(10000, 99999, rows)],
+        'isbn': [f'978-0-{i:03d}-{j:05d}-0' for i, j in zip(rng.integers(0, 999, rows),
+                                                            rng.integers(0, 99999, rows))],
+        'checkout_date': dates.strftime('%d/%m/%Y'),
+        'branch_id': [f'BR{i:03d}' for i in rng.integers(1, 16, rows)],
+    })
+    df.loc[rng.random(rows) < 0.05, 'isbn'] = None
+    return df
+
+
+def clean(df):
+    df = standardise_isbn(df, 'isbn')
+    df = standardize_dates(df, ['checkout_date'])
+    df = remove_duplicates(df, subset=['transaction_id'])
+    return handle_missing_values(df, strategy='drop')
+
+
+def materialise(df, backend):
+    if backend == 'dask':
+        return df.compute()
+    if backend == 'polars':
+        return df.collect()
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cleaning backends.')
+    parser.add_argument('--rows', type=int, default=500_000, help='Rows of synthetic data')
+    parser.add_argument('--partitions', type=int, default=None, help='Dask partitions')
+    args = parser.parse_args(argv)
+
+    df = make_circulation(args.rows)
+    print(f"{'backend':<10} {'seconds':>10} {'rows out':>12}")
+    for backend in BACKENDS:
+        try:
+            frame = to_backend(df, backend, npartitions=args.partitions)
+        except ImportError:
+            print(f"{backend:<10} {'not installed':>10}")
+            continue
+        start = time.perf_counter()
+        result = materialise(clean(frame), backend)
+        elapsed = time.perf_counter() - start
+        print(f"{backend:<10} {elapsed:>10.2f} {len(result):>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure start-up cost of the data_processing package and CLI.
+
+Each case runs in a fresh interpreter so nothing is cached between runs.
+The best of several runs is reported, next to a bare interpreter and a
+plain `import pandas` for reference.
+
+Usage:
+> python scripts/benchmark_import.py
+> python scripts/benchmark_import.py --runs 10
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CASES = {
+    'python (baseline)': ['-c', 'pass'],
+    'import pandas': ['-c', 'import pandas'],
+    'import src.data_processing': ['-c', 'import src.data_processing'],
+    'validate one ISBN': ['-c', 'from src.data_processing import validate_isbn; '
+                                'validate_isbn("978-0-123456-78-9")'],
+    'run_pipeline --dry-run': ['-m', 'src.data_processing.run_pipeline', '--dry-run'],
+}
+
+
+def time_case(args, runs):
+    """Best wall-clock time of running the interpreter with args."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def heavy_modules(statement):
+    """Heavy third-party modules loaded by a statement."""
+    check = (f'import sys; {statement}; '
+             'print(",".join(m for m in ("pandas", "numpy", "openpyxl") if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-c', check], cwd=REPO_ROOT, check=True,
+                         capture_output=True, text=True)
+    return out.stdout.strip() or '-'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark package import time.')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per case')
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<28} {'best (ms)':>10}")
+    for name, case_args in CASES.items():
+        print(f"{name:<28} {time_case(case_args, args.runs) * 1000:>10.1f}")
+
+    print(f"\nheavy modules after 'import src.data_processing': "
+          f"{heavy_modules('import src.data_processing')}")
+    print(f"heavy modules after 'import src.data_processing.run_pipeline': "
+          f"{heavy_modules('import src.data_processing.run_pipeline')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,78 @@
-"""Data processing package for library pipeline."""
+"""Data processing package for library pipeline.
+
+Public functions are loaded on first access (PEP 562), so importing the
+package does not pull in pandas, numpy or openpyxl until they are needed.
+"""
+
+import importlib
 
 __version__ = "0.1.0"
+
+# Public name -> submodule that defines it
+_LAZY_ATTRS = {
+    'load_csv': 'ingestion',
+    'load_json': 'ingestion',
+    'load_json_records': 'ingestion',
+    'load_excel': 'ingestion',
+    'load_text': 'ingestion',
+    'load_silver': 'ingestion',
+    'apply_filters': 'ingestion',
+    'open_stream': 'ingestion',
+    'remove_duplicates': 'cleaning',
+    'handle_missing_values': 'cleaning',
+    'impute_chunks': 'cleaning',
+    'standardize_dates': 'cleaning',
+    'standardise_isbn': 'cleaning',
+    'format_dates': 'cleaning',
+    'validate_isbn': 'validation',
+    'update_gold': 'gold',
+    'check_rules': 'quality',
+    'check_references': 'integrity',
+    'enrich_circulation': 'enrichment',
+    'find_near_duplicates': 'deduplication',
+    'resolve_branches': 'branches',
+    'analyse_feedback': 'text_analytics',
+    'update_recommendations': 'recommendations',
+    'compute_features': 'features',
+    'normalise_events': 'event_tables',
+    'write_csv_atomic': 'checkpoint',
+    'start_run': 'checkpoint',
+    'run_stage': 'checkpoint',
+    'stage_file': 'checkpoint',
+    'commit_files': 'checkpoint',
+    'cached_call': 'cache',
+    'memoize': 'cache',
+    'map_partitions': 'shared',
+    'diff_snapshot': 'cdc',
+    'watch': 'watch',
+    'write_table': 'sink',
+    'plan_chunks': 'resources',
+    'shadow_compare': 'shadow',
+    'format_dates_series': 'cleaning',
+    'validate_isbn_series': 'validation',
+    'build_index': 'lookup',
+}
+
+_SUBMODULES = {'backends', 'branches', 'ingestion', 'cleaning', 'validation', 'gold', 'lookup',
+               'quality', 'integrity', 'enrichment', 'deduplication', 'text_analytics',
+               'recommendations', 'features', 'event_tables', 'checkpoint',
+               'cache', 'shared', 'cdc', 'watch', 'sink', 'resources', 'shadow',
+               'run_pipeline'}
+
+__all__ = sorted(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(f'{__name__}.{_LAZY_ATTRS[name]}')
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | _SUBMODULES)
@@ -0,0 +1,263 @@
+"""
+Execution backends for the cleaning functions.
+
+The cleaning functions accept pandas DataFrames, Dask DataFrames and Polars
+DataFrames/LazyFrames. pandas input runs the reference implementation in
+cleaning.py. Dask input runs that same implementation on each partition,
+after shuffling rows so that each group of a grouped imputation lands in
+one partition. Polars input is translated into Polars expressions, so a
+LazyFrame stays lazy until it is collected.
+
+Dask and Polars are optional dependencies and are only imported when a
+frame of that type is passed in.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('pandas', 'dask', 'polars')
+
+# Strategies handle_missing_values supports on each backend
+_DASK_STRATEGIES = ('drop', 'fill', 'forward_fill', 'backward_fill')
+_ROW_ORDER = '__row_nr'
+
+
+def get_backend(df):
+    """Name of the backend a frame belongs to.
+
+    Checks the module of the frame's type, so it never imports Dask or Polars.
+
+    Args:
+        df: pandas, Dask or Polars frame
+
+    Returns:
+        str: 'pandas', 'dask' or 'polars'
+    """
+    module = type(df).__module__.split('.')[0]
+    if module in ('dask', 'dask_expr'):
+        return 'dask'
+    if module == 'polars':
+        return 'polars'
+    return 'pandas'
+
+
+def to_backend(df, backend, npartitions=None, lazy=True):
+    """Convert a pandas DataFrame to another backend.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame
+        backend (str): 'pandas', 'dask' or 'polars'
+        npartitions (int, optional): Dask partitions, defaults to the CPU count
+        lazy (bool): Return a Polars LazyFrame rather than a DataFrame
+
+    Returns:
+        Frame of the requested backend
+    """
+    if backend == 'pandas':
+        return df
+    if backend == 'dask':
+        import os
+        import dask.dataframe as dd
+        return dd.from_pandas(df, npartitions=npartitions or os.cpu_count() or 1)
+    if backend == 'polars':
+        import polars as pl
+        frame = pl.from_pandas(df)
+        return frame.lazy() if lazy else frame
+    raise ValueError(f'Unknown backend: {backend}')
+
+
+def to_pandas(df):
+    """Materialise a frame of any backend as a pandas DataFrame."""
+    backend = get_backend(df)
+    if backend == 'dask':
+        return df.compute()
+    if backend == 'polars':
+        if hasattr(df, 'collect'):
+            df = df.collect()
+        return df.to_pandas()
+    return df
+
+
+def _columns(df):
+    """Column names of a frame without materialising it."""
+    if get_backend(df) == 'polars' and hasattr(df, 'collect_schema'):
+        return df.collect_schema().names()
+    return list(df.columns)
+
+
+# ============================================
+# DASK
+# ============================================
+
+def _dask_map(df, func, **kwargs):
+    """Run a pandas cleaning function on every Dask partition."""
+    meta = func(df._meta, **kwargs)
+    return df.map_partitions(func, meta=meta, **kwargs)
+
+
+def _dask_remove_duplicates(df, subset=None):
+    return df.drop_duplicates(subset=subset, keep='first')
+
+
+def _dask_handle_missing_values(df, strategy='drop', fill_value=None, columns=None,
+                                group_by=None, order_by=None):
+    from src.data_processing.cleaning import handle_missing_values
+
+    if group_by:
+        # Put every group in a single partition, then impute per partition
+        keys = [group_by] if isinstance(group_by, str) else list(group_by)
+        shuffled = df.shuffle(on=keys)
+        return _dask_map(shuffled, handle_missing_values, strategy=strategy,
+                         fill_value=fill_value, columns=columns, group_by=group_by,
+                         order_by=order_by)
+
+    if strategy not in _DASK_STRATEGIES:
+        raise ValueError(f"Strategy {strategy} needs group_by on the dask backend")
+    if strategy in ('drop', 'fill'):
+        return _dask_map(df, handle_missing_values, strategy=strategy,
+                         fill_value=fill_value, columns=columns)
+    if order_by:
+        raise ValueError("order_by needs group_by on the dask backend")
+
+    target_cols = list(columns) if columns else list(df.columns)
+    if strategy == 'forward_fill':
+        filled = df[target_cols].ffill()
+    else:
+        filled = df[target_cols].bfill()
+    return df.assign(**{col: filled[col] for col in target_cols})
+
+
+def _dask_standardize_dates(df, date_columns, date_format='%Y-%m-%d', keep_datetime=False):
+    from src.data_processing.cleaning import standardize_dates
+
+    if isinstance(date_columns, str):
+        date_columns = [date_columns]
+    return _dask_map(df, standardize_dates, date_columns=list(date_columns),
+                     date_format=date_format, keep_datetime=keep_datetime)
+
+
+def _dask_standardise_isbn(df, column='ISBN'):
+    from src.data_processing.cleaning import standardise_isbn
+
+    if column not in df.columns:
+        logger.error(f'WARNING: Column {column} not in the data frame.')
+        raise ValueError(f'No column name {column} found in the data frame')
+    return _dask_map(df, standardise_isbn, column=column)
+
+
+# ============================================
+# POLARS
+# ============================================
+
+def _polars_remove_duplicates(df, subset=None):
+    return df.unique(subset=subset, keep='first', maintain_order=True)
+
+
+def _polars_handle_missing_values(df, strategy='drop', fill_value=None, columns=None,
+                                  group_by=None, order_by=None):
+    import polars as pl
+
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    group_by = group_by or []
+    order_by = order_by or []
+    names = _columns(df)
+    target_cols = list(columns) if columns else [col for col in names if col not in group_by]
+
+    if strategy == 'drop':
+        return df.drop_nulls(subset=target_cols)
+    if strategy == 'fill':
+        if fill_value is None:
+            raise ValueError("fill_value must be provided when strategy='fill'")
+        return df.with_columns(pl.col(target_cols).fill_null(fill_value))
+
+    def over(expr):
+        return expr.over(group_by) if group_by else expr
+
+    if strategy == 'forward_fill':
+        exprs = [over(pl.col(col).forward_fill()) for col in target_cols]
+    elif strategy == 'backward_fill':
+        exprs = [over(pl.col(col).backward_fill()) for col in target_cols]
+    elif strategy == 'median':
+        exprs = [pl.col(col).fill_null(over(pl.col(col).median())) for col in target_cols]
+    elif strategy == 'mode':
+        exprs = [pl.col(col).fill_null(over(pl.col(col).drop_nulls().mode().sort().first()))
+                 for col in target_cols]
+    elif strategy == 'interpolate':
+        exprs = [over(pl.col(col).interpolate()) for col in target_cols]
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    sort_keys = group_by + order_by
+    if not sort_keys:
+        return df.with_columns(exprs)
+    # Impute in group/order sequence, then restore the input row order
+    return (df.with_row_index(_ROW_ORDER)
+              .sort(sort_keys, maintain_order=True)
+              .with_columns(exprs)
+              .sort(_ROW_ORDER)
+              .drop(_ROW_ORDER))
+
+
+def _polars_standardize_dates(df, date_columns, date_format='%Y-%m-%d', keep_datetime=False):
+    import polars as pl
+    from src.data_processing.cleaning import format_dates
+
+    if isinstance(date_columns, str):
+        date_columns = [date_columns]
+    names = _columns(df)
+    exprs = []
+    for col in date_columns:
+        if col not in names:
+            logger.warning(f"Column {col} not found in DataFrame")
+            continue
+        text = pl.col(col).cast(pl.String).map_elements(format_dates, return_dtype=pl.String)
+        if keep_datetime:
+            exprs.append(text.str.to_datetime(date_format, strict=False))
+        else:
+            exprs.append(text.str.to_date(date_format, strict=False))
+    return df.with_columns(exprs)
+
+
+def _polars_standardise_isbn(df, column='ISBN'):
+    import polars as pl
+
+    if column not in _columns(df):
+        logger.error(f'WARNING: Column {column} not in the data frame.')
+        raise ValueError(f'No column name {column} found in the data frame')
+    return df.with_columns(pl.col(column).cast(pl.String).str.replace_all('-', '', literal=True))
+
+
+_IMPLEMENTATIONS = {
+    'dask': {
+        'remove_duplicates': _dask_remove_duplicates,
+        'handle_missing_values': _dask_handle_missing_values,
+        'standardize_dates': _dask_standardize_dates,
+        'standardise_isbn': _dask_standardise_isbn,
+    },
+    'polars': {
+        'remove_duplicates': _polars_remove_duplicates,
+        'handle_missing_values': _polars_handle_missing_values,
+        'standardize_dates': _polars_standardize_dates,
+        'standardise_isbn': _polars_standardise_isbn,
+    },
+}
+
+
+def dispatch(name, df, *args, **kwargs):
+    """Run cleaning function name on a Dask or Polars frame.
+
+    Args:
+        name (str): Cleaning function name
+        df: Dask or Polars frame
+        *args, **kwargs: Arguments of the cleaning function
+
+    Returns:
+        Frame of the same backend as df
+    """
+    backend = get_backend(df)
+    logger.info(f'Running {name} on the {backend} backend')
+    return _IMPLEMENTATIONS[backend][name](df, *args, **kwargs)
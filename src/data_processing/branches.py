@@ -0,0 +1,186 @@
+"""
+Canonical branch keys for all data sources.
+
+Each source spells branches differently: circulation uses ids such as
+' BR012 ', events use names such as 'Plaistow' and feedback uses
+'Plaistow Branch', sometimes with typos. Raw values are resolved against
+a branch dictionary, first by exact match on a normalised form and then
+by fuzzy match through a character n-gram index. Each distinct raw value
+is resolved only once and the resulting keys are mapped back onto the
+rows with a vectorized take, so the cost depends on the number of
+distinct spellings rather than the number of rows.
+
+Circulation ids only share a key with the names used by events and
+feedback once an alias maps them, e.g. BR006 -> Plaistow. The mapping is
+read from ALIASES_FILE (columns alias, branch); an id without one keeps a
+key of its own, which the integrity checks report as an orphan.
+"""
+
+import logging
+import os
+import re
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BRANCH_NAMES = ['Beckton', 'Custom House', 'East Ham', 'Manor Park',
+                'North Woolwich', 'Plaistow', 'Stratford']
+BRANCH_IDS = [f'BR{number:03d}' for number in range(1, 16)]
+
+# Raw spelling -> canonical branch, for spellings the fuzzy match should not
+# guess. Entries in ALIASES_FILE are added to these.
+BRANCH_ALIASES = {}
+ALIASES_FILE = 'data/branch_aliases.csv'
+
+NGRAM_SIZE = 3
+MIN_SCORE = 0.5
+
+_BRANCH_ID = re.compile(r'br\s*0*(\d{1,3})')
+
+
+def normalise_branch(value):
+    """Normalised form of a raw branch value used for matching.
+
+    Ids become 'BR' plus three digits; names are lower-cased, stripped of
+    punctuation and of a trailing 'branch'.
+    """
+    text = re.sub(r'[^a-z0-9 ]', ' ', str(value).lower())
+    text = ' '.join(text.split())
+    match = _BRANCH_ID.fullmatch(text)
+    if match:
+        return f'BR{int(match.group(1)):03d}'
+    return re.sub(r'\s*branch$', '', text)
+
+
+def _ngrams(text, size=NGRAM_SIZE):
+    padded = f' {text} '
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+
+def load_branch_aliases(filepath=ALIASES_FILE):
+    """Read the alias -> branch mapping from a CSV file, empty if there is none."""
+    if not os.path.exists(filepath):
+        return {}
+    aliases = pd.read_csv(filepath, dtype=str, keep_default_na=False)
+    return dict(zip(aliases['alias'].str.strip(), aliases['branch'].str.strip()))
+
+
+def build_branch_index(names=None, ids=None, aliases=None):
+    """Build the branch dictionary and its lookup structures.
+
+    Args:
+        names (list, optional): Canonical branch names, defaults to BRANCH_NAMES
+        ids (list, optional): Canonical branch ids, defaults to BRANCH_IDS
+        aliases (dict, optional): Raw spelling -> canonical name or id,
+            defaults to BRANCH_ALIASES plus the entries of ALIASES_FILE.
+            An id aliased to a name has no key of its own.
+
+    Returns:
+        dict: 'dictionary' (DataFrame of branch_key, branch), 'exact'
+            (normalised form -> key), 'ngrams' (n-gram -> keys of the
+            names containing it), 'grams_of' (key -> n-grams of the name)
+            and 'unmapped_ids' (ids not aliased to a name)
+    """
+    names = BRANCH_NAMES if names is None else names
+    ids = BRANCH_IDS if ids is None else ids
+    aliases = {**BRANCH_ALIASES, **load_branch_aliases()} if aliases is None else aliases
+
+    aliased = {normalise_branch(raw) for raw, branch in aliases.items() if branch in names}
+    ids = [branch_id for branch_id in ids if normalise_branch(branch_id) not in aliased]
+    canonical = list(dict.fromkeys(list(names) + list(ids)))
+    dictionary = pd.DataFrame({'branch_key': np.arange(1, len(canonical) + 1, dtype='int16'),
+                               'branch': canonical})
+    keys = dict(zip(canonical, dictionary['branch_key'].tolist()))
+
+    exact = {normalise_branch(branch): key for branch, key in keys.items()}
+    for raw, branch in aliases.items():
+        if branch not in keys:
+            raise ValueError(f"Alias {raw!r} points to unknown branch {branch!r}")
+        exact[normalise_branch(raw)] = keys[branch]
+
+    # Only names are fuzzy matched, an id one digit off is a different branch
+    ngrams = defaultdict(set)
+    grams_of = {}
+    for branch in names:
+        form = normalise_branch(branch)
+        grams_of[keys[branch]] = _ngrams(form)
+        for gram in grams_of[keys[branch]]:
+            ngrams[gram].add(keys[branch])
+
+    return {'dictionary': dictionary, 'exact': exact, 'ngrams': dict(ngrams),
+            'grams_of': grams_of, 'unmapped_ids': ids}
+
+
+def _fuzzy_match(form, index, min_score):
+    """Best dictionary key for a normalised value by n-gram Dice score."""
+    grams = _ngrams(form)
+    shared = defaultdict(int)
+    for gram in grams:
+        for key in index['ngrams'].get(gram, ()):
+            shared[key] += 1
+    best_key, best_score = None, 0.0
+    for key, count in shared.items():
+        score = 2 * count / (len(grams) + len(index['grams_of'][key]))
+        if score > best_score:
+            best_key, best_score = key, score
+    return best_key if best_score >= min_score else None
+
+
+def resolve_branches(values, index=None, min_score=MIN_SCORE):
+    """Resolve raw branch values to branch keys.
+
+    Args:
+        values (pd.Series or list): Raw branch ids or names
+        index (dict, optional): Result of build_branch_index(), built with
+            the defaults if not given
+        min_score (float): Minimum n-gram Dice score of a fuzzy match
+
+    Returns:
+        pd.Series: Nullable Int16 branch keys, missing where a value could
+            not be resolved
+
+    Example:
+        >>> resolve_branches(['BR12 ', 'Plaistow Branch', 'Plaistw']).tolist()
+        [19, 6, 6]
+    """
+    index = index or build_branch_index()
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+
+    resolved = np.zeros(len(uniques), dtype='int16')
+    unresolved = []
+    for position, raw in enumerate(uniques):
+        form = normalise_branch(raw)
+        key = index['exact'].get(form)
+        if key is None:
+            key = _fuzzy_match(form, index, min_score)
+        if key is None:
+            unresolved.append(raw)
+        else:
+            resolved[position] = key
+
+    if unresolved:
+        logger.warning(f'{len(unresolved)} branch values not resolved: {unresolved[:5]}')
+
+    # Missing values get code -1 and map to key 0, i.e. missing
+    keys = np.where(codes >= 0, resolved[np.maximum(codes, 0)], 0)
+    return pd.Series(pd.arrays.IntegerArray(keys.astype('int16'), keys == 0), index=values.index)
+
+
+def add_branch_key(df, column, index=None, min_score=MIN_SCORE):
+    """Return a copy of df with a branch_key column resolved from column.
+
+    Args:
+        df (pd.DataFrame): Data with a raw branch column
+        column (str): Raw branch column
+        index (dict, optional): Result of build_branch_index()
+        min_score (float): Minimum n-gram Dice score of a fuzzy match
+
+    Returns:
+        pd.DataFrame: Copy of df with branch_key added
+    """
+    df = df.copy()
+    df['branch_key'] = resolve_branches(df[column], index=index, min_score=min_score)
+    return df
@@ -0,0 +1,205 @@
+"""
+Content-addressed on-disk cache for cleaning steps.
+
+A cached call is keyed on a hash of the input frame (values, index,
+column names and dtypes), the function's name, its other arguments and
+the source code of the module it is defined in. Change the data, a
+parameter or the code and the key changes, so a stale result is never
+returned; call the same step again on the same data and the stored
+result is read back instead of recomputed.
+
+Results are stored as Parquet files named after their key. The cache is
+bounded in size: a hit touches the file's modification time, and when a
+write takes the cache over max_bytes the least recently used files are
+deleted.
+
+Only pandas DataFrame inputs and results are cached. Anything else
+(Dask or Polars frames, frames that cannot be hashed or written to
+Parquet) is computed as normal.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pandas as pd
+from src.data_processing.checkpoint import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = 'data/cache'
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Bump to invalidate every stored result, e.g. after a pandas upgrade
+CACHE_VERSION = 1
+
+
+def frame_hash(df):
+    """Hex digest of a DataFrame's values, index, column names and dtypes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash(path):
+    with open(path, 'rb') as file:
+        return hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+
+
+def code_version(func):
+    """Hash of the source file func is defined in.
+
+    The whole module is hashed, so editing a helper the function calls
+    also changes the version. Decorators such as shared.parallel() are
+    unwrapped first, so it is the module of the wrapped function.
+    """
+    try:
+        return _source_hash(inspect.getsourcefile(inspect.unwrap(func)))
+    except (TypeError, OSError):
+        return getattr(func, '__qualname__', repr(func))
+
+
+def _fingerprint(value):
+    """JSON-serialisable stand-in for an argument, hashing DataFrames."""
+    if isinstance(value, pd.DataFrame):
+        return {'frame': frame_hash(value)}
+    if isinstance(value, pd.Series):
+        return {'series': frame_hash(value.to_frame())}
+    if isinstance(value, (list, tuple)):
+        return [_fingerprint(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _fingerprint(item) for key, item in value.items()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return repr(value)
+
+
+def cache_key(func, df, args=(), kwargs=None):
+    """Key of a call func(df, *args, **kwargs)."""
+    payload = {
+        'version': CACHE_VERSION,
+        'function': f'{func.__module__}.{func.__qualname__}',
+        'code': code_version(func),
+        'input': frame_hash(df),
+        'args': _fingerprint(list(args)),
+        'kwargs': _fingerprint(dict(kwargs or {})),
+    }
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(),
+                           digest_size=20).hexdigest()
+
+
+def _entries(cache_dir):
+    """(path, size, last used) of every stored result, least recently used first."""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.parquet'):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((os.path.join(cache_dir, name), stat.st_size, stat.st_mtime_ns))
+    return sorted(entries, key=lambda entry: entry[2])
+
+
+def cache_size(cache_dir=DEFAULT_DIR):
+    """Total bytes of stored results."""
+    return sum(size for _, size, _ in _entries(cache_dir))
+
+
+def evict(cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """Delete least recently used results until the cache fits in max_bytes.
+
+    Returns:
+        int: Number of results deleted
+    """
+    entries = _entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for path, size, _ in entries:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f'Evicted {removed} cached results from {cache_dir}')
+    return removed
+
+
+def clear_cache(cache_dir=DEFAULT_DIR):
+    """Delete every stored result."""
+    return evict(cache_dir, max_bytes=0)
+
+
+def cached_call(func, df, *args, cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, **kwargs):
+    """Call func(df, *args, **kwargs), reusing a stored result if there is one.
+
+    Args:
+        func (callable): Cleaning step taking a DataFrame first
+        df (pd.DataFrame): Input frame
+        *args, **kwargs: Other arguments of func
+        cache_dir (str): Directory holding the stored results
+        max_bytes (int): Size the cache is trimmed to after a write
+
+    Returns:
+        The result of func
+
+    Example:
+        >>> df = cached_call(standardise_isbn, df, 'isbn')
+        >>> df = cached_call(standardize_dates, df, ['checkout_date'], keep_datetime=True)
+    """
+    if not isinstance(df, pd.DataFrame):
+        return func(df, *args, **kwargs)
+    try:
+        key = cache_key(func, df, args, kwargs)
+    except TypeError as e:
+        logger.debug(f'Not caching {func.__name__}: {e}')
+        return func(df, *args, **kwargs)
+
+    path = os.path.join(cache_dir, f'{key}.parquet')
+    if os.path.exists(path):
+        try:
+            result = pd.read_parquet(path)
+            os.utime(path)
+            logger.info(f'Cache hit for {func.__name__} ({key[:12]})')
+            return result
+        except (OSError, ValueError) as e:
+            logger.warning(f'Unreadable cache entry {path}, recomputing: {e}')
+
+    result = func(df, *args, **kwargs)
+    if not isinstance(result, pd.DataFrame):
+        return result
+    try:
+        with atomic_write(path, 'wb') as file:
+            result.to_parquet(file)
+    except (TypeError, ValueError, NotImplementedError, ImportError) as e:
+        # e.g. object columns mixing types that Arrow cannot store
+        logger.warning(f'Could not cache {func.__name__}: {e}')
+        return result
+    logger.info(f'Cached {func.__name__} ({key[:12]})')
+    evict(cache_dir, max_bytes)
+    return result
+
+
+def memoize(func, cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """Wrap a cleaning step so every call goes through cached_call().
+
+    Raises:
+        ImportError: If pyarrow, which writes the Parquet files, is missing
+
+    Example:
+        >>> remove_duplicates = memoize(remove_duplicates, cache_dir='/lakehouse/cache')
+        >>> df = remove_duplicates(df, subset=['transaction_id'])
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('The cleaning step cache requires pyarrow: pip install pyarrow')
+
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        return cached_call(func, df, *args, cache_dir=cache_dir, max_bytes=max_bytes, **kwargs)
+    return wrapper
@@ -0,0 +1,168 @@
+"""
+Change data capture between successive bronze snapshots.
+
+Branches resend full snapshots of the catalogue and circulation data. To
+find out what actually changed, each row of a new snapshot is reduced to
+its key (e.g. transaction_id) and a 64-bit hash of its other columns.
+These are compared with the hash index saved for the previous snapshot:
+
+    key not in the index             -> insert
+    key in the index, hash differs   -> update (e.g. a new return_date)
+    key in the index, hash the same  -> unchanged
+    key in the index but not seen    -> delete
+
+The snapshot is read once, chunk by chunk. Inserts and updates are
+emitted with the full row as each chunk is compared; deletes are known
+once the whole snapshot has been read and carry only their key. The index
+of the new snapshot then replaces the old one.
+
+Only the key and hash of each row are stored, never the rows themselves.
+If a key appears more than once in a snapshot, its first row is used;
+rows without a key are skipped.
+"""
+
+import logging
+import os
+import numpy as np
+import pandas as pd
+from src.data_processing.checkpoint import write_csv_atomic
+
+logger = logging.getLogger(__name__)
+
+OP_COLUMN = 'op'
+
+
+def row_hashes(df, key):
+    """Key and row hash of each row.
+
+    Values are compared as strings, so a column read as numbers in one
+    snapshot and as text in the next does not look like a change.
+
+    Args:
+        df (pd.DataFrame): Snapshot rows
+        key (str): Key column
+
+    Returns:
+        tuple: (keys as a str Series, uint64 hashes as a numpy array)
+    """
+    if key not in df.columns:
+        raise ValueError(f'Key column {key} not found')
+    keys = df[key].astype('string').str.strip()
+    values = df[sorted(col for col in df.columns if col != key)].astype('string')
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return keys, hashes
+
+
+def load_hash_index(filepath):
+    """Key and hash index of the previous snapshot, empty if there is none."""
+    if not os.path.exists(filepath):
+        return pd.Series([], index=pd.Index([], dtype='string'), dtype='uint64')
+    index = pd.read_csv(filepath, dtype={'key': str, 'hash': 'uint64'}, keep_default_na=False)
+    return pd.Series(index['hash'].to_numpy(), index=pd.Index(index['key'], dtype='string'))
+
+
+def save_hash_index(index, filepath):
+    """Replace the saved hash index atomically."""
+    frame = pd.DataFrame({'key': index.index.astype(str), 'hash': index.to_numpy()})
+    write_csv_atomic(frame, filepath, index=False)
+
+
+def _write_changes(df, output_path, written):
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    df.to_csv(output_path, mode='a' if written else 'w', index=False, header=not written)
+
+
+def diff_snapshot(chunks, key, index_path, output_path=None, new_index_path=None):
+    """Compare a new snapshot with the previous one and save its hash index.
+
+    Args:
+        chunks (pd.DataFrame or iterable): New snapshot, or chunks of it
+        key (str): Key column, e.g. 'transaction_id' or 'ISBN'
+        index_path (str): CSV file holding the previous snapshot's
+            hash index; replaced with the new one afterwards
+        output_path (str, optional): CSV file the changes are written to.
+            If None, they are returned.
+        new_index_path (str, optional): Save the new hash index here
+            instead of replacing index_path, e.g. a staging file that is
+            only moved over it once the whole run has succeeded
+
+    Returns:
+        tuple: (changes DataFrame or None if written to disk, stats dict
+            with inserts, updates, deletes, unchanged and skipped rows).
+            Changes have an 'op' column ('insert', 'update' or 'delete')
+            followed by the snapshot columns.
+
+    Example:
+        >>> chunks = load_csv('data/circulation_data.csv', chunksize=100_000, dtype=str)
+        >>> _, stats = diff_snapshot(chunks, 'transaction_id',
+        ...                          'data/snapshots/circulation_index.csv',
+        ...                          'data/silver/circulation_changes.csv')
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    previous = load_hash_index(index_path)
+    seen = np.zeros(len(previous), dtype=bool)
+    inserted = set()
+
+    stats = {'inserts': 0, 'updates': 0, 'deletes': 0, 'unchanged': 0, 'skipped': 0}
+    new_keys = []
+    new_hashes = []
+    frames = []
+    columns = None
+    written = False
+    for chunk in chunks:
+        columns = columns or list(chunk.columns)
+        keys, hashes = row_hashes(chunk, key)
+        first = ~keys.duplicated().to_numpy() & keys.notna().to_numpy()
+        positions = previous.index.get_indexer(keys)
+        known = positions >= 0
+
+        # Skip keys already met in an earlier chunk of this snapshot
+        repeated = np.zeros(len(chunk), dtype=bool)
+        repeated[known] = seen[positions[known]]
+        new = np.flatnonzero(~known & first)
+        repeated[new] = keys.iloc[new].isin(inserted).to_numpy()
+        keep = first & ~repeated
+        stats['skipped'] += int(len(chunk) - keep.sum())
+
+        seen[positions[known & keep]] = True
+        is_insert = keep & ~known
+        is_update = keep & known
+        is_update[is_update] = hashes[is_update] != previous.to_numpy()[positions[is_update]]
+        inserted.update(keys[is_insert])
+        stats['inserts'] += int(is_insert.sum())
+        stats['updates'] += int(is_update.sum())
+        stats['unchanged'] += int((keep & known).sum() - is_update.sum())
+        new_keys.append(keys[keep])
+        new_hashes.append(hashes[keep])
+
+        changed = chunk[is_insert | is_update].copy()
+        ops = np.where(is_insert[is_insert | is_update], 'insert', 'update')
+        changed.insert(0, OP_COLUMN, ops)
+        if output_path is None:
+            frames.append(changed)
+        elif len(changed):
+            _write_changes(changed, output_path, written)
+            written = True
+
+    deleted = previous.index[~seen]
+    stats['deletes'] = len(deleted)
+    deletes = pd.DataFrame({OP_COLUMN: 'delete', key: deleted.astype(str)},
+                           columns=[OP_COLUMN] + (columns or [key]))
+    if output_path is None:
+        frames.append(deletes)
+    elif len(deletes) or not written:
+        _write_changes(deletes, output_path, written)
+
+    if new_keys:
+        index = pd.Series(np.concatenate(new_hashes),
+                          index=pd.Index(pd.concat(new_keys, ignore_index=True), dtype='string'))
+    else:
+        index = pd.Series([], index=pd.Index([], dtype='string'), dtype='uint64')
+    save_hash_index(index, new_index_path or index_path)
+    logger.info(f"Snapshot diff on {key}: {stats['inserts']} inserts, {stats['updates']} "
+                f"updates, {stats['deletes']} deletes, {stats['unchanged']} unchanged")
+
+    if output_path is not None:
+        return None, stats
+    return pd.concat(frames, ignore_index=True), stats
@@ -0,0 +1,307 @@
+"""
+Atomic writes and a run journal so a failed pipeline run can be resumed.
+
+Files are written to a temporary file in the target directory and renamed
+over the target once complete, so a crash never leaves a half-written
+silver file behind: readers see either the old file or the new one.
+
+The journal (journal.json in the checkpoint directory) records which
+stages of the current run have finished. Each finished stage's return
+value is pickled next to it, so `--resume` can skip the stage and hand
+the same value to the stages after it. Chunked stages also record their
+progress after every chunk: the number of chunks done, the size of each
+output file, and the running state (row counts, partial totals). On
+resume the output files are cut back to those sizes and the stage carries
+on from the next chunk.
+
+A journal only resumes the run it was written for: if the input files or
+the run options have changed, the run starts from scratch.
+
+Several files that must change together (a gold table and its state, or
+the recommendation matrix and its codes) are replaced with commit_files():
+all of them or none take effect, even across a crash.
+
+A stage can also write a file that must only take effect once the whole
+run has succeeded, such as the snapshot hash index that the next run
+diffs against. stage_file() hands out a staging path and records it in
+the journal; finish_run() moves it over the real file.
+"""
+
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = 'data/checkpoints'
+JOURNAL_FILE = 'journal.json'
+# Commit file and suffix of the files staged by commit_files()
+COMMIT_FILE = '_commit.json'
+STAGED_SUFFIX = '.staged'
+
+
+@contextmanager
+def atomic_write(path, mode='w', **open_kwargs):
+    """Open a temporary file that replaces path when the block exits cleanly.
+
+    Args:
+        path (str): File to write
+        mode (str): 'w' or 'wb'
+        **open_kwargs: Passed to open(), e.g. newline='' or encoding
+
+    Example:
+        >>> with atomic_write('data/silver/report.json') as file:
+        ...     json.dump(report, file)
+    """
+    directory = os.path.dirname(str(path)) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(str(path))}.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_csv_atomic(df, path, **to_csv_kwargs):
+    """Write a DataFrame to CSV through atomic_write()."""
+    with atomic_write(path, newline='') as file:
+        df.to_csv(file, **to_csv_kwargs)
+    return path
+
+
+def recover_files(directory):
+    """Finish a commit_files() call that was interrupted, or drop the files of one that never committed."""
+    commit_path = os.path.join(directory, COMMIT_FILE)
+    if os.path.exists(commit_path):
+        with open(commit_path) as file:
+            filenames = json.load(file)
+        for filename in filenames:
+            staged = os.path.join(directory, filename + STAGED_SUFFIX)
+            if os.path.exists(staged):
+                os.replace(staged, os.path.join(directory, filename))
+        os.remove(commit_path)
+    for filename in os.listdir(directory):
+        if filename.endswith(STAGED_SUFFIX):
+            os.remove(os.path.join(directory, filename))
+
+
+def commit_files(directory, files):
+    """Replace several files in a directory so that either all or none of them change.
+
+    Every file is first written next to its target. Writing the commit file
+    is the point of no return: once it exists, the staged files are moved
+    into place, by this call or, after a crash, by the next recover_files().
+    Call recover_files() before reading the files.
+
+    Args:
+        directory (str): Directory holding the files
+        files (dict): Filename -> DataFrame, saved as CSV without its
+            index, or a callable that writes the file to the path it is given
+
+    Example:
+        >>> commit_files('data/gold', {'circulation_daily.csv': daily,
+        ...                            'loans.npz': lambda path: sparse.save_npz(path, matrix)})
+    """
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in files.items():
+        staged = os.path.join(directory, filename + STAGED_SUFFIX)
+        if callable(content):
+            content(staged)
+        else:
+            write_csv_atomic(content, staged, index=False)
+    with atomic_write(os.path.join(directory, COMMIT_FILE)) as file:
+        json.dump(list(files), file)
+    recover_files(directory)
+
+
+def _fingerprint(inputs):
+    """Size and modification time of each input file."""
+    fingerprint = {}
+    for name, path in sorted(inputs.items()):
+        stat = os.stat(path) if os.path.exists(path) else None
+        fingerprint[name] = [stat.st_size, stat.st_mtime_ns] if stat else None
+    return fingerprint
+
+
+def _save_journal(journal):
+    path = os.path.join(journal['dir'], JOURNAL_FILE)
+    with atomic_write(path) as file:
+        json.dump({key: value for key, value in journal.items() if key != 'dir'}, file,
+                  indent=2)
+
+
+def _dump(journal, filename, value):
+    with atomic_write(os.path.join(journal['dir'], filename), 'wb') as file:
+        pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load(journal, filename):
+    with open(os.path.join(journal['dir'], filename), 'rb') as file:
+        return pickle.load(file)
+
+
+def start_run(checkpoint_dir=DEFAULT_DIR, inputs=None, options=None, resume=False):
+    """Open the journal of a pipeline run.
+
+    Args:
+        checkpoint_dir (str): Directory holding the journal and stage results
+        inputs (dict, optional): Input files by name; resuming requires
+            them to be unchanged since the journal was written
+        options (dict, optional): Run options that must also match
+        resume (bool): Continue the previous run if it did not finish
+
+    Returns:
+        dict: The journal, passed to run_stage() and chunk_checkpoint()
+
+    Example:
+        >>> journal = start_run(inputs=BRONZE_FILES, resume=True)
+        >>> df = run_stage(journal, 'circulation', process_circulation_data)
+    """
+    fingerprint = _fingerprint({name: str(path) for name, path in (inputs or {}).items()})
+    options = dict(options or {})
+    path = os.path.join(checkpoint_dir, JOURNAL_FILE)
+
+    if resume and os.path.exists(path):
+        with open(path) as file:
+            previous = json.load(file)
+        if previous.get('finished'):
+            logger.info('Previous run finished, nothing to resume')
+        elif previous.get('inputs') != fingerprint or previous.get('options') != options:
+            logger.warning('Inputs or options changed since the previous run, starting again')
+        else:
+            journal = {**previous, 'dir': checkpoint_dir}
+            logger.info(f"Resuming run {journal['run_id']} after stages: "
+                        f"{', '.join(journal['stages']) or 'none'}")
+            return journal
+    elif resume:
+        logger.info(f'No journal in {checkpoint_dir}, starting a new run')
+
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    journal = {
+        'dir': checkpoint_dir,
+        'run_id': datetime.now().strftime('%Y%m%dT%H%M%S'),
+        'inputs': fingerprint,
+        'options': options,
+        'stages': {},
+        'chunks': {},
+        'finished': False,
+    }
+    _save_journal(journal)
+    return journal
+
+
+def run_stage(journal, name, func, /, *args, **kwargs):
+    """Run a stage once per run, reusing its saved result on resume.
+
+    Args:
+        journal (dict or None): From start_run(); None runs func directly
+        name (str): Stage name, unique within the run
+        func (callable): The stage
+        *args, **kwargs: Passed to func
+
+    Returns:
+        The return value of func, or of the run that completed the stage
+    """
+    if journal is None:
+        return func(*args, **kwargs)
+    if name in journal['stages']:
+        logger.info(f'Stage {name} already completed, loading its result')
+        return _load(journal, journal['stages'][name]['result'])
+
+    result = func(*args, **kwargs)
+    filename = f'{name}.pkl'
+    _dump(journal, filename, result)
+    journal['stages'][name] = {'result': filename,
+                               'completed': datetime.now().isoformat(timespec='seconds')}
+    journal['chunks'].pop(name, None)
+    _save_journal(journal)
+    return result
+
+
+def chunk_checkpoint(journal, name):
+    """Resume point and progress callback for a chunked stage.
+
+    Output files listed in the last checkpoint are truncated back to the
+    size they had then, dropping any rows written after it.
+
+    Args:
+        journal (dict or None): From start_run()
+        name (str): Stage name
+
+    Returns:
+        tuple: (start, on_chunk). start is None, or a dict with 'chunks'
+            (chunks already done) and 'state' (running state at that
+            point). on_chunk(chunks, state, paths) records progress after
+            a chunk has been written to paths. Both are None without a
+            journal.
+    """
+    if journal is None:
+        return None, None
+
+    start = None
+    progress = journal['chunks'].get(name)
+    if progress:
+        for path, size in progress['sizes'].items():
+            if os.path.exists(path):
+                with open(path, 'r+b') as file:
+                    file.truncate(size)
+        start = {'chunks': progress['chunks'], 'state': _load(journal, progress['state'])}
+        logger.info(f"Stage {name}: resuming after {progress['chunks']} chunks")
+
+    def on_chunk(chunks, state, paths):
+        filename = f'{name}.chunks.pkl'
+        _dump(journal, filename, state)
+        journal['chunks'][name] = {
+            'chunks': chunks,
+            'state': filename,
+            'sizes': {str(path): os.path.getsize(path) for path in paths},
+        }
+        _save_journal(journal)
+
+    return start, on_chunk
+
+
+def stage_file(journal, path):
+    """Path to write a file to that replaces path when the run finishes.
+
+    Without a journal the file is written to path directly.
+
+    Example:
+        >>> save_hash_index(index, stage_file(journal, 'data/snapshots/circulation_index.csv'))
+    """
+    if journal is None:
+        return str(path)
+    staged = f'{path}.staged'
+    journal.setdefault('staged', {})[staged] = str(path)
+    _save_journal(journal)
+    return staged
+
+
+def finish_run(journal):
+    """Commit the staged files, mark the run as finished and remove the saved stage results."""
+    if journal is None:
+        return
+    for staged, path in journal.pop('staged', {}).items():
+        if os.path.exists(staged):
+            os.replace(staged, path)
+    for filename in os.listdir(journal['dir']):
+        if filename.endswith('.pkl'):
+            os.remove(os.path.join(journal['dir'], filename))
+    journal['finished'] = True
+    journal['stages'] = {name: {**stage, 'result': None}
+                         for name, stage in journal['stages'].items()}
+    journal['chunks'] = {}
+    _save_journal(journal)
@@ -6,6 +6,7 @@ import pandas as pd
 import logging
 from typing import List, Optional
 import numpy as np
+from src.data_processing.backends import get_backend, dispatch
 
 logger = logging.getLogger(__name__)
 
@@ -13,15 +14,18 @@ def remove_duplicates(df, subset=None):
     """Remove duplicate rows from DataFrame.
 
     Args:
-        df (pd.DataFrame): Input DataFrame
+        df (pd.DataFrame): Input DataFrame, or a Dask/Polars frame
         subset (list, optional): Columns to consider for duplicates
 
     Returns:
-        pd.DataFrame: DataFrame with duplicates removed
+        pd.DataFrame: DataFrame with duplicates removed, same backend as df
 
     Example:
         >>> df_clean = remove_duplicates(df, subset=['transaction_id'])
     """
+    if get_backend(df) != 'pandas':
+        return dispatch('remove_duplicates', df, subset=subset)
+
     df = df.copy()  # Work on a copy!
 
     initial_rows = len(df)
@@ -33,14 +37,53 @@ def remove_duplicates(df, subset=None):
 
     return df
 
-def handle_missing_values(df, strategy='drop', fill_value=None, columns=None):
+def _sorted_positions(df, keys):
+    """Row positions that stably sort df by keys."""
+    return df[keys].reset_index(drop=True).sort_values(keys, kind='mergesort').index.to_numpy()
+
+def _group_mode(df, group_by, col):
+    """Most frequent non-null value of col within each group, aligned to df."""
+    counts = df.groupby(group_by + [col], dropna=True).size().reset_index(name='_count')
+    counts = counts.sort_values('_count', ascending=False, kind='mergesort')
+    modes = counts.drop_duplicates(group_by)
+    aligned = df[group_by].merge(modes[group_by + [col]], how='left', on=group_by)
+    return pd.Series(aligned[col].to_numpy(), index=df.index)
+
+def _group_interpolate(values, groups):
+    """Linear interpolation between the nearest valid rows of the same group.
+
+    Leading and trailing gaps of each group are left missing.
+    """
+    positions = pd.Series(np.arange(len(values), dtype=float), index=values.index)
+    valid_positions = positions.where(values.notna())
+    prev_value = values.groupby(groups).ffill()
+    next_value = values.groupby(groups).bfill()
+    prev_pos = valid_positions.groupby(groups).ffill()
+    next_pos = valid_positions.groupby(groups).bfill()
+    weight = (positions - prev_pos) / (next_pos - prev_pos)
+    filled = prev_value + (next_value - prev_value) * weight.fillna(0)
+    return values.fillna(filled)
+
+def handle_missing_values(df, strategy='drop', fill_value=None, columns=None,
+                          group_by=None, order_by=None):
     """Handle missing values in DataFrame.
 
+    Every strategy except 'drop' and 'fill' can be applied within groups
+    (e.g. per member_id or branch_id), so values never leak between
+    unrelated members or branches. Grouped strategies use groupby-transform
+    operations over the whole frame rather than a loop over the groups.
+
     Args:
-        df (pd.DataFrame): Input DataFrame
-        strategy (str): 'drop', 'fill', or 'forward_fill'
+        df (pd.DataFrame): Input DataFrame, or a Dask/Polars frame
+        strategy (str): 'drop', 'fill', 'forward_fill', 'backward_fill',
+            'median', 'mode' or 'interpolate'
         fill_value: Value to fill if strategy='fill'
         columns (list, optional): Specific columns to handle
+        group_by (str or list, optional): Columns whose groups are imputed
+            independently
+        order_by (str or list, optional): Columns giving the row order for
+            'forward_fill', 'backward_fill' and 'interpolate'. Rows are
+            returned in their original order.
 
     Returns:
         pd.DataFrame: DataFrame with missing values handled
@@ -48,35 +91,153 @@ def handle_missing_values(df, strategy='drop', fill_value=None, columns=None):
     Example:
         >>> df_clean = handle_missing_values(df, strategy='drop')
         >>> df_filled = handle_missing_values(df, strategy='fill', fill_value=0)
+        >>> df_ffill = handle_missing_values(df, strategy='forward_fill',
+        ...                                  group_by='member_id', order_by='checkout_date')
     """
+    if get_backend(df) != 'pandas':
+        return dispatch('handle_missing_values', df, strategy=strategy, fill_value=fill_value,
+                        columns=columns, group_by=group_by, order_by=order_by)
+
     df = df.copy()
 
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    group_by = group_by or []
+    order_by = order_by or []
+
     if columns:
-        target_cols = columns
+        target_cols = list(columns)
     else:
-        target_cols = df.columns
+        target_cols = [col for col in df.columns if col not in group_by]
 
     initial_rows = len(df)
 
     if strategy == 'drop':
         df = df.dropna(subset=target_cols)
         logger.info(f"Dropped {initial_rows - len(df)} rows with missing values")
+        return df
 
-    elif strategy == 'fill':
+    if strategy == 'fill':
         if fill_value is None:
             raise ValueError("fill_value must be provided when strategy='fill'")
         df[target_cols] = df[target_cols].fillna(fill_value)
         logger.info(f"Filled missing values with {fill_value}")
+        return df
 
-    elif strategy == 'forward_fill':
-        df[target_cols] = df[target_cols].fillna(method='ffill')
-        logger.info("Forward filled missing values")
+    if strategy not in ('forward_fill', 'backward_fill', 'median', 'mode', 'interpolate'):
+        raise ValueError(f"Unknown strategy: {strategy}")
 
+    if strategy in ('median', 'interpolate'):
+        numeric = df[target_cols].select_dtypes('number').columns.tolist()
+        skipped = [col for col in target_cols if col not in numeric]
+        if skipped:
+            logger.warning(f"Skipping non-numeric columns for {strategy}: {skipped}")
+        target_cols = numeric
+    if not target_cols:
+        return df
+
+    # Work on the rows in group/order sequence, then write back by position
+    sort_keys = group_by + order_by
+    order = _sorted_positions(df, sort_keys) if sort_keys else np.arange(len(df))
+    work = df.iloc[order]
+    groups = [work[col] for col in group_by]
+
+    if strategy == 'forward_fill':
+        filled = work.groupby(groups, dropna=False)[target_cols].ffill() if groups else work[target_cols].ffill()
+    elif strategy == 'backward_fill':
+        filled = work.groupby(groups, dropna=False)[target_cols].bfill() if groups else work[target_cols].bfill()
+    elif strategy == 'median':
+        if groups:
+            medians = work.groupby(groups, dropna=False)[target_cols].transform('median')
+        else:
+            medians = work[target_cols].median()
+        filled = work[target_cols].fillna(medians)
+    elif strategy == 'mode':
+        filled = work[target_cols].copy()
+        for col in target_cols:
+            if group_by:
+                modes = _group_mode(work, group_by, col)
+            else:
+                mode = work[col].mode()
+                modes = mode.iloc[0] if len(mode) else None
+            filled[col] = work[col].fillna(modes)
     else:
-        raise ValueError(f"Unknown strategy: {strategy}")
+        labels = work.groupby(groups, dropna=False).ngroup() if groups else pd.Series(0, index=work.index)
+        filled = work[target_cols].copy()
+        for col in target_cols:
+            filled[col] = _group_interpolate(work[col].astype(float), labels)
+
+    filled.index = order
+    filled = filled.sort_index()
+    filled.index = df.index
+    df[target_cols] = filled
+    by = f" within {group_by}" if group_by else ""
+    logger.info(f"Imputed missing values with {strategy}{by}")
 
     return df
 
+def impute_chunks(chunks, strategy='forward_fill', fill_value=None, columns=None,
+                  group_by=None):
+    """Handle missing values chunk by chunk over a stream of DataFrames.
+
+    For 'forward_fill' the last non-null value of every group is carried
+    from one chunk into the next, so the result matches a forward fill over
+    the concatenated data. Chunks must arrive in the intended row order
+    (e.g. sorted by date). Strategies that need to see a whole group
+    ('backward_fill', 'median', 'mode', 'interpolate') are not available.
+
+    Args:
+        chunks (iterable): DataFrames, e.g. from pd.read_csv(..., chunksize=n)
+        strategy (str): 'drop', 'fill' or 'forward_fill'
+        fill_value: Value to fill if strategy='fill'
+        columns (list, optional): Specific columns to handle
+        group_by (str or list, optional): Columns whose groups are imputed
+            independently
+
+    Yields:
+        pd.DataFrame: Each chunk with missing values handled
+
+    Example:
+        >>> chunks = pd.read_csv('data/circulation_data.csv', chunksize=100_000)
+        >>> for chunk in impute_chunks(chunks, group_by='member_id'):
+        ...     process(chunk)
+    """
+    if strategy not in ('drop', 'fill', 'forward_fill'):
+        raise ValueError(f"Strategy {strategy} cannot be applied chunk by chunk")
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    group_by = group_by or []
+
+    carry = None
+    for chunk in chunks:
+        if strategy != 'forward_fill':
+            yield handle_missing_values(chunk, strategy=strategy, fill_value=fill_value,
+                                        columns=columns)
+            continue
+
+        target_cols = list(columns) if columns else [c for c in chunk.columns if c not in group_by]
+        # Only the columns being filled go through the concat, which would
+        # upcast an int column elsewhere in the chunk to float
+        work = chunk[group_by + target_cols]
+        if carry is not None:
+            work = pd.concat([carry, work], ignore_index=True)
+        filled = handle_missing_values(work, strategy='forward_fill', columns=target_cols,
+                                       group_by=group_by)
+        result = chunk.copy()
+        for col in target_cols:
+            if chunk[col].isna().any():
+                result[col] = filled[col].iloc[len(work) - len(chunk):].to_numpy()
+
+        # Last non-null value per group becomes the seed for the next chunk
+        state = filled[group_by + target_cols]
+        if group_by:
+            carry = state.groupby(group_by, as_index=False, dropna=False).last()
+        else:
+            carry = state.tail(1).reset_index(drop=True)
+        yield result
+
 def format_dates(date, preferred_sep='-'):
     if not isinstance(date, str):
         return date
@@ -109,13 +270,49 @@ def format_dates(date, preferred_sep='-'):
     elif form == f'YYYY{sep}MM{sep}DD':
         return date.replace(sep, preferred_sep)
 
-def standardize_dates(df, date_columns, date_format='%Y-%m-%d'):
+def format_dates_series(values, preferred_sep='-'):
+    """Faster values.map(format_dates) for columns with repeated dates.
+
+    A date column holds far fewer distinct dates than rows, so each
+    distinct string is formatted once and the results are spread back
+    over the rows. The output is the same as values.map(format_dates),
+    except that strings format_dates() raises on (e.g. '5-x-2024') are
+    returned unchanged instead of failing the whole column. Check changes
+    against format_dates() with shadow.py.
+
+    Args:
+        values (pd.Series): Date strings; other values pass through
+        preferred_sep (str): Separator of the output dates
+
+    Returns:
+        pd.Series: Reformatted dates, same index as values
+
+    Example:
+        >>> format_dates_series(df['checkout_date'])
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    formatted = np.empty(len(uniques) + 1, dtype=object)
+    for i, value in enumerate(uniques):
+        try:
+            formatted[i] = format_dates(value, preferred_sep)
+        except (IndexError, ValueError, UnboundLocalError):
+            formatted[i] = value
+    is_text = np.array([isinstance(value, str) for value in uniques] + [False])
+    # Missing values (code -1) and non-strings keep their original value
+    original = values.to_numpy(dtype=object)
+    result = np.where(is_text[codes], formatted[codes], original)
+    return pd.Series(result, index=values.index, name=values.name, dtype=object)
+
+def standardize_dates(df, date_columns, date_format='%Y-%m-%d', keep_datetime=False):
     """Standardize date columns to consistent format.
 
     Args:
-        df (pd.DataFrame): Input DataFrame
+        df (pd.DataFrame): Input DataFrame, or a Dask/Polars frame
         date_columns (list): Column names containing dates
         date_format (str): Target date format
+        keep_datetime (bool): Keep native datetime64 columns instead of
+            converting them to Python date objects
 
     Returns:
         pd.DataFrame: DataFrame with standardized dates
@@ -123,6 +320,10 @@ def standardize_dates(df, date_columns, date_format='%Y-%m-%d'):
     Example:
         >>> df_clean = standardize_dates(df, ['checkout_date', 'return_date'])
     """
+    if get_backend(df) != 'pandas':
+        return dispatch('standardize_dates', df, date_columns, date_format=date_format,
+                        keep_datetime=keep_datetime)
+
     df = df.copy()
 
     if isinstance(date_columns, str):
@@ -139,7 +340,8 @@ def standardize_dates(df, date_columns, date_format='%Y-%m-%d'):
         try:
             df[col] = df[col].apply(format_dates)
             df[col] = pd.to_datetime(df[col], errors='coerce')
-            df[col] = df[col].dt.date
+            if not keep_datetime:
+                df[col] = df[col].dt.date
             logger.info(f"Standardized dates in column: {col}")
         except Exception as e:
             logger.error(f"Error standardizing dates in {col}: {e}")
@@ -153,12 +355,14 @@ def standardise_isbn(df, column='ISBN'):
     one long number in string format.
 
     Args:
-        df (pd.DataFrame): Input DataFrame
+        df (pd.DataFrame): Input DataFrame, or a Dask/Polars frame
         column (str) (Optional): Column names containing dates
 
     Returns:
         pd.DataFrame: DataFrame with standardized ISBN values
     """
+    if get_backend(df) != 'pandas':
+        return dispatch('standardise_isbn', df, column=column)
 
     df = df.copy()
     if column not in df:
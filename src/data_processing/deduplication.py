@@ -0,0 +1,212 @@
+"""
+Near-duplicate detection for catalogue records.
+
+Records are compared on character 3-gram shingles of their normalised
+title and author. Each record gets a MinHash signature. Locality
+sensitive hashing (LSH) then splits the signature into bands, and two
+records become a candidate pair only if they share a band bucket inside
+the same blocking key. The number of candidates therefore grows roughly
+linearly with the catalogue rather than quadratically. Candidate pairs
+are scored by MinHash similarity (an estimate of Jaccard similarity) and
+linked into duplicate groups.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3
+THRESHOLD = 0.7
+
+# Buckets larger than this are linked as a chain of consecutive members
+# instead of all their pairs. Large buckets hold the most similar records
+# (e.g. many copies of one title), so they must not be dropped, but their
+# pair count grows quadratically; a chain links them in linear pairs.
+MAX_BUCKET_SIZE = 50
+
+def normalise_text(values):
+    """Lower-case, strip punctuation and collapse whitespace."""
+    values = pd.Series(values).fillna('').astype(str).str.lower()
+    values = values.str.replace(r'[^a-z0-9 ]', ' ', regex=True)
+    return values.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def title_block(df, title='Title'):
+    """Default blocking key: first two characters of the normalised title."""
+    return normalise_text(df[title]).str[:2]
+
+
+def _shingles(texts, size):
+    """Unique (record, shingle code) pairs of character shingles, sorted by record.
+
+    normalise_text() leaves only ASCII characters, so the texts are laid out
+    as a 2D byte array and each shingle is packed into one integer.
+    """
+    padded = (' ' + texts + ' ').to_numpy(dtype=str)
+    lengths = np.char.str_len(padded)
+    width = max(int(lengths.max()), size)
+    chars = np.frombuffer(padded.astype(f'S{width}').tobytes(), dtype=np.uint8)
+    chars = chars.reshape(len(padded), width).astype(np.int64)
+
+    codes = np.zeros((len(padded), width - size + 1), dtype=np.int64)
+    for offset in range(size):
+        codes = (codes << 8) | chars[:, offset:offset + codes.shape[1]]
+    # Texts shorter than one shingle keep their single zero-padded shingle
+    valid = np.arange(codes.shape[1])[None, :] <= np.maximum(lengths - size, 0)[:, None]
+
+    records = np.broadcast_to(np.arange(len(padded))[:, None], codes.shape)[valid]
+    packed = np.sort((records << (8 * size)) | codes[valid])
+    packed = packed[np.r_[True, packed[1:] != packed[:-1]]]
+    return packed >> (8 * size), packed & ((1 << (8 * size)) - 1)
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=42):
+    """MinHash signature of each text.
+
+    Args:
+        texts (pd.Series): Normalised texts
+        num_perm (int): Number of hash functions
+        shingle_size (int): Characters per shingle
+        seed (int): Seed for the hash functions
+
+    Returns:
+        np.ndarray: uint32 array of shape (len(texts), num_perm)
+    """
+    texts = pd.Series(texts).reset_index(drop=True)
+    records, shingles = _shingles(texts, shingle_size)
+    starts = np.flatnonzero(np.r_[True, records[1:] != records[:-1]])
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+    shingles = shingles.astype(np.uint64)
+
+    # Multiply-shift hashing h(x) = (a * x + b) >> 32, one hash function at a time
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for perm in range(num_perm):
+        hashed = ((shingles * a[perm] + b[perm]) >> np.uint64(32)).astype(np.uint32)
+        signatures[records[starts], perm] = np.minimum.reduceat(hashed, starts)
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, blocks=None, bands=BANDS, max_bucket_size=MAX_BUCKET_SIZE):
+    """Record pairs that share at least one LSH band bucket.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures
+        blocks (array-like, optional): Blocking key per record; records in
+            different blocks are never paired
+        bands (int): Number of bands, must divide the signature length
+        max_bucket_size (int): Buckets with more records yield only the
+            pairs of consecutive members, which still link them all
+
+    Returns:
+        np.ndarray: int array of shape (n_pairs, 2) with i < j
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f'bands ({bands}) must divide the signature length ({num_perm})')
+    rows = num_perm // bands
+    block_hash = (np.zeros(n, dtype=np.uint64) if blocks is None
+                  else pd.util.hash_array(np.asarray(blocks, dtype=object)))
+
+    members = []
+    for band in range(bands):
+        band_values = pd.DataFrame(signatures[:, band * rows:(band + 1) * rows])
+        band_values['block'] = block_hash
+        bucket = pd.util.hash_pandas_object(band_values, index=False).to_numpy()
+        members.append(pd.DataFrame({'bucket': bucket, 'band': band, 'record': np.arange(n)}))
+    members = pd.concat(members, ignore_index=True)
+
+    sizes = members.groupby(['band', 'bucket'])['record'].transform('size')
+    small = members[(sizes > 1) & (sizes <= max_bucket_size)]
+    pairs = small.merge(small, on=['band', 'bucket'], suffixes=('_a', '_b'))
+    pairs = pairs[pairs['record_a'] < pairs['record_b']][['record_a', 'record_b']]
+
+    large = members[sizes > max_bucket_size].sort_values(['band', 'bucket', 'record'])
+    band, bucket, record = (large[col].to_numpy() for col in ('band', 'bucket', 'record'))
+    same = (band[1:] == band[:-1]) & (bucket[1:] == bucket[:-1])
+    chain = pd.DataFrame({'record_a': record[:-1][same], 'record_b': record[1:][same]})
+
+    pairs = pd.concat([pairs, chain], ignore_index=True)
+    return pairs.drop_duplicates().to_numpy()
+
+
+def _connected_components(n, pairs):
+    """Component label per record, linking the given pairs.
+
+    Each record repeatedly takes the smallest label among its neighbours,
+    with pointer jumping, until no label changes.
+    """
+    labels = np.arange(n)
+    left, right = pairs[:, 0], pairs[:, 1]
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, lowest)
+        np.minimum.at(updated, right, lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def find_near_duplicates(df, columns=('Title', 'Author'), block=title_block,
+                         threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """Find groups of near-duplicate records.
+
+    Args:
+        df (pd.DataFrame): Catalogue records
+        columns (tuple): Text columns compared
+        block (callable, optional): df -> blocking key per record, or None
+            to compare across the whole catalogue
+        threshold (float): Minimum estimated Jaccard similarity of a pair
+        num_perm (int): MinHash signature length
+        bands (int): LSH bands
+
+    Returns:
+        pd.DataFrame: One row per record in a duplicate group, with the
+            original columns plus cluster_id and similarity (highest
+            similarity of the record to another group member)
+
+    Example:
+        >>> groups = find_near_duplicates(catalogue)
+        >>> groups.groupby('cluster_id')['ISBN'].apply(list)
+    """
+    df = df.reset_index(drop=True)
+    empty = df.iloc[0:0].assign(cluster_id=pd.Series(dtype='int64'),
+                                similarity=pd.Series(dtype='float64'))
+    if len(df) < 2:
+        return empty
+
+    texts = normalise_text(df[columns[0]])
+    for col in columns[1:]:
+        texts = texts + ' | ' + normalise_text(df[col])
+
+    signatures = minhash_signatures(texts, num_perm=num_perm)
+    blocks = None if block is None else block(df).to_numpy()
+    pairs = lsh_candidate_pairs(signatures, blocks=blocks, bands=bands)
+    logger.info(f'{len(pairs)} candidate pairs among {len(df)} records')
+    if len(pairs) == 0:
+        return empty
+
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = similarity >= threshold
+    pairs, similarity = pairs[keep], similarity[keep]
+    if len(pairs) == 0:
+        return empty
+
+    labels = _connected_components(len(df), pairs)
+    best = pd.concat([
+        pd.Series(similarity, index=pairs[:, 0]),
+        pd.Series(similarity, index=pairs[:, 1]),
+    ]).groupby(level=0).max()
+
+    result = df.loc[best.index].assign(cluster_id=labels[best.index], similarity=best.values)
+    result['cluster_id'] = pd.factorize(result['cluster_id'], sort=True)[0]
+    logger.info(f"Found {result['cluster_id'].nunique()} near-duplicate groups")
+    return result.sort_values(['cluster_id', 'similarity'], ascending=[True, False])
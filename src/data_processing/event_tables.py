@@ -0,0 +1,99 @@
+"""
+Normalise nested event records into linked tables.
+
+Each event record looks like:
+    {'event_id': 'EVT0000', 'name': ..., 'branch': ..., 'date': ...,
+     'attendance': {'registered': 18, 'actual': 27,
+                    'age_breakdown': {'0-5': 9, '6-12': 4, ...}},
+     'feedback_score': 4.0}
+
+Instead of one wide frame with a dotted column per nested field, the
+records are split in a single pass into:
+    events           event_key, event_id and the other scalar fields
+    attendance       event_key, registered, actual
+    age_bands        age_band_key, age_band
+    event_age_bands  event_key, age_band_key, attendees (long form)
+
+Keys are integers, so joins and group-bys on them are cheap. A missing
+nested field only leaves a gap in its own table; the event itself is kept.
+"""
+
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_FIELDS = ['registered', 'actual']
+
+
+def normalise_events(records):
+    """Split event records into events, attendance and age-band tables.
+
+    Args:
+        records (iterable): Event dicts, e.g. from ingestion.load_json_records()
+
+    Returns:
+        dict: 'events', 'attendance', 'age_bands' and 'event_age_bands'
+            DataFrames, see the module docstring
+
+    Example:
+        >>> tables = normalise_events(load_json_records('data/events_data.json'))
+        >>> tables['event_age_bands'].groupby('age_band_key')['attendees'].sum()
+    """
+    events = []
+    attendance = {'event_key': [], **{field: [] for field in ATTENDANCE_FIELDS}}
+    band_keys = {}
+    event_bands = {'event_key': [], 'age_band_key': [], 'attendees': []}
+
+    for event_key, record in enumerate(records, start=1):
+        events.append({'event_key': event_key,
+                       **{name: value for name, value in record.items()
+                          if not isinstance(value, (dict, list))}})
+
+        nested = record.get('attendance')
+        if not isinstance(nested, dict):
+            continue
+        attendance['event_key'].append(event_key)
+        for field in ATTENDANCE_FIELDS:
+            attendance[field].append(nested.get(field))
+
+        for band, count in (nested.get('age_breakdown') or {}).items():
+            if count is None:
+                continue
+            event_bands['event_key'].append(event_key)
+            event_bands['age_band_key'].append(band_keys.setdefault(band, len(band_keys) + 1))
+            event_bands['attendees'].append(count)
+
+    tables = {
+        'events': pd.DataFrame(events, columns=None if events else ['event_key']),
+        'attendance': pd.DataFrame(attendance).astype({field: 'Int64'
+                                                       for field in ATTENDANCE_FIELDS}),
+        'age_bands': pd.DataFrame({'age_band_key': list(band_keys.values()),
+                                   'age_band': list(band_keys)}),
+        'event_age_bands': pd.DataFrame(event_bands).astype({'attendees': 'int64'}),
+    }
+    for name in tables:
+        key_cols = [col for col in tables[name].columns if col.endswith('_key')]
+        tables[name] = tables[name].astype({col: 'int32' for col in key_cols})
+    logger.info(f"Normalised {len(tables['events'])} events into "
+                f"{len(tables['event_age_bands'])} age-band rows")
+    return tables
+
+
+def age_band_attendance(tables, events=None):
+    """Long-form age-band attendance with the event attributes joined on.
+
+    Args:
+        tables (dict): Result of normalise_events()
+        events (pd.DataFrame, optional): Events table to join, e.g. after
+            cleaning; defaults to tables['events']
+
+    Returns:
+        pd.DataFrame: One row per event and age band, with the event
+            columns plus age_band and attendees
+    """
+    events = tables['events'] if events is None else events
+    long = tables['event_age_bands'].merge(tables['age_bands'], on='age_band_key')
+    long = events.merge(long, on='event_key', how='inner')
+    return long.drop(columns='age_band_key').sort_values(['event_key', 'age_band'],
+                                                         ignore_index=True)
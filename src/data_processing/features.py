@@ -0,0 +1,211 @@
+"""
+Derived loan features for circulation data.
+
+Dates are kept as native datetime64 throughout, so durations are array
+subtraction rather than row-wise arithmetic on Python date objects.
+
+Per-loan features (duration, open, overdue) only need the row itself and
+are computed chunk by chunk. The daily series need all loans, so each
+chunk is reduced to small daily counts that are added up across chunks:
+checkouts and returns per day, and checkouts per branch and day. Open
+loans per day are then the cumulative sum of checkouts minus returns,
+and rolling branch volumes are a rolling sum over the daily counts.
+"""
+
+import itertools
+import logging
+import os
+import pandas as pd
+from src.data_processing.gold import LOAN_PERIOD_DAYS
+
+logger = logging.getLogger(__name__)
+
+ROLLING_WINDOW_DAYS = 7
+
+
+def to_datetime64(values):
+    """Convert dates, date strings or datetime64 values to datetime64."""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors='coerce')
+
+
+def loan_features(df, loan_period_days=LOAN_PERIOD_DAYS, as_of=None,
+                  checkout='checkout_date', returned='return_date'):
+    """Add duration and overdue features to each loan.
+
+    Args:
+        df (pd.DataFrame): Circulation rows, or one chunk of them
+        loan_period_days (int): Days a loan may last before it is overdue
+        as_of (str or datetime, optional): Date open loans are measured
+            against; if None, open loans are never overdue
+        checkout (str): Checkout date column
+        returned (str): Return date column
+
+    Returns:
+        pd.DataFrame: Copy of df with datetime64 dates plus due_date,
+            loan_days (NaN for open loans), is_open, days_overdue and overdue
+    """
+    df = df.copy()
+    df[checkout] = to_datetime64(df[checkout])
+    df[returned] = to_datetime64(df[returned])
+
+    df['due_date'] = df[checkout] + pd.Timedelta(days=loan_period_days)
+    df['loan_days'] = (df[returned] - df[checkout]).dt.days
+    df['is_open'] = df[returned].isna()
+
+    end = df[returned]
+    if as_of is not None:
+        end = end.fillna(pd.Timestamp(as_of))
+    days_overdue = (end - df['due_date']).dt.days
+    df['days_overdue'] = days_overdue.clip(lower=0)
+    df['overdue'] = (days_overdue > 0).to_numpy()
+    return df
+
+
+def daily_counts(df, branch='branch_id', checkout='checkout_date', returned='return_date'):
+    """Reduce loans to daily counts that can be summed across chunks.
+
+    Args:
+        df (pd.DataFrame): Circulation rows, or one chunk of them
+        branch (str): Branch column
+        checkout (str): Checkout date column
+        returned (str): Return date column
+
+    Returns:
+        dict: 'loans' (checkouts and returns per day) and 'branches'
+            (checkouts per branch and day)
+    """
+    checkouts = to_datetime64(df[checkout]).dt.normalize()
+    returns = to_datetime64(df[returned]).dt.normalize()
+    loans = pd.concat([checkouts.value_counts().rename('checkouts'),
+                       returns.value_counts().rename('returns')], axis=1, sort=True)
+    branches = pd.DataFrame({'branch': df[branch].to_numpy(), 'date': checkouts.to_numpy()})
+    branches = branches.dropna().groupby(['branch', 'date']).size()
+    return {'loans': loans.fillna(0).astype('int64'), 'branches': branches}
+
+
+def merge_daily_counts(total, counts):
+    """Add the daily counts of one chunk to a running total."""
+    if total is None:
+        return counts
+    return {
+        'loans': total['loans'].add(counts['loans'], fill_value=0).astype('int64'),
+        'branches': total['branches'].add(counts['branches'], fill_value=0).astype('int64'),
+    }
+
+
+def open_loans_per_day(loans):
+    """Number of loans open at the end of each day.
+
+    A loan counts as open from its checkout day until the day before it is
+    returned.
+
+    Args:
+        loans (pd.DataFrame): 'loans' from daily_counts()
+
+    Returns:
+        pd.DataFrame: date, checkouts, returns and open_loans for every day
+            between the first and last event
+    """
+    if loans.empty:
+        return pd.DataFrame(columns=['date', 'checkouts', 'returns', 'open_loans'])
+    days = pd.date_range(loans.index.min(), loans.index.max(), freq='D')
+    daily = loans.reindex(days, fill_value=0)
+    daily['open_loans'] = (daily['checkouts'] - daily['returns']).cumsum()
+    return daily.rename_axis('date').reset_index()
+
+
+def rolling_branch_volumes(branches, window=ROLLING_WINDOW_DAYS):
+    """Rolling checkout volume per branch over the last window days.
+
+    Args:
+        branches (pd.Series): 'branches' from daily_counts()
+        window (int): Days in the rolling window
+
+    Returns:
+        pd.DataFrame: branch, date, checkouts and rolling_checkouts, with a
+            row for every branch and day, including days without loans
+    """
+    if branches.empty:
+        return pd.DataFrame(columns=['branch', 'date', 'checkouts', 'rolling_checkouts'])
+    # Days x branches matrix, so the rolling sum runs on all branches at once
+    wide = branches.unstack('branch', fill_value=0)
+    days = pd.date_range(wide.index.min(), wide.index.max(), freq='D')
+    wide = wide.reindex(days, fill_value=0).rename_axis('date')
+    rolling = wide.rolling(window, min_periods=1).sum().astype('int64')
+
+    result = pd.DataFrame({
+        'checkouts': wide.stack(),
+        'rolling_checkouts': rolling.stack(),
+    }).reset_index()
+    return result[['branch', 'date', 'checkouts', 'rolling_checkouts']].sort_values(
+        ['branch', 'date'], ignore_index=True)
+
+
+def compute_features(chunks, output_path=None, loan_period_days=LOAN_PERIOD_DAYS,
+                     as_of=None, window=ROLLING_WINDOW_DAYS, branch='branch_id',
+                     start=None, on_chunk=None):
+    """Compute loan features and daily series over a stream of chunks.
+
+    Args:
+        chunks (pd.DataFrame or iterable): Circulation data or chunks of it
+        output_path (str, optional): CSV file the per-loan features are
+            appended to. If None, they are returned.
+        loan_period_days (int): Days a loan may last before it is overdue
+        as_of (str or datetime, optional): Date open loans are measured against
+        window (int): Days in the rolling branch volume window
+        branch (str): Branch column
+        start (dict, optional): Resume point from checkpoint.chunk_checkpoint();
+            its chunks are skipped and its state restored
+        on_chunk (callable, optional): Called as on_chunk(chunks, state, paths)
+            after each chunk is appended to output_path
+
+    Returns:
+        dict: 'loans' (per-loan features, or None if written to disk),
+            'open_loans' (open_loans_per_day()) and 'branch_volumes'
+            (rolling_branch_volumes())
+
+    Example:
+        >>> chunks = load_csv('data/silver/circulation_clean.csv', chunksize=100_000)
+        >>> features = compute_features(chunks, as_of='2024-12-31')
+        >>> features['open_loans'].tail()
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    frames = []
+    total = None
+    rows = 0
+    done = 0
+    if start is not None:
+        done = start['chunks']
+        rows, total = start['state']['rows'], start['state']['total']
+        chunks = itertools.islice(chunks, done, None)
+    for chunk in chunks:
+        featured = loan_features(chunk, loan_period_days=loan_period_days, as_of=as_of)
+        total = merge_daily_counts(total, daily_counts(featured, branch=branch))
+        if output_path is None:
+            frames.append(featured)
+        else:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            featured.to_csv(output_path, mode='a' if rows else 'w', index=False,
+                            header=not rows, date_format='%Y-%m-%d')
+        rows += len(chunk)
+        done += 1
+        if output_path is not None and on_chunk is not None:
+            on_chunk(done, {'rows': rows, 'total': total}, [output_path])
+    logger.info(f'Computed loan features for {rows} loans')
+
+    if total is None:
+        total = daily_counts(pd.DataFrame(columns=[branch, 'checkout_date', 'return_date']),
+                             branch=branch)
+    loans = None
+    if output_path is None:
+        loans = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return {
+        'loans': loans,
+        'open_loans': open_loans_per_day(total['loans']),
+        'branch_volumes': rolling_branch_volumes(total['branches'], window=window),
+    }
@@ -0,0 +1,331 @@
+"""
+Gold layer aggregation functions.
+
+Each gold table only holds additive measures (counts and sums), so a new
+silver partition can be aggregated on its own and added onto the existing
+table instead of rebuilding it from the full silver history.
+"""
+
+import logging
+import os
+import pandas as pd
+from src.data_processing.checkpoint import commit_files, recover_files
+
+logger = logging.getLogger(__name__)
+
+# Loans returned after this many days count as overdue
+LOAN_PERIOD_DAYS = 21
+
+AGE_BREAKDOWN_PREFIX = 'attendance.age_breakdown.'
+
+# Group keys of every gold table
+GOLD_KEYS = {
+    'circulation_daily': ['branch_id', 'checkout_date', 'isbn'],
+    'loan_durations': ['branch_id', 'checkout_date'],
+    'event_attendance': ['branch', 'age_band'],
+    'rating_distribution': ['branch', 'rating'],
+}
+
+# Column(s) identifying a row of each silver dataset, used to find rows
+# that have already been rolled up into gold. Events arrive in long form
+# with one row per event and age band.
+DATASET_KEYS = {
+    'circulation': 'transaction_id',
+    'events': ['event_id', 'age_band'],
+    'feedback': 'feedback_id',
+}
+
+
+def _date_key(series):
+    """Format a date column as 'YYYY-MM-DD' strings for use as a group key."""
+    return pd.to_datetime(series, errors='coerce').dt.strftime('%Y-%m-%d')
+
+
+def circulation_rows(df):
+    """One loans=1 row per loan, keyed by branch, checkout day and ISBN."""
+    return pd.DataFrame({
+        'branch_id': df['branch_id'],
+        'checkout_date': _date_key(df['checkout_date']),
+        'isbn': df['isbn'],
+        'loans': 1,
+    }, index=df.index)
+
+
+def loan_duration_rows(df, loan_period_days=LOAN_PERIOD_DAYS, as_of=None):
+    """Duration and overdue measures of each loan, keyed by branch and checkout day.
+
+    A loan is overdue once it lasted, or for an open loan has lasted by
+    as_of, more than loan_period_days. Without as_of, open loans are
+    never overdue (as in features.loan_features()).
+    """
+    checkout = pd.to_datetime(df['checkout_date'], errors='coerce')
+    returned = pd.to_datetime(df['return_date'], errors='coerce')
+    loan_days = (returned - checkout).dt.days
+    end = returned if as_of is None else returned.fillna(pd.Timestamp(as_of))
+
+    return pd.DataFrame({
+        'branch_id': df['branch_id'],
+        'checkout_date': checkout.dt.strftime('%Y-%m-%d'),
+        'loans': 1,
+        'returned_loans': loan_days.notna().astype(int),
+        'total_loan_days': loan_days.fillna(0).astype(int),
+        'overdue_loans': ((end - checkout).dt.days > loan_period_days).astype(int),
+    }, index=df.index)
+
+
+def event_attendance_rows(df):
+    """One row per event and age band with its attendees.
+
+    Accepts long-form age-band attendance with 'branch', 'age_band' and
+    'attendees' columns (see event_tables.age_band_attendance()), or
+    flattened events with 'attendance.age_breakdown.<band>' columns. Rows
+    keep the index of the input row they come from.
+    """
+    if 'age_band' in df.columns:
+        long = df[['branch', 'age_band', 'attendees']].copy()
+    else:
+        band_cols = [col for col in df.columns if col.startswith(AGE_BREAKDOWN_PREFIX)]
+        long = df.melt(id_vars=['branch'], value_vars=band_cols, var_name='age_band',
+                       value_name='attendees', ignore_index=False)
+        long['age_band'] = long['age_band'].str[len(AGE_BREAKDOWN_PREFIX):]
+    long.insert(2, 'events', 1)
+    long['attendees'] = long['attendees'].fillna(0).astype(int)
+    return long
+
+
+def feedback_rating_rows(df):
+    """One count=1 row per feedback entry, keyed by branch and rating."""
+    return df[['branch', 'rating']].assign(count=1)
+
+
+def _group_sum(rows, name):
+    keys = GOLD_KEYS[name]
+    return rows.groupby(keys, as_index=False).sum()
+
+
+def aggregate_circulation(df):
+    """Count loans per branch, checkout day and ISBN.
+
+    Args:
+        df (pd.DataFrame): Cleaned circulation data
+
+    Returns:
+        pd.DataFrame: One row per branch_id/checkout_date/isbn with a loans count
+    """
+    return _group_sum(circulation_rows(df), 'circulation_daily')
+
+
+def aggregate_loan_durations(df, loan_period_days=LOAN_PERIOD_DAYS, as_of=None):
+    """Sum loan durations and overdue loans per branch and checkout day.
+
+    Args:
+        df (pd.DataFrame): Cleaned circulation data
+        loan_period_days (int): Days after which a loan is overdue
+        as_of (str or datetime, optional): Date open loans are measured
+            against; if None, only returned loans can be overdue
+
+    Returns:
+        pd.DataFrame: loans, returned_loans, total_loan_days and overdue_loans
+            per branch_id/checkout_date
+
+    Example:
+        >>> durations = aggregate_loan_durations(df, as_of='2024-12-31')
+        >>> durations['total_loan_days'] / durations['returned_loans']
+    """
+    return _group_sum(loan_duration_rows(df, loan_period_days, as_of), 'loan_durations')
+
+
+def aggregate_event_attendance(df):
+    """Sum event attendance per branch and age band.
+
+    Args:
+        df (pd.DataFrame): Long-form age-band attendance with 'branch',
+            'age_band' and 'attendees' columns (see
+            event_tables.age_band_attendance()), or flattened events with
+            'attendance.age_breakdown.<band>' columns
+
+    Returns:
+        pd.DataFrame: events and attendees per branch/age_band
+    """
+    return _group_sum(event_attendance_rows(df), 'event_attendance')
+
+
+def aggregate_feedback_ratings(df):
+    """Count feedback entries per branch and rating.
+
+    Args:
+        df (pd.DataFrame): Parsed feedback with 'branch' and 'rating' columns
+
+    Returns:
+        pd.DataFrame: One row per branch/rating with a count
+    """
+    return _group_sum(feedback_rating_rows(df), 'rating_distribution')
+
+
+# Per-row contributions to the gold tables fed by each silver dataset
+GOLD_TABLES = {
+    'circulation': {
+        'circulation_daily': circulation_rows,
+        'loan_durations': loan_duration_rows,
+    },
+    'events': {
+        'event_attendance': event_attendance_rows,
+    },
+    'feedback': {
+        'rating_distribution': feedback_rating_rows,
+    },
+}
+
+
+def merge_rollup(existing, delta, keys):
+    """Add the measures of a new partition onto an existing gold table.
+
+    Args:
+        existing (pd.DataFrame or None): Current gold table
+        delta (pd.DataFrame): Aggregates of the new partition
+        keys (list): Group key columns; all other columns are summed
+
+    Returns:
+        pd.DataFrame: Updated gold table sorted by keys
+    """
+    if existing is None or existing.empty:
+        combined = delta
+    else:
+        combined = pd.concat([existing, delta], ignore_index=True)
+    return combined.groupby(keys, as_index=False).sum().sort_values(keys, ignore_index=True)
+
+
+def load_gold_table(name, gold_dir='data/gold'):
+    """Load a gold table, or None if it has not been built yet.
+
+    Args:
+        name (str): Gold table name, e.g. 'circulation_daily'
+        gold_dir (str): Directory holding the gold tables
+
+    Returns:
+        pd.DataFrame or None: The gold table
+    """
+    filepath = os.path.join(gold_dir, f'{name}.csv')
+    if not os.path.exists(filepath):
+        return None
+    keys = [key for key in GOLD_KEYS[name] if key != 'rating']
+    return pd.read_csv(filepath, dtype={key: str for key in keys})
+
+
+def _state_filename(name):
+    return f'_applied_{name}.csv'
+
+
+def _load_state(name, gold_dir):
+    """Contribution of every applied row to a gold table: key, hash, group keys, measures."""
+    filepath = os.path.join(gold_dir, _state_filename(name))
+    if not os.path.exists(filepath):
+        return None
+    dtypes = {'key': str, 'hash': str,
+              **{key: str for key in GOLD_KEYS[name] if key != 'rating'}}
+    return pd.read_csv(filepath, dtype=dtypes, keep_default_na=False, na_values=[''])
+
+
+def _contributions(rows, keys, name):
+    """Per-row contributions with their row key and a hash of the contribution."""
+    rows = rows.dropna(subset=GOLD_KEYS[name])
+    rows.insert(0, 'key', keys.loc[rows.index].to_numpy())
+    # A row feeding several groups (wide-form events) is one contribution
+    rows = rows.reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(rows.astype(str), index=False)
+    per_key = pd.Series(hashes.to_numpy(), index=rows['key']).groupby(level=0).sum()
+    rows.insert(1, 'hash', rows['key'].map(per_key).astype(str))
+    return rows
+
+
+def _without_empty_groups(table, name):
+    measures = [col for col in table.columns if col not in GOLD_KEYS[name]]
+    return table[(table[measures] != 0).any(axis=1)].reset_index(drop=True)
+
+
+def update_gold(df, dataset, gold_dir='data/gold', as_of=None):
+    """Roll a silver partition up into the gold tables of its dataset.
+
+    The contribution of every applied row (its group keys and measures)
+    is kept next to the gold tables, keyed by the row key (see
+    DATASET_KEYS) with a hash of the contribution. A row seen before with
+    the same hash is skipped, so re-running the pipeline on the same
+    silver data leaves gold unchanged and an appended partition only adds
+    its own rows. A row whose contribution changed (e.g. a return_date
+    filled in by a later snapshot, or an open loan that became overdue)
+    has its old contribution subtracted and the new one added.
+
+    The gold tables and the applied state are committed together, so a
+    crash never leaves gold updated without its state, or the other way
+    round.
+
+    Args:
+        df (pd.DataFrame): New silver partition
+        dataset (str): 'circulation', 'events' or 'feedback'
+        gold_dir (str): Directory holding the gold tables
+        as_of (str or datetime, optional): Date open loans are measured
+            against for overdue_loans; if None, open loans are not overdue
+
+    Returns:
+        dict: Updated gold tables by name
+
+    Example:
+        >>> tables = update_gold(df_circulation, 'circulation', as_of='2024-12-31')
+        >>> tables['circulation_daily'].head()
+    """
+    if dataset not in GOLD_TABLES:
+        raise ValueError(f'Unknown dataset: {dataset}')
+    os.makedirs(gold_dir, exist_ok=True)
+    recover_files(gold_dir)
+
+    row_key = DATASET_KEYS[dataset]
+    row_key = [row_key] if isinstance(row_key, str) else list(row_key)
+    keyed = all(col in df.columns for col in row_key)
+    if keyed:
+        df = df[~df.duplicated(subset=row_key).to_numpy()].reset_index(drop=True)
+        keys = df[row_key].astype(str).agg('|'.join, axis=1)
+    else:
+        logger.warning(f'Columns {row_key} not found, rolling up all {dataset} rows')
+
+    tables = {}
+    frames = {}
+    for name, row_measures in GOLD_TABLES[dataset].items():
+        existing = load_gold_table(name, gold_dir)
+        kwargs = {'as_of': as_of} if name == 'loan_durations' else {}
+        rows = row_measures(df, **kwargs)
+        if not keyed:
+            tables[name] = existing if df.empty else merge_rollup(
+                existing, _group_sum(rows, name), GOLD_KEYS[name])
+            frames[f'{name}.csv'] = tables[name]
+            continue
+
+        current = _contributions(rows, keys, name)
+        state = _load_state(name, gold_dir)
+        if state is None:
+            state = current.iloc[:0]
+        previous = state.drop_duplicates('key').set_index('key')['hash']
+        changed_keys = current.loc[current['key'].map(previous) != current['hash'], 'key']
+        changed_keys = pd.Index(changed_keys.unique())
+        added = current[current['key'].isin(changed_keys)]
+        removed = state[state['key'].isin(changed_keys)]
+        logger.info(f'{name}: {added["key"].nunique()} new or changed rows, '
+                    f'{removed["key"].nunique()} of them replacing applied rows')
+        if added.empty and removed.empty:
+            tables[name] = existing
+            continue
+
+        measures = [col for col in rows.columns if col not in GOLD_KEYS[name]]
+        delta = pd.concat([added, removed.assign(**{col: -removed[col] for col in measures})],
+                          ignore_index=True).drop(columns=['key', 'hash'])
+        table = merge_rollup(existing, _group_sum(delta, name), GOLD_KEYS[name])
+        tables[name] = _without_empty_groups(table, name)
+        frames[f'{name}.csv'] = tables[name]
+        frames[_state_filename(name)] = pd.concat(
+            [state[~state['key'].isin(changed_keys)], added], ignore_index=True)
+
+    frames = {filename: frame for filename, frame in frames.items() if frame is not None}
+    if frames:
+        commit_files(gold_dir, frames)
+        logger.info(f"Updated gold tables {', '.join(f for f in frames if not f.startswith('_'))}")
+
+    return tables
@@ -1,31 +1,325 @@
 """Data ingestion functions.
 
-TODO: Complete these functions for the library project.
+Loaders for the bronze sources (CSV, JSON, Excel and text) and the silver
+tables. CSV files may be gzip, bz2, xz or zstd compressed, which is detected
+from their leading bytes, and can be read whole or in chunks with the pandas
+or pyarrow engine. The tabular loaders accept columns= and filters= so only the
+needed columns and rows are kept; see apply_filters() for the filter forms.
 """
 
 import pandas as pd
+import bz2
+import gzip
+import io
 import json
 import logging
+import lzma
 import os
 import traceback
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_csv(filepath, verify_fp=True):
+# Compression suffixes and the codec they imply
+COMPRESSION_SUFFIXES = {'gz': 'gzip', 'bz2': 'bz2', 'zst': 'zstd', 'xz': 'xz'}
+
+# Leading bytes of each compressed format
+_MAGIC_BYTES = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'\xfd7zXZ\x00', 'xz'),
+]
+
+def detect_compression(filepath):
+    """Detect the compression codec of a file.
+
+    The magic bytes at the start of the file win; the filename suffix is
+    only used if the file cannot be read.
+
+    Args:
+        filepath: Path to the file
+
+    Returns:
+        str or None: 'gzip', 'bz2', 'zstd', 'xz' or None if uncompressed
+    """
+    try:
+        with open(filepath, 'rb') as file:
+            head = file.read(6)
+    except OSError:
+        return COMPRESSION_SUFFIXES.get(str(filepath).split('.')[-1])
+    for magic, codec in _MAGIC_BYTES:
+        if head.startswith(magic):
+            return codec
+    return None
+
+def _base_extension(filepath):
+    """File extension ignoring a compression suffix ('x.csv.gz' -> 'csv')."""
+    parts = os.path.basename(str(filepath)).split('.')
+    if len(parts) > 2 and parts[-1] in COMPRESSION_SUFFIXES:
+        return parts[-2]
+    return parts[-1]
+
+def _open_zstd(filepath):
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open(filepath, 'rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+    except ImportError:
+        pass
+    try:
+        import pyarrow as pa
+        return pa.input_stream(filepath, compression='zstd')
+    except ImportError:
+        raise ImportError('Reading .zst files requires zstandard or pyarrow')
+
+def open_stream(filepath, compression=None):
+    """Open a file for binary reading, decompressing while it is read.
+
+    Args:
+        filepath: Path to the file
+        compression (str, optional): Codec, detected if not given
+
+    Returns:
+        Binary file object yielding the decompressed bytes
+
+    Example:
+        >>> with open_stream('data/feedback.txt.bz2') as file:
+        ...     first_line = file.readline()
+    """
+    codec = compression or detect_compression(filepath)
+    if codec is None:
+        return open(filepath, 'rb')
+    if codec == 'gzip':
+        return gzip.open(filepath, 'rb')
+    if codec == 'bz2':
+        return bz2.open(filepath, 'rb')
+    if codec == 'xz':
+        return lzma.open(filepath, 'rb')
+    if codec == 'zstd':
+        return _open_zstd(filepath)
+    raise ValueError(f'Unknown compression: {codec}')
+
+def _arrow_source(filepath):
+    """Input for pyarrow's CSV reader.
+
+    gzip, bz2 and zstd are decompressed by Arrow itself, outside the GIL and
+    alongside the parser threads; other codecs fall back to open_stream().
+    """
+    import pyarrow as pa
+
+    codec = detect_compression(filepath)
+    if codec is None:
+        return filepath
+    if pa.Codec.is_available(codec):
+        return pa.input_stream(filepath, compression=codec)
+    return open_stream(filepath, codec)
+
+# Explicit column types for the Arrow reader; no type inference needed
+CIRCULATION_DTYPES = {
+    'transaction_id': 'string',
+    'member_id': 'string',
+    'isbn': 'string',
+    'checkout_date': 'string',
+    'return_date': 'string',
+    'branch_id': 'string',
+}
+
+# Bytes parsed per block by the Arrow reader, each block on its own thread
+ARROW_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Rows parsed at a time when filters are applied during reading
+FILTER_CHUNKSIZE = 100_000
+
+# Id columns of the silver tables, always read as strings
+SILVER_KEY_COLUMNS = ['transaction_id', 'member_id', 'isbn', 'ISBN', 'branch_id', 'event_id']
+
+def apply_filters(df, filters):
+    """Keep the rows of df matching every filter.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame
+        filters (dict): Column -> condition. A tuple (low, high) keeps values
+            in the inclusive range (either bound may be None), a list or set
+            keeps the listed values, anything else must match exactly.
+            Values are compared as stored, so ISO date strings compare
+            correctly.
+
+    Returns:
+        pd.DataFrame: Matching rows
+
+    Example:
+        >>> apply_filters(df, {'branch_id': ['BR001', 'BR002'],
+        ...                    'checkout_date': ('2024-01-01', '2024-12-31')})
+    """
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for col, condition in filters.items():
+        values = df[col]
+        if isinstance(condition, tuple):
+            low, high = condition
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        elif isinstance(condition, (list, set, frozenset)):
+            mask &= values.isin(list(condition))
+        else:
+            mask &= values == condition
+    return df[mask.fillna(False).astype(bool)]
+
+def _read_columns(columns, filters):
+    """Columns to parse: the requested ones plus those used by filters."""
+    if columns is None:
+        return None
+    extra = [col for col in (filters or {}) if col not in columns]
+    return list(columns) + extra
+
+def _project(df, columns, filters):
+    """Apply filters, then keep only the requested columns in order."""
+    df = apply_filters(df, filters)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+def _arrow_type(kind):
+    """Arrow type for a dtype the pandas engine accepts, e.g. str, int, 'Int16' or 'category'."""
+    import pyarrow as pa
+
+    if isinstance(kind, pa.DataType):
+        return kind
+    if kind in (str, object) or (isinstance(kind, str) and kind in ('str', 'object', 'string')):
+        return pa.string()
+    dtype = pd.api.types.pandas_dtype(kind)
+    if isinstance(dtype, pd.ArrowDtype):
+        return dtype.pyarrow_dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(dtype, pd.StringDtype) or dtype == object:
+        return pa.string()
+    # Nullable extension types such as Int16 or boolean carry a numpy type
+    dtype = getattr(dtype, 'numpy_dtype', dtype)
+    try:
+        return pa.from_numpy_dtype(dtype)
+    except (TypeError, NotImplementedError, pa.ArrowNotImplementedError):
+        raise ValueError(f"engine='pyarrow' cannot read columns as {kind!r}")
+
+def _arrow_csv_options(dtype, block_size, columns=None):
+    """Read and convert options for pyarrow's CSV reader."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pv
+    except ImportError:
+        raise ImportError("engine='pyarrow' requires pyarrow: pip install pyarrow")
+
+    column_types = {col: _arrow_type(kind) for col, kind in (dtype or {}).items()}
+    read_options = pv.ReadOptions(use_threads=True, block_size=block_size or ARROW_BLOCK_SIZE)
+    convert_options = pv.ConvertOptions(column_types=column_types, strings_can_be_null=True,
+                                        include_columns=columns or [])
+    return read_options, convert_options
+
+def _read_csv_arrow(filepath, dtype=None, block_size=None, columns=None):
+    """Read a whole CSV with pyarrow's multi-threaded parser."""
+    import pyarrow.csv as pv
+
+    read_options, convert_options = _arrow_csv_options(dtype, block_size, columns)
+    table = pv.read_csv(_arrow_source(filepath), read_options=read_options,
+                        convert_options=convert_options)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def _iter_csv_arrow(filepath, chunksize, dtype=None, block_size=None, columns=None):
+    """Stream a CSV block by block with pyarrow, yielding chunksize rows at a time."""
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    read_options, convert_options = _arrow_csv_options(dtype, block_size, columns)
+    reader = pv.open_csv(_arrow_source(filepath), read_options=read_options,
+                         convert_options=convert_options)
+    pending = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize).to_pandas(types_mapper=pd.ArrowDtype)
+            rest = table.slice(chunksize)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas(types_mapper=pd.ArrowDtype)
+
+def _iter_csv(filepath, chunksize, engine, dtype, block_size, columns=None, filters=None):
+    """Yield filtered chunks of a CSV file, raising ValueError if it has no rows."""
+    read_cols = _read_columns(columns, filters)
+    stream = None
+    if engine == 'pyarrow':
+        chunks = _iter_csv_arrow(filepath, chunksize, dtype=dtype, block_size=block_size,
+                                 columns=read_cols)
+    else:
+        stream = open_stream(filepath)
+        chunks = pd.read_csv(stream, dtype=dtype, chunksize=chunksize, usecols=read_cols)
+
+    rows = 0
+    kept = 0
+    try:
+        for chunk in chunks:
+            rows += len(chunk)
+            chunk = _project(chunk, columns, filters)
+            kept += len(chunk)
+            yield chunk
+    finally:
+        if stream is not None:
+            stream.close()
+    if rows == 0:
+        logger.error(f'{filepath} is empty')
+        raise ValueError(f'{filepath} is empty')
+    logger.info(f'Successfully loaded {kept} of {rows} rows from {filepath}')
+
+def load_csv(filepath, verify_fp=True, engine='pandas', dtype=None, chunksize=None,
+             block_size=None, columns=None, filters=None):
     """Load CSV file with error handling.
-    
+
+    The default engine is pandas' C parser. engine='pyarrow' parses blocks
+    of the file on all cores with pyarrow, uses the column types from dtype
+    instead of inferring them, and returns Arrow-backed columns.
+
+    gzip, bz2, zstd and xz files ('circulation.csv.gz') are detected by
+    their magic bytes and decompressed while streaming.
+
     Args:
         filepath: Path to CSV file
-        
+        verify_fp (bool): Check the extension and that the file exists
+        engine (str): 'pandas' or 'pyarrow'
+        dtype (dict, optional): Column types, e.g. CIRCULATION_DTYPES
+        chunksize (int, optional): Return an iterator of DataFrames with
+            this many rows instead of one DataFrame
+        block_size (int, optional): Bytes per block for engine='pyarrow'
+        columns (list, optional): Only parse these columns
+        filters (dict, optional): Row filters applied to each chunk while
+            reading, see apply_filters()
+
     Returns:
-        DataFrame with loaded data
-        
-    TODO: Add error handling and logging
+        DataFrame with loaded data, or an iterator of DataFrames if
+        chunksize is given
+
+    Example:
+        >>> df = load_csv('data/circulation_data.csv', engine='pyarrow',
+        ...               dtype=CIRCULATION_DTYPES)
+        >>> for chunk in load_csv('data/circulation_data.csv', chunksize=100_000):
+        ...     process(chunk)
+        >>> loans = load_csv('data/circulation_data.csv', columns=['isbn', 'branch_id'],
+        ...                  filters={'branch_id': ['BR001', 'BR002']})
     """
-    # TODO: Implement this function
+    if engine not in ('pandas', 'pyarrow'):
+        raise ValueError(f'Unknown engine: {engine}')
+
     if verify_fp:
-        extension = filepath.split('.')[-1]
+        extension = _base_extension(filepath)
         if extension != 'csv':
             logger.error(f'Filepath {filepath} is not a .csv file!')
             print(f'Filepath {filepath} is not a .csv file!')
@@ -35,8 +329,25 @@ def load_csv(filepath, verify_fp=True):
             logger.error(f'Filepath {filepath} not found!')
             raise FileNotFoundError(f'Filepath {filepath} not found')
 
+    if chunksize is not None:
+        if not os.path.exists(filepath):
+            logger.error(f'Filepath {filepath} not found!')
+            raise FileNotFoundError(f'Filepath {filepath} not found')
+        return _iter_csv(filepath, chunksize, engine, dtype, block_size, columns, filters)
+
     try:
-        data = pd.read_csv(filepath)
+        if filters:
+            # Filter chunk by chunk so rows that are dropped are never all held at once
+            chunks = _iter_csv(filepath, FILTER_CHUNKSIZE, engine, dtype, block_size,
+                               columns, filters)
+            return pd.concat(list(chunks), ignore_index=True)
+        if engine == 'pyarrow':
+            if os.path.getsize(filepath) == 0:
+                raise ValueError(f'{filepath} is empty')
+            data = _read_csv_arrow(filepath, dtype=dtype, block_size=block_size, columns=columns)
+        else:
+            with open_stream(filepath) as stream:
+                data = pd.read_csv(stream, dtype=dtype, usecols=columns)
         logger.info(f'Successfully loaded {filepath}')
         if data.empty:
             logger.error(f'{filepath} is empty')
@@ -50,29 +361,72 @@ def load_csv(filepath, verify_fp=True):
         raise
     
 
-def load_json(filepath):
+def _get_path(record, path):
+    """Value at a dotted path such as 'attendance.actual' in a nested dict."""
+    value = record
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def load_json_records(filepath):
+    """Load the list of records from a JSON file without flattening them.
+
+    Accepts a list of records, a single record, or an object holding the
+    records under 'events'. Compressed files are decompressed while reading.
+
+    Args:
+        filepath: Path to JSON file
+
+    Returns:
+        list: Record dicts
+    """
+    if not os.path.exists(filepath):
+        logger.error(f'Filepath {filepath} not found')
+        raise FileNotFoundError(f'Filepath {filepath} not found')
+    with open_stream(filepath) as file:
+        data = json.load(file)
+
+    if isinstance(data, dict) and 'events' in data:
+        return data['events']
+    if isinstance(data, dict):
+        return [data]
+    return data
+
+
+def load_json(filepath, columns=None, filters=None):
     """Load JSON file and flatten structure.
-    
+
+    Filters are evaluated on the raw records, so records that do not match
+    are never flattened. Compressed files ('events.json.zst') are
+    decompressed while reading.
+
     Args:
         filepath: Path to JSON file
-        
+        columns (list, optional): Flattened columns to keep, e.g.
+            ['event_id', 'branch', 'attendance.actual']
+        filters (dict, optional): Row filters on flattened column names,
+            see apply_filters()
+
     Returns:
         DataFrame with flattened data
-        
-    TODO: Implement JSON loading and flattening
     """
-    # TODO: Implement this function
     if not os.path.exists(filepath):
         logger.error(f'Filepath {filepath} not found')
         raise FileNotFoundError(f'Filepath {filepath} not found')
     try:
-        with open(filepath, 'r') as file:
-            data = json.load(file)
-        
-            if isinstance(data, dict) and 'events' in data:
-                df = pd.json_normalize(data['events'])
-            else:
-                df = pd.json_normalize(data)
+        records = load_json_records(filepath)
+
+        if filters:
+            keys = pd.DataFrame({col: [_get_path(record, col) for record in records]
+                                 for col in filters})
+            keep = apply_filters(keys, filters).index
+            records = [records[i] for i in keep]
+
+        df = pd.json_normalize(records)
+        if columns is not None:
+            df = df.reindex(columns=list(columns))
 
         logger.info(f'Successfully loaded {filepath}')
         return df
@@ -82,11 +436,14 @@ def load_json(filepath):
         logger.error(f'Could not load {filepath}:\n{error}')
         raise
     
-def load_excel(filepath):
+def load_excel(filepath, columns=None, filters=None):
     """Load Excel file with error handling.
     
     Args:
         filepath: Path to xlsx file
+        columns (list, optional): Only parse these columns
+        filters (dict, optional): Row filters, see apply_filters(). Excel
+            cannot be read in chunks, so these apply after parsing.
         
     Returns:
         DataFrame with loaded data
@@ -94,7 +451,7 @@ def load_excel(filepath):
     TODO: Add error handling and logging
     """
     # Check if the extension is correct
-    extension = filepath.split('.')[-1]
+    extension = _base_extension(filepath)
     if extension != 'xlsx':
         logger.error(f'{filepath} is not an Excel file')
         return None
@@ -107,11 +464,18 @@ def load_excel(filepath):
 
     # Load data
     try:
-        data = pd.read_excel(filepath, sheet_name='Catalogue')
+        source = filepath
+        if detect_compression(filepath):
+            # Excel needs random access, so decompress into memory
+            with open_stream(filepath) as stream:
+                source = io.BytesIO(stream.read())
+        data = pd.read_excel(source, sheet_name='Catalogue',
+                             usecols=_read_columns(columns, filters))
         # Check if file is empty
         if data.empty:
             logger.error(f'{filepath} is empty')
             return None
+        data = _project(data, columns, filters)
         logger.info(f'Successfully loaded {filepath}')
         return data
     # Handle exceptions
@@ -121,18 +485,18 @@ def load_excel(filepath):
         return None
   
 def load_text(filepath):
-    """Load Excel file with error handling.
+    """Load text file with error handling.
+
+    Compressed files ('feedback.txt.bz2') are decompressed while reading.
     
     Args:
-        filepath: Path to xlsx file
+        filepath: Path to txt file
         
     Returns:
-        DataFrame with loaded data
-        
-    TODO: Add error handling and logging
+        List of stripped lines
     """
     # Check if the extension is correct
-    extension = filepath.split('.')[-1]
+    extension = _base_extension(filepath)
     if extension != 'txt':
         logger.error(f'{filepath} is not a .txt file')
         return None
@@ -144,7 +508,7 @@ def load_text(filepath):
         raise FileNotFoundError(f'Filepath {filepath} not found')
 
     try:
-        with open(filepath, 'rb') as file:
+        with open_stream(filepath) as file:
             data = file.readlines()
         data_cleaned = []
         for line in data:
@@ -162,3 +526,34 @@ def load_text(filepath):
         return None
 
 
+def load_silver(name, columns=None, filters=None, silver_dir='data/silver', dtype=None):
+    """Load a silver table, reading only what columns and filters need.
+
+    If the table has a lookup index (see lookup.build_index), filters on
+    indexed columns skip every row group that cannot match. Otherwise the
+    CSV is filtered chunk by chunk while it is read. Id columns are read
+    as strings.
+
+    Args:
+        name (str): Silver table, e.g. 'circulation_clean'
+        columns (list, optional): Columns to keep
+        filters (dict, optional): Row filters, see apply_filters()
+        silver_dir (str): Silver layer directory
+        dtype (dict, optional): Extra column types
+
+    Returns:
+        pd.DataFrame: Matching rows
+
+    Example:
+        >>> load_silver('circulation_clean', columns=['isbn', 'checkout_date'],
+        ...             filters={'checkout_date': ('2024-01-01', '2024-01-31')})
+    """
+    from src.data_processing.lookup import has_index, scan
+
+    filename = name if name.endswith('.csv') else f'{name}.csv'
+    filepath = os.path.join(silver_dir, filename)
+    dtype = {**{col: str for col in SILVER_KEY_COLUMNS}, **(dtype or {})}
+
+    if filters and has_index(filepath):
+        return scan(filepath, columns=columns, filters=filters, dtype=dtype)
+    return load_csv(filepath, dtype=dtype, columns=columns, filters=filters)
@@ -0,0 +1,89 @@
+"""
+Referential integrity checks between datasets.
+
+The parent table (e.g. the catalogue) is reduced to a hashed set of its
+normalised keys. The child table (e.g. circulation) is then streamed chunk
+by chunk and its keys are checked against that set with a vectorized
+lookup. Memory use is bounded by the parent key set, one chunk and the
+counts of distinct orphan keys.
+"""
+
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Orphan keys kept per check in the report
+MAX_ORPHAN_KEYS = 1000
+
+
+def normalise_isbn(values):
+    """Normalise ISBNs the way standardise_isbn does (string, no hyphens)."""
+    return pd.Series(values).astype(str).str.replace('-', '', regex=False).str.strip()
+
+
+def build_key_set(values, normalise=None):
+    """Build a hashed set of unique, non-null keys.
+
+    Args:
+        values (pd.Series or list): Parent keys
+        normalise (callable, optional): Applied to the keys first
+
+    Returns:
+        pd.Index: Unique keys, usable for vectorized membership tests
+
+    Example:
+        >>> catalogue_keys = build_key_set(catalogue['ISBN'], normalise_isbn)
+    """
+    values = pd.Series(values).dropna()
+    if normalise is not None:
+        values = normalise(values)
+    return pd.Index(pd.unique(values.to_numpy()))
+
+
+def check_references(data, column, parent_keys, normalise=None, max_orphans=MAX_ORPHAN_KEYS):
+    """Check that every key of a child table exists in a parent key set.
+
+    Args:
+        data (pd.DataFrame or iterable): Child DataFrame, or chunks of one
+        column (str): Key column of the child table
+        parent_keys (pd.Index): Keys from build_key_set()
+        normalise (callable, optional): Applied to the child keys first
+        max_orphans (int): Most frequent orphan keys kept in the result
+
+    Returns:
+        dict: rows, missing_keys (null child keys), orphan_rows,
+            orphan_keys (number of distinct orphan keys) and orphans
+            (DataFrame of key, rows for the most frequent orphan keys)
+
+    Example:
+        >>> chunks = load_csv('data/silver/circulation_clean.csv', chunksize=100_000)
+        >>> result = check_references(chunks, 'isbn', catalogue_keys, normalise_isbn)
+        >>> result['orphan_rows']
+    """
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+
+    rows = 0
+    missing = 0
+    orphan_counts = pd.Series(dtype='int64')
+    for chunk in chunks:
+        rows += len(chunk)
+        keys = chunk[column].dropna()
+        missing += len(chunk) - len(keys)
+        if normalise is not None:
+            keys = normalise(keys)
+        orphaned = keys[parent_keys.get_indexer(keys.to_numpy()) < 0]
+        if len(orphaned):
+            orphan_counts = orphan_counts.add(orphaned.value_counts(), fill_value=0)
+
+    orphan_counts = orphan_counts.astype('int64').sort_values(ascending=False, kind='mergesort')
+    orphans = orphan_counts.head(max_orphans).rename_axis('key').reset_index(name='rows')
+    result = {
+        'rows': rows,
+        'missing_keys': missing,
+        'orphan_rows': int(orphan_counts.sum()),
+        'orphan_keys': len(orphan_counts),
+        'orphans': orphans,
+    }
+    logger.info(f"{column}: {result['orphan_rows']} of {rows} rows reference unknown keys")
+    return result
@@ -0,0 +1,377 @@
+"""
+Indexed lookups over silver CSV tables.
+
+The silver file is split into row groups of consecutive lines. For each row
+group the byte offset is stored, and for each indexed column a sorted list of
+(key, row_group) pairs. A point or range query binary-searches the sorted keys
+and then only reads and parses the matching row groups from the CSV file.
+
+Run this from the command line as follows:
+> python -m src.data_processing.lookup --isbn 9780433218197
+> python -m src.data_processing.lookup --member M12345
+> python -m src.data_processing.lookup --from 2024-01-01 --to 2024-01-31
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+import pandas as pd
+from src.data_processing.checkpoint import atomic_write, write_csv_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE = 'data/silver/circulation_clean.csv'
+INDEX_COLUMNS = ['isbn', 'member_id', 'branch_id', 'checkout_date']
+ROW_GROUP_SIZE = 10000
+
+# Block size used to hash the indexed part of a table
+_FINGERPRINT_BLOCK = 1024 * 1024
+# A file modified this recently may change again within the same mtime
+# tick, so its mtime is not trusted to skip the hash check next time
+_RACY_SECONDS = 2
+
+
+def _index_dir(filepath):
+    """Directory holding the index files of a silver table."""
+    folder, name = os.path.split(filepath)
+    return os.path.join(folder, '_index', os.path.splitext(name)[0])
+
+
+def _hash_range(digest, file, length):
+    """Feed the next length bytes of an open file into digest."""
+    while length > 0:
+        block = file.read(min(length, _FINGERPRINT_BLOCK))
+        if not block:
+            break
+        digest.update(block)
+        length -= len(block)
+    return digest
+
+
+def _fingerprints(filepath, indexed_bytes, size):
+    """Hashes of the first indexed_bytes and of all size bytes, in one pass."""
+    with open(filepath, 'rb') as file:
+        digest = _hash_range(hashlib.sha1(), file, indexed_bytes)
+        prefix = digest.hexdigest()
+        return prefix, _hash_range(digest, file, size - indexed_bytes).hexdigest()
+
+
+def _is_current(meta, filepath):
+    """Whether the table is unchanged since the index was built."""
+    stat = os.stat(filepath)
+    return (meta is not None and meta.get('indexed_bytes') == stat.st_size
+            and meta.get('mtime_ns') == stat.st_mtime_ns)
+
+
+def _is_racy(stat):
+    return time.time_ns() - stat.st_mtime_ns < _RACY_SECONDS * 10 ** 9
+
+
+def _save_meta(index_dir, meta, stat):
+    meta['mtime_ns'] = None if _is_racy(stat) else stat.st_mtime_ns
+    with atomic_write(os.path.join(index_dir, '_meta.json')) as file:
+        json.dump(meta, file)
+    return meta
+
+
+def _load_meta(index_dir):
+    meta_path = os.path.join(index_dir, '_meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r') as file:
+        return json.load(file)
+
+
+def _scan_row_groups(filepath, start, row_group_size):
+    """Yield (offset, raw bytes, rows) for each row group after byte start."""
+    with open(filepath, 'rb') as file:
+        file.seek(start)
+        offset = start
+        lines = []
+        for line in file:
+            lines.append(line)
+            if len(lines) == row_group_size:
+                data = b''.join(lines)
+                yield offset, data, len(lines)
+                offset += len(data)
+                lines = []
+        if lines:
+            data = b''.join(lines)
+            yield offset, data, len(lines)
+
+
+def build_index(filepath=DEFAULT_TABLE, columns=None, row_group_size=ROW_GROUP_SIZE,
+                rebuild=False):
+    """Build or incrementally update the lookup index of a silver CSV table.
+
+    If the table's size and modification time match the last build,
+    nothing is read or written. If it has only grown (same header and the
+    bytes indexed last time unchanged), only the appended lines are
+    indexed. Otherwise the index is rebuilt from scratch. Pass rebuild=True
+    after rewriting a table, which saves hashing the old part of the file.
+
+    Index files are replaced atomically and _meta.json is written last, so
+    a reader or an interrupted build never sees half an index.
+
+    Args:
+        filepath (str): Path to the silver CSV file
+        columns (list, optional): Columns to index, defaults to INDEX_COLUMNS
+        row_group_size (int): Lines per row group
+        rebuild (bool): Force a full rebuild
+
+    Returns:
+        dict: Index metadata
+
+    Example:
+        >>> build_index('data/silver/circulation_clean.csv')
+    """
+    if not os.path.exists(filepath):
+        logger.error(f'Filepath {filepath} not found')
+        raise FileNotFoundError(f'Filepath {filepath} not found')
+
+    index_dir = _index_dir(filepath)
+    meta = None if rebuild else _load_meta(index_dir)
+    if _is_current(meta, filepath) and (columns is None or meta['columns'] == [
+            col for col in columns if col in meta['header']]):
+        return meta
+    os.makedirs(index_dir, exist_ok=True)
+
+    with open(filepath, 'rb') as file:
+        header_line = file.readline()
+    header = pd.read_csv(io.BytesIO(header_line)).columns.tolist()
+    columns = [col for col in (columns or INDEX_COLUMNS) if col in header]
+
+    stat = os.stat(filepath)
+    size = stat.st_size
+    if meta is not None and meta['header'] == header and meta['columns'] == columns \
+            and size >= meta['indexed_bytes']:
+        prefix, fingerprint = _fingerprints(filepath, meta['indexed_bytes'], size)
+        if prefix == meta['fingerprint'] and size == meta['indexed_bytes']:
+            # Unchanged: record the mtime so later calls can skip the hash
+            return meta if _is_racy(stat) else _save_meta(index_dir, meta, stat)
+        if prefix != meta['fingerprint']:
+            logger.info(f'{filepath} was rewritten, rebuilding index')
+            meta = None
+    else:
+        meta = None
+        _, fingerprint = _fingerprints(filepath, 0, size)
+
+    if meta is None:
+        start = len(header_line)
+        first_group = 0
+        mode = 'w'
+    else:
+        start = meta['indexed_bytes']
+        first_group = meta['row_groups']
+        mode = 'a'
+
+    groups = []
+    keys = {col: [] for col in columns}
+    for group, (offset, data, rows) in enumerate(
+            _scan_row_groups(filepath, start, row_group_size), start=first_group):
+        groups.append((group, offset, len(data), rows))
+        chunk = pd.read_csv(io.BytesIO(data), names=header, usecols=columns,
+                            dtype=str, keep_default_na=False)
+        for col in columns:
+            values = pd.unique(chunk[col].to_numpy())
+            keys[col].append(pd.DataFrame({'key': values, 'row_group': group}))
+
+    # Entries past the last committed build belong to an interrupted one
+    groups_path = os.path.join(index_dir, 'row_groups.csv')
+    row_groups = pd.DataFrame(groups, columns=['row_group', 'offset', 'length', 'rows'])
+    if mode == 'a':
+        previous = pd.read_csv(groups_path)
+        row_groups = pd.concat([previous[previous['row_group'] < first_group], row_groups],
+                               ignore_index=True)
+    write_csv_atomic(row_groups, groups_path, index=False)
+
+    for col in columns:
+        col_path = os.path.join(index_dir, f'{col}.csv')
+        parts = keys[col]
+        if mode == 'a':
+            previous = pd.read_csv(col_path, dtype={'key': str}, keep_default_na=False)
+            parts = [previous[previous['row_group'] < first_group]] + parts
+        if parts:
+            index = pd.concat(parts, ignore_index=True)
+        else:
+            index = pd.DataFrame({'key': [], 'row_group': []})
+        write_csv_atomic(index.sort_values(['key', 'row_group'], kind='stable'), col_path,
+                         index=False)
+
+    meta = {
+        'header': header,
+        'columns': columns,
+        'row_group_size': row_group_size,
+        'row_groups': first_group + len(groups),
+        'indexed_bytes': size,
+        'fingerprint': fingerprint,
+    }
+    _save_meta(index_dir, meta, stat)
+
+    logger.info(f'Indexed {len(groups)} new row groups of {filepath}')
+    return meta
+
+
+def has_index(filepath):
+    """Whether a lookup index has been built for a silver table."""
+    return os.path.exists(os.path.join(_index_dir(filepath), '_meta.json'))
+
+
+def _read_row_groups(filepath, header, groups, **read_kwargs):
+    """Read and parse only the given row groups of the CSV file."""
+    read_kwargs = {'dtype': str, 'keep_default_na': False, **read_kwargs}
+    frames = []
+    with open(filepath, 'rb') as file:
+        for offset, length in groups:
+            file.seek(offset)
+            data = file.read(length)
+            frames.append(pd.read_csv(io.BytesIO(data), names=header, **read_kwargs))
+    if not frames:
+        usecols = read_kwargs.get('usecols')
+        return pd.DataFrame(columns=[col for col in header if usecols is None or col in usecols])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _matching_row_groups(index_dir, column, condition):
+    """Row groups that may hold rows matching a filter condition on column.
+
+    condition follows ingestion.apply_filters: a (low, high) tuple, a list
+    or set of values, or a single value.
+    """
+    index = pd.read_csv(os.path.join(index_dir, f'{column}.csv'),
+                        dtype={'key': str}, keep_default_na=False)
+    if isinstance(condition, (list, set, frozenset)):
+        wanted = index['key'].isin([str(value) for value in condition])
+        return set(index.loc[wanted, 'row_group'])
+
+    if isinstance(condition, tuple):
+        start, end = condition
+    else:
+        start = end = condition
+    keys = index['key'].to_numpy()
+    lo = 0 if start is None else keys.searchsorted(str(start), side='left')
+    hi = len(keys) if end is None else keys.searchsorted(str(end), side='right')
+    return set(index['row_group'].to_numpy()[lo:hi])
+
+
+def _row_group_spans(index_dir, groups):
+    row_groups = pd.read_csv(os.path.join(index_dir, 'row_groups.csv'), index_col='row_group')
+    return row_groups.loc[sorted(groups), ['offset', 'length']].itertuples(index=False)
+
+
+def scan(filepath, columns=None, filters=None, dtype=None):
+    """Read the rows of an indexed silver table that match filters.
+
+    Filters on indexed columns prune the row groups to read; all filters
+    are then applied to the rows of those groups.
+
+    Args:
+        filepath (str): Path to the silver CSV file
+        columns (list, optional): Columns to keep
+        filters (dict, optional): Row filters, see ingestion.apply_filters()
+        dtype (dict, optional): Column types passed to the CSV parser
+
+    Returns:
+        pd.DataFrame: Matching rows
+    """
+    from src.data_processing.ingestion import apply_filters
+
+    meta = build_index(filepath)
+    index_dir = _index_dir(filepath)
+    filters = filters or {}
+
+    groups = set(range(meta['row_groups']))
+    for column, condition in filters.items():
+        if column in meta['columns']:
+            groups &= _matching_row_groups(index_dir, column, condition)
+
+    usecols = None
+    if columns is not None:
+        usecols = list(columns) + [col for col in filters if col not in columns]
+    df = _read_row_groups(filepath, meta['header'], _row_group_spans(index_dir, groups),
+                          dtype=dtype, keep_default_na=True, usecols=usecols)
+    logger.info(f'Read {len(groups)} of {meta["row_groups"]} row groups of {filepath}')
+
+    df = apply_filters(df, filters).reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def lookup(column, value=None, start=None, end=None, filepath=DEFAULT_TABLE):
+    """Return the rows of a silver table matching a point or range query.
+
+    Builds or refreshes the index first if the table has changed.
+
+    Args:
+        column (str): Indexed column to query
+        value (str, optional): Exact key to match
+        start (str, optional): Inclusive lower bound of a range query
+        end (str, optional): Inclusive upper bound of a range query
+        filepath (str): Path to the silver CSV file
+
+    Returns:
+        pd.DataFrame: Matching rows, all columns as strings
+
+    Example:
+        >>> loans = lookup('isbn', '9780433218197')
+        >>> january = lookup('checkout_date', start='2024-01-01', end='2024-01-31')
+    """
+    meta = build_index(filepath)
+    if column not in meta['columns']:
+        raise ValueError(f'Column {column} is not indexed')
+    if value is not None:
+        start = end = str(value)
+
+    index_dir = _index_dir(filepath)
+    matched = _matching_row_groups(index_dir, column, (start, end))
+    df = _read_row_groups(filepath, meta['header'], _row_group_spans(index_dir, matched))
+    logger.info(f'Read {len(matched)} of {meta["row_groups"]} row groups for {column}')
+
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df[column] >= str(start)
+    if end is not None:
+        mask &= df[column] <= str(end)
+    return df[mask].reset_index(drop=True)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description='Query silver tables through their index.')
+    parser.add_argument('--table', default=DEFAULT_TABLE, help='Silver CSV file to query')
+    parser.add_argument('--isbn', help='All rows for this ISBN')
+    parser.add_argument('--member', help='All rows for this member_id')
+    parser.add_argument('--branch', help='All rows for this branch_id')
+    parser.add_argument('--from', dest='start', help='First checkout_date (inclusive)')
+    parser.add_argument('--to', dest='end', help='Last checkout_date (inclusive)')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index and exit')
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        meta = build_index(args.table, rebuild=True)
+        print(f"Indexed {meta['row_groups']} row groups of {args.table}")
+        return None
+
+    if args.isbn:
+        df = lookup('isbn', args.isbn, filepath=args.table)
+    elif args.member:
+        df = lookup('member_id', args.member, filepath=args.table)
+    elif args.branch:
+        df = lookup('branch_id', args.branch, filepath=args.table)
+    elif args.start or args.end:
+        df = lookup('checkout_date', start=args.start, end=args.end, filepath=args.table)
+    else:
+        parser.error('one of --isbn, --member, --branch, --from/--to or --rebuild is required')
+
+    print(df.to_string(index=False))
+    print(f"\n{len(df):,} rows")
+    return df
+
+
+if __name__ == "__main__":
+    main()
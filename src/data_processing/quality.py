@@ -0,0 +1,191 @@
+"""
+Data quality rule engine.
+
+Rules are plain dicts, so they can live in config. Each rule is compiled
+once into a function returning a boolean mask of violating rows. All rules
+of a dataset are evaluated together on each DataFrame or chunk, and the
+counts and sample rows are accumulated across chunks.
+
+Rule types:
+    not_null  {'column'}                      value is missing
+    range     {'column', 'min', 'max'}        value outside [min, max]
+    pattern   {'column', 'pattern'}           value does not fully match regex
+    compare   {'left', 'op', 'right', 'dates'} left <op> right does not hold
+    ratio     {'column', 'other', 'max_ratio'} column > other * max_ratio
+
+Except for not_null, a row with a missing value in a rule's columns does
+not violate that rule.
+"""
+
+import logging
+import operator
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_SIZE = 5
+
+_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+DEFAULT_RULES = {
+    'circulation': [
+        {'name': 'return_after_checkout', 'type': 'compare', 'left': 'return_date',
+         'op': '>=', 'right': 'checkout_date', 'dates': True},
+        {'name': 'member_id_format', 'type': 'pattern', 'column': 'member_id',
+         'pattern': r'M\d{5}'},
+        {'name': 'branch_id_format', 'type': 'pattern', 'column': 'branch_id',
+         'pattern': r'BR\d{3}'},
+        {'name': 'isbn_13_digits', 'type': 'pattern', 'column': 'isbn', 'pattern': r'\d{13}'},
+    ],
+    'events': [
+        {'name': 'actual_within_registered', 'type': 'ratio', 'column': 'actual',
+         'other': 'registered', 'max_ratio': 1.5},
+        {'name': 'feedback_score_range', 'type': 'range', 'column': 'feedback_score',
+         'min': 1, 'max': 5},
+    ],
+    'catalogue': [
+        {'name': 'isbn_present', 'type': 'not_null', 'column': 'ISBN'},
+        {'name': 'copies_not_negative', 'type': 'range', 'column': 'Copies Available', 'min': 0},
+    ],
+    'feedback': [
+        {'name': 'rating_range', 'type': 'range', 'column': 'rating', 'min': 1, 'max': 5},
+        {'name': 'branch_name_format', 'type': 'pattern', 'column': 'branch',
+         'pattern': r'[A-Z][A-Za-z ]+ Branch'},
+    ],
+}
+
+
+def _rule_columns(rule):
+    """Columns a rule reads."""
+    return [rule[key] for key in ('column', 'other', 'left', 'right') if key in rule]
+
+
+def compile_rule(rule):
+    """Compile a rule dict into a function returning its violation mask.
+
+    Args:
+        rule (dict): Rule definition, see the module docstring
+
+    Returns:
+        callable: df -> boolean pd.Series, True where the row violates the rule
+
+    Example:
+        >>> check = compile_rule({'name': 'rating_range', 'type': 'range',
+        ...                       'column': 'rating', 'min': 1, 'max': 5})
+        >>> check(df).sum()
+    """
+    kind = rule.get('type')
+
+    if kind == 'not_null':
+        column = rule['column']
+        return lambda df: df[column].isna()
+
+    if kind == 'range':
+        column, low, high = rule['column'], rule.get('min'), rule.get('max')
+
+        def check_range(df):
+            values = pd.to_numeric(df[column], errors='coerce')
+            mask = pd.Series(False, index=df.index)
+            if low is not None:
+                mask |= values < low
+            if high is not None:
+                mask |= values > high
+            return mask
+        return check_range
+
+    if kind == 'pattern':
+        column, pattern = rule['column'], rule['pattern']
+
+        def check_pattern(df):
+            values = df[column]
+            matches = values.astype(str).str.fullmatch(pattern)
+            return values.notna() & ~matches.fillna(False).astype(bool)
+        return check_pattern
+
+    if kind == 'compare':
+        left, right = rule['left'], rule['right']
+        compare = _OPERATORS[rule['op']]
+        convert = (lambda s: pd.to_datetime(s, errors='coerce')) if rule.get('dates') else (lambda s: s)
+
+        def check_compare(df):
+            a, b = convert(df[left]), convert(df[right])
+            return a.notna() & b.notna() & ~compare(a, b).fillna(False).astype(bool)
+        return check_compare
+
+    if kind == 'ratio':
+        column, other, max_ratio = rule['column'], rule['other'], rule['max_ratio']
+
+        def check_ratio(df):
+            a = pd.to_numeric(df[column], errors='coerce')
+            b = pd.to_numeric(df[other], errors='coerce')
+            return (a > b * max_ratio).fillna(False).astype(bool)
+        return check_ratio
+
+    raise ValueError(f"Unknown rule type: {kind}")
+
+
+def check_rules(data, rules, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Evaluate all rules on a DataFrame or a stream of chunks in one pass.
+
+    Rules whose columns are missing from the data are reported as skipped.
+
+    Args:
+        data (pd.DataFrame or iterable): DataFrame, or chunks of one
+        rules (list): Rule dicts, e.g. DEFAULT_RULES['circulation']
+        sample_size (int): Violating rows kept per rule
+
+    Returns:
+        tuple: (report, samples) where report is a DataFrame with one row
+            per rule (rule, type, columns, rows, violations, violation_rate,
+            skipped) and samples maps each rule name to a DataFrame of up
+            to sample_size violating rows
+
+    Example:
+        >>> report, samples = check_rules(df, DEFAULT_RULES['circulation'])
+        >>> samples['return_after_checkout']
+    """
+    compiled = [(rule, compile_rule(rule)) for rule in rules]
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+
+    rows = 0
+    counts = {rule['name']: 0 for rule in rules}
+    samples = {rule['name']: [] for rule in rules}
+    skipped = {rule['name']: False for rule in rules}
+    for chunk in chunks:
+        rows += len(chunk)
+        for rule, check in compiled:
+            name = rule['name']
+            if not all(col in chunk.columns for col in _rule_columns(rule)):
+                skipped[name] = True
+                continue
+            mask = check(chunk).to_numpy(dtype=bool)
+            violations = int(mask.sum())
+            counts[name] += violations
+            kept = sum(len(sample) for sample in samples[name])
+            if violations and kept < sample_size:
+                samples[name].append(chunk[mask].head(sample_size - kept))
+
+    report = pd.DataFrame({
+        'rule': [rule['name'] for rule in rules],
+        'type': [rule['type'] for rule in rules],
+        'columns': [','.join(_rule_columns(rule)) for rule in rules],
+        'rows': rows,
+        'violations': [counts[rule['name']] for rule in rules],
+        'skipped': [skipped[rule['name']] for rule in rules],
+    })
+    report['violation_rate'] = report['violations'] / max(rows, 1)
+    samples = {name: pd.concat(parts) for name, parts in samples.items() if parts}
+
+    for row in report.itertuples():
+        if row.skipped:
+            logger.warning(f'Rule {row.rule} skipped: columns {row.columns} not found')
+        elif row.violations:
+            logger.info(f'Rule {row.rule}: {row.violations} violations')
+    return report, samples
@@ -0,0 +1,175 @@
+"""
+"Members who borrowed X also borrowed Y" from circulation data.
+
+member_id and isbn are encoded to integer codes and loans become a sparse
+binary member x item matrix X. The co-borrowing counts are X.T @ X, which
+is computed a block of items at a time so the full item x item matrix is
+never held in memory; only the top-K neighbours of each item are kept.
+
+The matrix and the code lists are saved together, so a later run only
+adds new loans. Neighbours are ranked by co-borrowing count, and that count only
+changes for items held by a member who borrowed something new, so only
+those items are recomputed.
+"""
+
+import logging
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from src.data_processing.checkpoint import commit_files, recover_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = 'data/gold/recommendations'
+TOP_K = 10
+BLOCK_SIZE = 2000
+
+NEIGHBOUR_COLUMNS = ['isbn', 'rank', 'neighbour_isbn', 'co_borrowers', 'similarity']
+
+
+def _load_state(state_dir):
+    """Saved member and item codes, loans matrix and neighbours table."""
+    if os.path.isdir(state_dir):
+        recover_files(state_dir)
+    paths = {name: os.path.join(state_dir, f'{name}.csv')
+             for name in ['members', 'items', 'item_neighbours']}
+    matrix_path = os.path.join(state_dir, 'loans.npz')
+    if not all(os.path.exists(path) for path in [matrix_path, *paths.values()]):
+        return pd.Index([], dtype=object), pd.Index([], dtype=object), None, None
+    members = pd.Index(pd.read_csv(paths['members'], dtype=str)['member_id'])
+    items = pd.Index(pd.read_csv(paths['items'], dtype=str)['isbn'])
+    neighbours = pd.read_csv(paths['item_neighbours'],
+                             dtype={'isbn': str, 'neighbour_isbn': str})
+    return members, items, sparse.load_npz(matrix_path).tocsr(), neighbours
+
+
+def _save_state(state_dir, members, items, matrix, neighbours):
+    """Replace the codes, matrix and neighbours together, so they always match."""
+    def save_matrix(path):
+        with open(path, 'wb') as file:
+            sparse.save_npz(file, matrix)
+
+    commit_files(state_dir, {
+        'members.csv': pd.DataFrame({'member_id': members}),
+        'items.csv': pd.DataFrame({'isbn': items}),
+        'loans.npz': save_matrix,
+        'item_neighbours.csv': neighbours,
+    })
+
+
+def _extend_codes(known, values):
+    """Codes of values in known, appending values not seen before."""
+    new = pd.Index(pd.unique(values[~values.isin(known)]))
+    codes = known.append(new)
+    return codes, codes.get_indexer(values)
+
+
+def loans_matrix(member_codes, item_codes, shape):
+    """Binary member x item CSR matrix: 1 if the member borrowed the item."""
+    matrix = sparse.csr_matrix(
+        (np.ones(len(member_codes), dtype=np.int32), (member_codes, item_codes)), shape=shape)
+    matrix.data[:] = 1
+    return matrix
+
+
+def top_neighbours(matrix, items=None, k=TOP_K, block_size=BLOCK_SIZE):
+    """Top-k co-borrowed items for each item, by number of shared members.
+
+    Args:
+        matrix (scipy.sparse matrix): Binary member x item loans
+        items (array-like, optional): Item codes to compute, defaults to all
+        k (int): Neighbours kept per item
+        block_size (int): Items per sparse product X[:, block].T @ X
+
+    Returns:
+        pd.DataFrame: item, rank, neighbour and co_borrowers (item codes)
+    """
+    matrix = sparse.csc_matrix(matrix)
+    items = np.arange(matrix.shape[1]) if items is None else np.asarray(items)
+    frames = []
+    for start in range(0, len(items), block_size):
+        block = items[start:start + block_size]
+        co = (matrix[:, block].T @ matrix).tocoo()
+        pairs = pd.DataFrame({'item': block[co.row], 'neighbour': co.col,
+                              'co_borrowers': co.data})
+        pairs = pairs[pairs['item'] != pairs['neighbour']]
+        pairs = pairs.sort_values(['item', 'co_borrowers', 'neighbour'],
+                                  ascending=[True, False, True], kind='stable')
+        pairs = pairs.groupby('item', sort=False).head(k)
+        pairs.insert(1, 'rank', pairs.groupby('item', sort=False).cumcount() + 1)
+        frames.append(pairs)
+    if not frames:
+        return pd.DataFrame(columns=['item', 'rank', 'neighbour', 'co_borrowers'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def update_recommendations(df, state_dir=DEFAULT_DIR, k=TOP_K, block_size=BLOCK_SIZE,
+                           member='member_id', item='isbn'):
+    """Add loans to the co-borrowing matrix and refresh the neighbours table.
+
+    Loans already in the matrix are ignored, so re-running on the same data
+    leaves the table unchanged.
+
+    Args:
+        df (pd.DataFrame): Circulation rows (new loans, or all loans)
+        state_dir (str): Directory holding the matrix, codes and table
+        k (int): Neighbours kept per item
+        block_size (int): Items per blocked sparse product
+        member (str): Member column of df
+        item (str): ISBN column of df
+
+    Returns:
+        pd.DataFrame: isbn, rank, neighbour_isbn, co_borrowers and
+            similarity (cosine of the two items' borrower sets)
+
+    Example:
+        >>> neighbours = update_recommendations(df_circulation)
+        >>> neighbours[neighbours['isbn'] == '9780433218197']
+    """
+    loans = df[[member, item]].dropna().astype(str)
+    members, items, matrix, neighbours = _load_state(state_dir)
+
+    members, member_codes = _extend_codes(members, loans[member])
+    items, item_codes = _extend_codes(items, loans[item])
+    shape = (len(members), len(items))
+    new = loans_matrix(member_codes, item_codes, shape)
+
+    if matrix is None:
+        matrix = sparse.csr_matrix(shape, dtype=np.int32)
+        neighbours = pd.DataFrame({'isbn': pd.Series(dtype=object),
+                                   'rank': pd.Series(dtype='int64'),
+                                   'neighbour_isbn': pd.Series(dtype=object),
+                                   'co_borrowers': pd.Series(dtype='int64')})
+    matrix.resize(shape)
+
+    added = new - new.multiply(matrix)
+    added.eliminate_zeros()
+    matrix = matrix + added
+    # Items of members with a new loan are the only ones whose counts changed
+    changed_members = np.unique(added.nonzero()[0])
+    affected = np.unique(matrix[changed_members].indices)
+    logger.info(f'{added.nnz} new member/item pairs, recomputing {len(affected)} of '
+                f'{len(items)} items')
+
+    fresh = top_neighbours(matrix, affected, k=k, block_size=block_size)
+    fresh = pd.DataFrame({
+        'isbn': items.to_numpy()[fresh['item'].to_numpy(dtype=int)],
+        'rank': fresh['rank'].to_numpy(dtype='int64'),
+        'neighbour_isbn': items.to_numpy()[fresh['neighbour'].to_numpy(dtype=int)],
+        'co_borrowers': fresh['co_borrowers'].to_numpy(dtype='int64'),
+    })
+    kept = neighbours[~neighbours['isbn'].isin(items[affected])]
+    neighbours = pd.concat([kept[fresh.columns], fresh], ignore_index=True)
+
+    # Borrower counts change with every update, so similarity is recomputed for all rows
+    support = pd.Series(np.diff(matrix.tocsc().indptr).astype(float), index=items)
+    neighbours['similarity'] = (
+        neighbours['co_borrowers']
+        / np.sqrt(support.reindex(neighbours['isbn']).to_numpy()
+                  * support.reindex(neighbours['neighbour_isbn']).to_numpy())
+    )
+    neighbours = neighbours.sort_values(['isbn', 'rank'], ignore_index=True)[NEIGHBOUR_COLUMNS]
+
+    _save_state(state_dir, members, items, matrix, neighbours)
+    return neighbours
@@ -0,0 +1,264 @@
+"""
+Fit chunk sizes and parallelism to a memory budget.
+
+A fixed chunk size wastes memory on a large worker and runs out of it on
+a small one. Instead, the first rows of a source are read as a sample and
+their in-memory size (pandas memory_usage(deep=True), so strings count in
+full) gives the bytes per row. plan_chunks() turns that into a chunk size:
+
+    chunk rows = budget / (bytes per row * OVERHEAD * chunks in memory)
+
+OVERHEAD allows for the copies a stage makes of a chunk while cleaning
+or joining it. Chunks in memory are the read-ahead queue plus the chunk
+being read and the one being processed.
+
+bounded() applies the plan between the reader and the stage that
+processes and writes the chunks: a thread reads ahead into a queue of
+queue_size chunks and blocks while the queue is full, so a slow writer
+holds the reader back instead of letting chunks pile up. The time each
+side spent waiting shows which one is the bottleneck.
+
+The budget is given in bytes, as a size such as '2GB', or as 'auto' for
+half the memory available to the process (the container's cgroup limit
+if it has one).
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from src.data_processing.ingestion import detect_compression, load_csv
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ROWS = 10_000
+QUEUE_SIZE = 2
+# Copies of a chunk a stage holds at once while transforming it
+OVERHEAD = 3.0
+MIN_CHUNK_ROWS = 1_000
+MAX_CHUNK_ROWS = 1_000_000
+# Memory of an idle worker process with pandas imported
+WORKER_BYTES = 150 * 1024 ** 2
+AUTO_FRACTION = 0.5
+
+_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+          'G': 1024 ** 3, 'GB': 1024 ** 3, 'T': 1024 ** 4, 'TB': 1024 ** 4}
+
+
+def available_memory():
+    """Bytes of memory available to this process, or None if unknown."""
+    limits = []
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as file:
+                value = file.read().strip()
+        except OSError:
+            continue
+        if value.isdigit():
+            limits.append(int(value))
+    try:
+        with open('/proc/meminfo') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    limits.append(int(line.split()[1]) * 1024)
+                    break
+    except OSError:
+        try:
+            limits.append(os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE'))
+        except (ValueError, OSError, AttributeError):
+            pass
+    return min(limits) if limits else None
+
+
+def parse_size(size):
+    """Bytes in a budget such as 2147483648, '2GB', '512m' or 'auto'.
+
+    Example:
+        >>> parse_size('1.5GB')
+        1610612736
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    text = str(size).strip().upper()
+    if text == 'AUTO':
+        available = available_memory()
+        if available is None:
+            raise ValueError('Cannot detect available memory, give the budget as a size')
+        return int(available * AUTO_FRACTION)
+    match = re.fullmatch(r'([0-9]*\.?[0-9]+)\s*([KMGT]?B?)', text)
+    if not match:
+        raise ValueError(f'Invalid memory size: {size}')
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def peak_memory():
+    """Peak resident memory of this process so far in bytes, None on Windows."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def sample_source(filepath, sample_rows=SAMPLE_ROWS, **read_kwargs):
+    """Measure the in-memory bytes per row of a CSV on its first rows.
+
+    Args:
+        filepath (str): CSV file
+        sample_rows (int): Rows to read
+        **read_kwargs: Passed to load_csv(), e.g. dtype or columns, so the
+            sample is parsed the way the stage will parse it
+
+    Returns:
+        dict: bytes_per_row, sample_rows read and estimated_rows in the
+            file (None if compressed, as its size on disk says little)
+    """
+    sample = next(iter(load_csv(filepath, chunksize=sample_rows, **read_kwargs)), None)
+    if sample is None or sample.empty:
+        return {'bytes_per_row': 0, 'sample_rows': 0, 'estimated_rows': 0}
+    bytes_per_row = int(sample.memory_usage(deep=True).sum() / len(sample))
+
+    estimated_rows = None
+    if detect_compression(filepath) is None:
+        with open(filepath, 'rb') as file:
+            header = len(file.readline())
+            disk_bytes = sum(len(file.readline()) for _ in range(len(sample)))
+        if disk_bytes:
+            estimated_rows = int((os.path.getsize(filepath) - header) * len(sample) / disk_bytes)
+    return {'bytes_per_row': bytes_per_row, 'sample_rows': len(sample),
+            'estimated_rows': estimated_rows}
+
+
+def plan_chunks(filepath, budget, queue_size=QUEUE_SIZE, sample_rows=SAMPLE_ROWS,
+                **read_kwargs):
+    """Pick the chunk size a chunked stage reads a CSV with.
+
+    Args:
+        filepath (str): CSV file the stage reads
+        budget (int or str): Memory the stage may use, see parse_size()
+        queue_size (int): Chunks read ahead by bounded()
+        sample_rows (int): Rows sampled to measure bytes per row
+        **read_kwargs: Passed to load_csv() for the sample
+
+    Returns:
+        dict: The plan: source, budget_bytes, bytes_per_row,
+            estimated_rows, chunksize and queue_size
+
+    Example:
+        >>> plan = plan_chunks('data/silver/circulation_clean.csv', '512MB')
+        >>> chunks = bounded(load_csv(path, chunksize=plan['chunksize']), plan['queue_size'])
+    """
+    budget = parse_size(budget)
+    sample = sample_source(filepath, sample_rows, **read_kwargs)
+    in_memory = queue_size + 2
+    if sample['bytes_per_row']:
+        rows = int(budget / (sample['bytes_per_row'] * OVERHEAD * in_memory))
+    else:
+        rows = MAX_CHUNK_ROWS
+    chunksize = max(MIN_CHUNK_ROWS, min(rows, MAX_CHUNK_ROWS))
+    if sample['estimated_rows']:
+        # No point in a chunk larger than the whole file
+        chunksize = min(chunksize, max(sample['estimated_rows'], MIN_CHUNK_ROWS))
+    if rows < MIN_CHUNK_ROWS:
+        logger.warning(f'{filepath}: a {budget:,} byte budget fits only {rows:,} rows '
+                       f'per chunk, using {MIN_CHUNK_ROWS:,}')
+    plan = {'source': str(filepath), 'budget_bytes': budget, **sample,
+            'chunksize': chunksize, 'queue_size': queue_size}
+    logger.info(f"{filepath}: {sample['bytes_per_row']:,} bytes/row, "
+                f"{chunksize:,} rows per chunk, {queue_size} read ahead")
+    return plan
+
+
+def plan_workers(dataset_bytes, budget, requested):
+    """Number of worker processes that fit in the budget alongside a dataset.
+
+    A parallel step holds the dataset and its result in the parent
+    (OVERHEAD copies in all), and each worker adds its own interpreter
+    (WORKER_BYTES); the partitions themselves add up to one more copy.
+
+    Args:
+        dataset_bytes (int): In-memory size of the dataset
+        budget (int or str): Memory budget, see parse_size()
+        requested (int): Workers asked for
+
+    Returns:
+        int: Between 1 and requested
+    """
+    budget = parse_size(budget)
+    spare = budget - dataset_bytes * (OVERHEAD + 1)
+    workers = max(1, min(requested, int(spare // WORKER_BYTES)))
+    if workers < requested:
+        logger.warning(f'Memory budget of {budget:,} bytes fits {workers} of '
+                       f'{requested} workers')
+    return workers
+
+
+def bounded(chunks, queue_size=QUEUE_SIZE, stats=None):
+    """Read chunks ahead in a thread, at most queue_size at a time.
+
+    Args:
+        chunks (iterable): Chunks from the reader, e.g. load_csv(chunksize=...)
+        queue_size (int): Chunks that may wait for the consumer. The
+            reader blocks while the queue is full.
+        stats (dict, optional): Filled in with chunks, max_queue_depth,
+            reader_wait_seconds (reader blocked on a full queue, i.e. the
+            consumer is the bottleneck) and consumer_wait_seconds (consumer
+            waiting for the reader)
+
+    Yields:
+        The chunks, in order. An error in the reader is raised here.
+
+    Example:
+        >>> for chunk in bounded(load_csv(path, chunksize=50_000), queue_size=2):
+        ...     process(chunk)
+    """
+    stats = stats if stats is not None else {}
+    stats.update(chunks=0, max_queue_depth=0, reader_wait_seconds=0.0,
+                 consumer_wait_seconds=0.0)
+    items = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        started = time.perf_counter()
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats['reader_wait_seconds'] += time.perf_counter() - started
+
+    def read():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    return
+                put((chunk, None))
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    reader = threading.Thread(target=read, name='chunk-reader', daemon=True)
+    reader.start()
+    try:
+        while True:
+            started = time.perf_counter()
+            chunk, error = items.get()
+            stats['consumer_wait_seconds'] += time.perf_counter() - started
+            if error is not None:
+                raise error
+            if chunk is done:
+                break
+            stats['chunks'] += 1
+            stats['max_queue_depth'] = max(stats['max_queue_depth'], items.qsize() + 1)
+            yield chunk
+    finally:
+        # Unblock the reader if the consumer stopped early
+        stop.set()
+        reader.join()
+        stats['reader_wait_seconds'] = round(stats['reader_wait_seconds'], 3)
+        stats['consumer_wait_seconds'] = round(stats['consumer_wait_seconds'], 3)
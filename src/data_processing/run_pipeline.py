@@ -16,22 +16,21 @@ Run this from the command line as follows:
 > python -m src.data_processing.run_pipeline
 """
 
-import re
-import pandas as pd
-import sys
+import argparse
+import logging
+import threading
 from pathlib import Path
 from datetime import datetime
-sys.path.append('C:/Users/Admin/Documents/GitHub/library-pipeline/src/data_processing')
-# Import our custom functions
-from src.data_processing.ingestion import load_csv, load_json, load_excel
-from src.data_processing.cleaning import (
-    remove_duplicates,
-    handle_missing_values,
-    standardize_dates,
-    standardise_isbn,
-    format_dates
+from src.data_processing.checkpoint import (
+    chunk_checkpoint,
+    finish_run,
+    run_stage,
+    start_run,
+    write_csv_atomic
 )
-from src.data_processing.validation import validate_isbn
+
+# Pipeline modules pull in pandas, numpy and openpyxl, so they are imported
+# inside the stage functions. This keeps `--help` and `--dry-run` fast.
 
 
 # ============================================
@@ -41,9 +40,29 @@ from src.data_processing.validation import validate_isbn
 # Define our data directories (medallion architecture)
 BRONZE_DIR = Path('data')
 SILVER_DIR = Path('data/silver')
-
-# Create silver directory if it doesn't exist
-SILVER_DIR.mkdir(parents=True, exist_ok=True)
+GOLD_DIR = Path('data/gold')
+REPORTS_DIR = Path('data/reports')
+CHECKPOINT_DIR = Path('data/checkpoints')
+CACHE_DIR = Path('data/cache')
+SNAPSHOT_DIR = Path('data/snapshots')
+
+# Optional SQLite (.sqlite) or DuckDB (.duckdb) file that every silver
+# table is also loaded into, set with --sql-sink
+SQL_SINK = None
+# Watch mode runs stages in threads; one of them writes to the sink at a time
+_SINK_LOCK = threading.Lock()
+
+# Column types silver circulation is read back with by the chunked stages
+CIRCULATION_SILVER_DTYPES = {'transaction_id': str, 'member_id': str, 'isbn': str,
+                             'branch_id': str}
+
+# Raw input file of each data source
+BRONZE_FILES = {
+    'circulation': BRONZE_DIR / 'circulation_data.csv',
+    'events': BRONZE_DIR / 'events_data.json',
+    'catalogue': BRONZE_DIR / 'catalogue.xlsx',
+    'feedback': BRONZE_DIR / 'feedback.txt',
+}
 
 
 # ============================================
@@ -67,20 +86,231 @@ def print_dataframe_info(df, name):
 
 
 def save_to_silver(df, filename):
-    """Save DataFrame to silver layer as CSV."""
+    """Save DataFrame to silver layer as CSV, replacing the file atomically.
+
+    If SQL_SINK is set, the table of the same name in that database is
+    replaced with the DataFrame as well.
+    """
+    SILVER_DIR.mkdir(parents=True, exist_ok=True)
     filepath = SILVER_DIR / filename
-    df.to_csv(filepath, index=False)
+    write_csv_atomic(df, filepath, index=False)
+    if SQL_SINK is not None:
+        from src.data_processing.sink import write_table
+
+        with _SINK_LOCK:
+            write_table(df, Path(filename).stem, str(SQL_SINK), replace=True)
+    return filepath
+
+
+def cleaning_step(func, cache_dir=None, workers=1):
+    """Return a cleaning function, cached on disk if cache_dir is given.
+
+    With workers > 1 the function runs on row partitions in worker
+    processes that share the data through memory-mapped Arrow files, so
+    it must work row by row.
+    """
+    if workers > 1:
+        from src.data_processing.shared import parallel
+
+        func = parallel(func, workers=workers)
+    if cache_dir is None:
+        return func
+    from src.data_processing.cache import memoize
+
+    return memoize(func, cache_dir=str(cache_dir))
+
+
+def resource_plan(journal, name, filepath, memory_budget, **read_kwargs):
+    """Chunk plan of a stage under the memory budget, or None without one.
+
+    The plan is kept in the run journal, so a resumed run reads the same
+    chunks as the run it continues.
+    """
+    if memory_budget is None:
+        return None
+    plans = journal.setdefault('resources', {})
+    if name not in plans:
+        from src.data_processing.resources import plan_chunks
+
+        plans[name] = plan_chunks(str(filepath), memory_budget, **read_kwargs)
+    return plans[name]
+
+
+def read_chunks(filepath, chunksize, plan=None, **read_kwargs):
+    """Read a CSV in chunks, sized and read ahead as the plan says if given.
+
+    With a plan, a reader thread keeps at most plan['queue_size'] chunks
+    ahead of the stage, and the time either side waited is added to the
+    plan under 'backpressure'.
+    """
+    from src.data_processing.ingestion import load_csv
+
+    if plan is None:
+        return load_csv(str(filepath), chunksize=chunksize, **read_kwargs)
+    from src.data_processing.resources import bounded
+
+    chunks = load_csv(str(filepath), chunksize=plan['chunksize'], **read_kwargs)
+    return bounded(chunks, plan['queue_size'], plan.setdefault('backpressure', {}))
+
+
+def save_run_report(journal, start_time, memory_budget=None):
+    """Save the run's options, memory plans and peak memory as JSON."""
+    import json
+    from src.data_processing.checkpoint import atomic_write
+    from src.data_processing.resources import parse_size, peak_memory
+
+    report = {
+        'run_id': journal.get('run_id'),
+        'started': start_time.isoformat(timespec='seconds'),
+        'duration_seconds': round((datetime.now() - start_time).total_seconds(), 2),
+        'options': journal.get('options', {}),
+        'memory_budget_bytes': None if memory_budget is None else parse_size(memory_budget),
+        'peak_memory_bytes': peak_memory(),
+        'plans': journal.get('resources', {}),
+    }
+    filepath = REPORTS_DIR / 'run_report.json'
+    with atomic_write(filepath) as file:
+        json.dump(report, file, indent=2)
     return filepath
 
 
+def save_branch_dictionary():
+    """Save the branch dictionary that branch_key columns refer to.
+
+    Circulation branch ids without an alias to a branch name keep keys of
+    their own, so they cannot be joined with events or feedback; they are
+    listed here and reported by the integrity checks.
+    """
+    from src.data_processing.branches import ALIASES_FILE, build_branch_index
+
+    index = build_branch_index()
+    if index['unmapped_ids']:
+        print(f"  - {len(index['unmapped_ids'])} branch ids have no branch name in "
+              f"{ALIASES_FILE}: {', '.join(index['unmapped_ids'])}")
+    return save_to_silver(index['dictionary'], 'branches.csv')
+
+
 # ============================================
 # PIPELINE STAGES
 # ============================================
 
-def process_circulation_data():
+def process_snapshot_changes(chunksize=100_000, plan=None, journal=None):
+    """
+    Work out what changed since the previous bronze snapshots.
+
+    Each snapshot's row hashes are compared with the hash index saved by
+    the previous run. The new index is staged and only replaces it when
+    the run finishes, so a failed run that is started again (without
+    --resume) still reports the same changes.
+
+    Args:
+        chunksize (int): Rows per circulation chunk
+        plan (dict, optional): Chunk plan from resource_plan(), which
+            overrides chunksize
+        journal (dict, optional): Run journal the new indexes are staged in
+
+    Steps:
+    1. Diff circulation on transaction_id
+    2. Diff the catalogue on ISBN
+    3. Save the inserts, updates and deletes
+    """
+    from src.data_processing.ingestion import load_excel
+    from src.data_processing.cdc import diff_snapshot
+    from src.data_processing.checkpoint import stage_file
+
+    print_section_header("Capturing Snapshot Changes")
+    stats = {}
+
+    print("\n[1/3] Comparing circulation snapshot...")
+    chunks = read_chunks(BRONZE_FILES['circulation'], chunksize, plan, dtype=str)
+    index_path = SNAPSHOT_DIR / 'circulation_index.csv'
+    _, stats['circulation'] = diff_snapshot(
+        chunks, 'transaction_id', str(index_path),
+        output_path=str(SILVER_DIR / 'circulation_changes.csv'),
+        new_index_path=stage_file(journal, index_path))
+
+    print("\n[2/3] Comparing catalogue snapshot...")
+    index_path = SNAPSHOT_DIR / 'catalogue_index.csv'
+    _, stats['catalogue'] = diff_snapshot(
+        load_excel(str(BRONZE_FILES['catalogue'])), 'ISBN', str(index_path),
+        output_path=str(SILVER_DIR / 'catalogue_changes.csv'),
+        new_index_path=stage_file(journal, index_path))
+
+    for name, counts in stats.items():
+        print(f"  - {name}: {counts['inserts']:,} inserts, {counts['updates']:,} updates, "
+              f"{counts['deletes']:,} deletes, {counts['unchanged']:,} unchanged")
+
+    print("\n[3/3] Saving changes...")
+    print(f"  ✓ Saved to: {SILVER_DIR / 'circulation_changes.csv'}")
+    print(f"  ✓ Saved to: {SILVER_DIR / 'catalogue_changes.csv'}")
+
+    return stats
+
+
+def process_shadow_checks(engine, sample_rows=10_000):
+    """
+    Compare a faster engine with the reference cleaning functions.
+
+    The reference and the engine run on the same sample of raw
+    circulation rows and their outputs are compared cell by cell.
+    Nothing is written to silver.
+
+    Args:
+        engine (str): 'vectorized', 'polars', 'dask' or 'workers'
+        sample_rows (int, optional): Rows compared, None for every row
+
+    Steps:
+    1. Run each function with an engine of that name on both paths
+    2. Save the comparison and mismatch reports
+    """
+    from src.data_processing.ingestion import load_csv
+    from src.data_processing.shadow import ENGINES, shadow_compare, shadow_report
+
+    print_section_header(f"Shadow-Testing the {engine} Engine")
+    checks = [
+        ('format_dates', 'checkout_date', {}),
+        ('format_dates', 'return_date', {}),
+        ('validate_isbn', 'isbn', {}),
+        ('standardise_isbn', 'isbn', {}),
+        ('standardize_dates', ['checkout_date', 'return_date'], {'keep_datetime': True}),
+    ]
+
+    print("\n[1/2] Comparing outputs on raw circulation data...")
+    df = load_csv(str(BRONZE_FILES['circulation']))
+    results = [shadow_compare(df, function, engine, column, sample=sample_rows, **kwargs)
+               for function, column, kwargs in checks if engine in ENGINES[function]]
+    if not results:
+        raise ValueError(f'No function has a {engine} engine')
+    for result in results:
+        if result['error']:
+            status = result['error']
+        else:
+            status = (f"{result['mismatched_cells']:,} mismatched cells, "
+                      f"{result['speedup']:.1f}x faster")
+        print(f"  - {result['function']} [{result['column']}]: {result['rows']:,} rows, {status}")
+
+    print("\n[2/2] Saving shadow reports...")
+    summary, examples = shadow_report(results)
+    write_csv_atomic(summary, REPORTS_DIR / 'shadow_report.csv', index=False)
+    write_csv_atomic(examples, REPORTS_DIR / 'shadow_mismatches.csv', index=False)
+    print(f"  ✓ Saved to: {REPORTS_DIR / 'shadow_report.csv'}")
+
+    return summary
+
+
+def process_circulation_data(csv_engine='pandas', cache_dir=None, workers=1, filepath=None):
     """
     Process circulation data (borrowing transactions).
 
+    Args:
+        csv_engine (str): 'pandas', or 'pyarrow' for the multi-threaded
+            Arrow CSV reader with explicit column types
+        cache_dir (Path, optional): Reuse cleaning step results stored
+            here when their input, parameters and code are unchanged
+        workers (int): Processes the row-wise ISBN and date steps are
+            split across
+        filepath (Path, optional): Bronze file, defaults to BRONZE_FILES
+
     Steps:
     1. Load from bronze
     2. Remove duplicates
@@ -88,18 +318,37 @@ def process_circulation_data():
     4. Standardize dates
     5. Save to silver
     """
+    from src.data_processing.ingestion import load_csv, CIRCULATION_DTYPES
+    from src.data_processing.cleaning import (
+        remove_duplicates,
+        handle_missing_values,
+        standardize_dates,
+        standardise_isbn
+    )
+    from src.data_processing.lookup import build_index
+    from src.data_processing.branches import add_branch_key
+
+    standardise_isbn = cleaning_step(standardise_isbn, cache_dir, workers)
+    standardize_dates = cleaning_step(standardize_dates, cache_dir, workers)
+    remove_duplicates = cleaning_step(remove_duplicates, cache_dir)
+    handle_missing_values = cleaning_step(handle_missing_values, cache_dir)
+
     print_section_header("Processing Circulation Data")
 
     # Step 1: Load raw data
     print("\n[1/4] Loading raw data...")
-    df = load_csv('data/circulation_data.csv')
+    source = str(filepath or BRONZE_FILES['circulation'])
+    if csv_engine == 'pyarrow':
+        df = load_csv(source, engine='pyarrow', dtype=CIRCULATION_DTYPES)
+    else:
+        df = load_csv(source)
     print_dataframe_info(df, "Raw data")
 
     # Standardise ISBN column
     df = standardise_isbn(df, 'isbn')
 
-    # Standardise date columns
-    df = standardize_dates(df, ['checkout_date', 'return_date'])
+    # Standardise date columns, keeping datetime64 for the date arithmetic downstream
+    df = standardize_dates(df, ['checkout_date', 'return_date'], keep_datetime=True)
 
     # Step 2: Remove duplicates
     print("\n[2/4] Removing duplicates...")
@@ -114,54 +363,93 @@ def process_circulation_data():
 
     # Remove blank spaces from branch_id column
     df_clean.branch_id = df_clean.branch_id.str.strip()
+    df_clean = add_branch_key(df_clean, 'branch_id')
 
     # Step 4: Save cleaned data
     print("\n[4/4] Saving cleaned data...")
     filepath = save_to_silver(df_clean, 'circulation_clean.csv')
     print(f"  ✓ Saved to: {filepath}")
+    # save_to_silver() rewrites the whole table, so the old offsets are stale
+    build_index(str(filepath), rebuild=True)
+    print("  ✓ Rebuilt lookup index")
     print_dataframe_info(df_clean, "Cleaned data")
 
     return df_clean
 
 
-def process_events_data():
+def process_events_data(filepath=None):
     """
     Process events data (library events from JSON).
 
+    Args:
+        filepath (Path, optional): Bronze file, defaults to BRONZE_FILES
+
     Steps:
     1. Load from bronze
-    2. Flatten nested JSON
+    2. Normalise nested JSON into events, attendance and age-band tables
     3. Handle missing values
     4. Save to silver
+
+    Returns:
+        dict: 'events' (events with their attendance, one row per event)
+            and 'event_age_bands' (long-form age-band attendance)
     """
+    from src.data_processing.ingestion import load_json_records
+    from src.data_processing.cleaning import handle_missing_values, standardize_dates
+    from src.data_processing.branches import add_branch_key
+    from src.data_processing.event_tables import age_band_attendance, normalise_events
+
     print_section_header("Processing Events Data")
 
     # Step 1: Load raw data
-    print("\n[1/3] Loading raw data...")
-    df = load_json('data/events_data.json')
-    print_dataframe_info(df, "Raw data")
+    print("\n[1/4] Loading raw data...")
+    records = load_json_records(str(filepath or BRONZE_FILES['events']))
+    print(f"  - Found {len(records):,} events")
+
+    # Step 2: Normalise
+    print("\n[2/4] Normalising nested records...")
+    tables = normalise_events(records)
+    for name, table in tables.items():
+        print(f"  - {name}: {len(table):,} rows")
 
     # Standardise dates
-    df = standardize_dates(df, ['date'])
+    events = standardize_dates(tables['events'], ['date'])
 
-    # Step 2: Handle missing values
-    print("\n[2/3] Handling missing values...")
-    df_clean = handle_missing_values(df, strategy='drop')
+    # Step 3: Handle missing values. Only events without an id, branch or
+    # date are dropped; a missing feedback score or age band is kept as a gap
+    print("\n[3/4] Handling missing values...")
+    events = handle_missing_values(events, strategy='drop', columns=['event_id', 'branch', 'date'])
+    events = add_branch_key(events, 'branch')
+    print(f"  - Dropped {len(tables['events']) - len(events):,} incomplete events")
+    kept = tables['attendance']['event_key'].isin(events['event_key'])
+    attendance = tables['attendance'][kept]
+    kept = tables['event_age_bands']['event_key'].isin(events['event_key'])
+    event_age_bands = tables['event_age_bands'][kept]
 
-    # Step 3: Save cleaned data
-    print("\n[3/3] Saving cleaned data...")
-    filepath = save_to_silver(df_clean, 'events_clean.csv')
+    # Step 4: Save cleaned data
+    print("\n[4/4] Saving cleaned data...")
+    filepath = save_to_silver(events, 'events_clean.csv')
+    save_to_silver(attendance, 'event_attendance.csv')
+    save_to_silver(tables['age_bands'], 'age_bands.csv')
+    save_to_silver(event_age_bands, 'event_age_bands.csv')
     print(f"  ✓ Saved to: {filepath}")
 
+    df_clean = events.merge(attendance, on='event_key', how='left')
     print_dataframe_info(df_clean, "Cleaned data")
 
-    return df_clean
+    long = age_band_attendance({**tables, 'event_age_bands': event_age_bands}, events)
+    return {'events': df_clean, 'event_age_bands': long}
 
 
-def process_catalogue_data():
+def process_catalogue_data(cache_dir=None, filepath=None):
     """
     Process catalogue data (book catalogue from Excel).
 
+    Args:
+        cache_dir (Path, optional): Reuse cleaning step results stored
+            here when their input, parameters and code are unchanged
+        filepath (Path, optional): Bronze file, defaults to BRONZE_FILES
+
     Steps:
     1. Load from bronze
     2. Remove duplicates
@@ -169,11 +457,23 @@ def process_catalogue_data():
     4. Handle missing values
     5. Save to silver
     """
+    from src.data_processing.ingestion import load_excel
+    from src.data_processing.cleaning import (
+        remove_duplicates,
+        standardize_dates,
+        standardise_isbn
+    )
+    from src.data_processing.validation import validate_isbn
+
+    standardise_isbn = cleaning_step(standardise_isbn, cache_dir)
+    standardize_dates = cleaning_step(standardize_dates, cache_dir)
+    remove_duplicates = cleaning_step(remove_duplicates, cache_dir)
+
     print_section_header("Processing Catalogue Data")
 
     # Step 1: Load raw data
     print("\n[1/4] Loading raw data...")
-    df = load_excel('data/catalogue.xlsx')
+    df = load_excel(str(filepath or BRONZE_FILES['catalogue']))
     print_dataframe_info(df, "Raw data")
 
     # Standardise ISBN column
@@ -206,10 +506,13 @@ def process_catalogue_data():
     return df_clean
 
 
-def process_feedback_data():
+def process_feedback_data(filepath=None):
     """
     Process feedback data (unstructured text).
 
+    Args:
+        filepath (Path, optional): Bronze file, defaults to BRONZE_FILES
+
     Note: This is a simplified version.
     In practice, you'd parse the text file properly.
 
@@ -218,29 +521,29 @@ def process_feedback_data():
     2. Parse into structured format
     3. Save to silver
     """
+    from src.data_processing.branches import add_branch_key
+    from src.data_processing.text_analytics import parse_feedback
+
     print_section_header("Processing Feedback Data")
 
     print("\n[1/2] Loading and parsing feedback text...")
 
     # Read the text file
-    with open('data/feedback.txt', 'r', encoding='utf-8') as f:
+    with open(filepath or BRONZE_FILES['feedback'], 'r', encoding='utf-8') as f:
         content = f.read()
 
     # Count the feedbacks
     feedback_count = content.count('Feedback #')
     print(f"  - Found {feedback_count} feedback entries")
 
-    # Capture both branch name and rating number
-    pattern = r"- ([A-Za-z\s]+ Branch) ~ (\d)⭐"
-    matches = re.findall(pattern, content)
-
-    # Convert to DataFrame
-    df = pd.DataFrame(matches, columns=["branch", "rating"])
-    df["rating"] = df["rating"].astype(int)
+    # Capture the feedback number, date, branch name, rating and comment
+    df = parse_feedback(content)
+    df = add_branch_key(df, "branch")
 
     # Group by SBranch and Rating
     df_summary = (
-        df.groupby(["branch", "rating"], as_index=False).size().rename(columns={"size": "count"})
+        df.groupby(["branch", "branch_key", "rating"], as_index=False)
+        .size().rename(columns={"size": "count"})
     )
 
     # Step 2: Save
@@ -253,17 +556,340 @@ def process_feedback_data():
     return df
 
 
+def process_feedback_analytics(results):
+    """
+    Analyse the text of the feedback comments.
+
+    Steps:
+    1. Build the term-document matrix of all comments
+    2. Score comment sentiment and find top terms per branch
+    3. Save comment sentiment to silver and keyword reports
+    """
+    from src.data_processing.text_analytics import analyse_feedback
+
+    print_section_header("Analysing Feedback Comments")
+
+    print("\n[1/3] Tokenising comments...")
+    analysis = analyse_feedback(results['feedback'])
+    print(f"  - {len(analysis['keywords']):,} distinct terms")
+
+    print("\n[2/3] Scoring sentiment...")
+    labels = analysis['comments']['label'].value_counts()
+    for label, count in labels.items():
+        print(f"  - {label}: {count:,} comments")
+
+    print("\n[3/3] Saving feedback analytics...")
+    filepath = save_to_silver(analysis['comments'], 'feedback_sentiment.csv')
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    write_csv_atomic(analysis['keywords'], REPORTS_DIR / 'feedback_keywords.csv', index=False)
+    write_csv_atomic(analysis['top_terms'], REPORTS_DIR / 'feedback_top_terms.csv', index=False)
+    print(f"  ✓ Saved to: {filepath}")
+    print(f"  ✓ Saved to: {REPORTS_DIR / 'feedback_top_terms.csv'}")
+
+    return analysis
+
+
+def process_quality_checks(results):
+    """
+    Check the cleaned data against the data quality rules.
+
+    Steps:
+    1. Evaluate every rule of each dataset in one pass
+    2. Save the per-rule report
+    """
+    import pandas as pd
+    from src.data_processing.quality import DEFAULT_RULES, check_rules
+
+    print_section_header("Data Quality Checks")
+
+    print("\n[1/2] Evaluating rules...")
+    start_time = datetime.now()
+    reports = []
+    for dataset, df in results.items():
+        if dataset not in DEFAULT_RULES:
+            continue
+        report, samples = check_rules(df, DEFAULT_RULES[dataset])
+        reports.append(report.assign(dataset=dataset))
+        for row in report.itertuples():
+            status = "skipped" if row.skipped else f"{row.violations:,} violations"
+            print(f"  - {dataset}.{row.rule}: {status}")
+    duration = (datetime.now() - start_time).total_seconds()
+    print(f"  - Checked in {duration:.3f} seconds")
+
+    print("\n[2/2] Saving quality report...")
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    report = pd.concat(reports, ignore_index=True)
+    report = report[['dataset'] + [col for col in report.columns if col != 'dataset']]
+    filepath = REPORTS_DIR / 'quality_report.csv'
+    write_csv_atomic(report, filepath, index=False)
+    print(f"  ✓ Saved to: {filepath}")
+
+    return report
+
+
+def process_integrity_checks(results, chunksize=100_000, plan=None):
+    """
+    Check references between the silver datasets.
+
+    Args:
+        results (dict): Cleaned datasets
+        chunksize (int): Rows per circulation chunk
+        plan (dict, optional): Chunk plan from resource_plan(), which
+            overrides chunksize
+
+    Steps:
+    1. Stream circulation ISBNs against the catalogue ISBN set
+    2. Stream circulation branch keys against event and feedback branches
+    3. Check feedback branches against event branches
+    4. Save the integrity report
+    """
+    import pandas as pd
+    from src.data_processing.integrity import build_key_set, check_references, normalise_isbn
+
+    print_section_header("Referential Integrity Checks")
+    checks = {}
+
+    print("\n[1/4] Checking circulation ISBNs against the catalogue...")
+    catalogue_keys = build_key_set(results['catalogue']['ISBN'], normalise_isbn)
+    chunks = read_chunks(SILVER_DIR / 'circulation_clean.csv', chunksize, plan,
+                         columns=['isbn'], dtype={'isbn': str})
+    checks['circulation.isbn -> catalogue.ISBN'] = check_references(
+        chunks, 'isbn', catalogue_keys, normalise_isbn)
+
+    # Ids without an alias to a branch name show up here as orphans
+    print("\n[2/4] Checking circulation branches against event and feedback branches...")
+    named_branches = build_key_set(pd.concat([results['events']['branch_key'],
+                                              results['feedback']['branch_key']]))
+    chunks = read_chunks(SILVER_DIR / 'circulation_clean.csv', chunksize, plan,
+                         columns=['branch_key'], dtype={'branch_key': 'Int16'})
+    checks['circulation.branch_key -> events/feedback.branch_key'] = check_references(
+        chunks, 'branch_key', named_branches)
+
+    print("\n[3/4] Checking feedback branches against event branches...")
+    event_branches = build_key_set(results['events']['branch_key'])
+    checks['feedback.branch_key -> events.branch_key'] = check_references(
+        results['feedback'], 'branch_key', event_branches)
+
+    for name, result in checks.items():
+        print(f"  - {name}: {result['orphan_rows']:,} of {result['rows']:,} rows orphaned "
+              f"({result['orphan_keys']:,} distinct keys)")
+
+    print("\n[4/4] Saving integrity report...")
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    report = pd.DataFrame([
+        {'check': name, **{key: value for key, value in result.items() if key != 'orphans'}}
+        for name, result in checks.items()
+    ])
+    orphans = pd.concat([result['orphans'].assign(check=name) for name, result in checks.items()],
+                        ignore_index=True)[['check', 'key', 'rows']]
+    write_csv_atomic(report, REPORTS_DIR / 'integrity_report.csv', index=False)
+    write_csv_atomic(orphans, REPORTS_DIR / 'integrity_orphans.csv', index=False)
+    print(f"  ✓ Saved to: {REPORTS_DIR / 'integrity_report.csv'}")
+
+    return report
+
+
+def process_near_duplicates(results):
+    """
+    Flag catalogue records that are likely the same book under different ISBNs.
+
+    Steps:
+    1. Group near-identical titles and authors (MinHash/LSH)
+    2. Save the duplicate groups for review
+    """
+    from src.data_processing.deduplication import find_near_duplicates
+
+    print_section_header("Detecting Near-Duplicate Catalogue Records")
+
+    print("\n[1/2] Comparing titles and authors...")
+    groups = find_near_duplicates(results['catalogue'])
+    print(f"  - Found {groups['cluster_id'].nunique():,} groups "
+          f"covering {len(groups):,} records")
+
+    print("\n[2/2] Saving near-duplicate report...")
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    filepath = REPORTS_DIR / 'catalogue_near_duplicates.csv'
+    write_csv_atomic(groups, filepath, index=False)
+    print(f"  ✓ Saved to: {filepath}")
+
+    return groups
+
+
+def process_enrichment(results, chunksize=100_000, journal=None, plan=None):
+    """
+    Join catalogue title, author and genre onto circulation data.
+
+    With a run journal, progress is checkpointed after every chunk and a
+    resumed run continues from the last completed chunk. A chunk plan
+    from resource_plan() overrides chunksize.
+
+    Steps:
+    1. Stream silver circulation through the catalogue hash join
+    2. Save the enriched circulation table
+    """
+    from src.data_processing.enrichment import enrich_circulation
+
+    print_section_header("Enriching Circulation Data")
+
+    print("\n[1/2] Joining circulation to the catalogue on ISBN...")
+    chunks = read_chunks(SILVER_DIR / 'circulation_clean.csv', chunksize, plan,
+                         dtype=CIRCULATION_SILVER_DTYPES)
+    filepath = SILVER_DIR / 'circulation_enriched.csv'
+    start, on_chunk = chunk_checkpoint(journal, 'enrichment')
+    _, stats = enrich_circulation(chunks, results['catalogue'], output_path=str(filepath),
+                                  start=start, on_chunk=on_chunk)
+    print(f"  - Matched {stats['matched']:,} of {stats['rows']:,} loans "
+          f"(hit rate {stats['hit_rate']:.1%})")
+
+    print("\n[2/2] Saving enriched data...")
+    print(f"  ✓ Saved to: {filepath}")
+
+    return stats
+
+
+def process_circulation_features(chunksize=100_000, journal=None, as_of=None, plan=None):
+    """
+    Derive loan duration, overdue and daily time-series features.
+
+    Args:
+        chunksize (int): Rows per chunk
+        journal (dict, optional): Run journal; progress is checkpointed
+            after every chunk
+        as_of (str, optional): Date open loans are measured against,
+            defaults to today
+        plan (dict, optional): Chunk plan from resource_plan(), which
+            overrides chunksize
+
+    Steps:
+    1. Stream silver circulation through the loan features
+    2. Build open loans per day and rolling branch volumes
+    3. Save the features and daily series
+    """
+    from src.data_processing.features import compute_features
+
+    print_section_header("Deriving Circulation Features")
+
+    print("\n[1/3] Computing loan features...")
+    chunks = read_chunks(SILVER_DIR / 'circulation_clean.csv', chunksize, plan,
+                         dtype=CIRCULATION_SILVER_DTYPES)
+    filepath = SILVER_DIR / 'circulation_features.csv'
+    start, on_chunk = chunk_checkpoint(journal, 'circulation_features')
+    features = compute_features(chunks, output_path=str(filepath),
+                                as_of=as_of or datetime.now().strftime('%Y-%m-%d'),
+                                start=start, on_chunk=on_chunk)
+
+    print("\n[2/3] Building daily series...")
+    open_loans = features['open_loans']
+    if len(open_loans):
+        print(f"  - {len(open_loans):,} days, peak of {open_loans['open_loans'].max():,} open loans")
+
+    print("\n[3/3] Saving features...")
+    GOLD_DIR.mkdir(parents=True, exist_ok=True)
+    write_csv_atomic(open_loans, GOLD_DIR / 'open_loans_daily.csv', index=False,
+                     date_format='%Y-%m-%d')
+    write_csv_atomic(features['branch_volumes'], GOLD_DIR / 'branch_daily_volumes.csv',
+                     index=False, date_format='%Y-%m-%d')
+    print(f"  ✓ Saved to: {filepath}")
+    print(f"  ✓ Saved to: {GOLD_DIR / 'open_loans_daily.csv'}")
+
+    return features
+
+
+def process_recommendations(results):
+    """
+    Find the items most often borrowed by the same members.
+
+    Only loans not already in the saved co-borrowing matrix are added,
+    and only the items they affect are recomputed.
+
+    Steps:
+    1. Add new loans to the member x item matrix
+    2. Save the item neighbours table
+    """
+    from src.data_processing.recommendations import update_recommendations
+
+    print_section_header("Updating Co-Borrowing Recommendations")
+
+    print("\n[1/2] Adding new loans to the co-borrowing matrix...")
+    state_dir = GOLD_DIR / 'recommendations'
+    neighbours = update_recommendations(results['circulation'], state_dir=str(state_dir))
+    print(f"  - {neighbours['isbn'].nunique():,} items with co-borrowed neighbours")
+
+    print("\n[2/2] Saving neighbours table...")
+    print(f"  ✓ Saved to: {state_dir / 'item_neighbours.csv'}")
+
+    return neighbours
+
+
+def process_gold_data(results, as_of=None):
+    """
+    Roll the cleaned silver data up into the gold layer.
+
+    Only rows that are new or changed since the previous run are
+    aggregated; their counts and sums are added onto the existing gold
+    tables, replacing what a changed row contributed before.
+
+    Args:
+        results (dict): Cleaned datasets
+        as_of (str, optional): Date open loans are measured against
+            for overdue_loans
+
+    Steps:
+    1. Update circulation, events and feedback aggregates
+    """
+    from src.data_processing.gold import update_gold
+
+    print_section_header("Updating Gold Aggregates")
+
+    print("\n[1/1] Rolling up new silver rows...")
+    tables = {}
+    # Events are rolled up from their long-form age-band attendance
+    inputs = {'circulation': 'circulation', 'events': 'event_age_bands', 'feedback': 'feedback'}
+    for dataset, name in inputs.items():
+        if name in results:
+            tables.update(update_gold(results[name], dataset, gold_dir=GOLD_DIR, as_of=as_of))
+
+    for name, table in tables.items():
+        rows = 0 if table is None else len(table)
+        print(f"  - {name}: {rows:,} rows")
+    print(f"  ✓ Saved to: {GOLD_DIR}")
+
+    return tables
+
+
 # ============================================
 # MAIN PIPELINE
 # ============================================
 
-def run_pipeline():
+def run_pipeline(csv_engine='pandas', resume=False, cache=False, workers=1, sql_sink=None,
+                 memory_budget=None, shadow=None, shadow_sample=10_000):
     """
     Run the complete data pipeline.
 
     This orchestrates all data processing stages and
     produces a summary report.
+
+    Completed stages are recorded in a run journal under CHECKPOINT_DIR.
+    If a run fails, resume=True skips the stages that finished and
+    continues chunked stages from their last completed chunk.
+
+    Args:
+        csv_engine (str): CSV reader used for circulation data
+        resume (bool): Continue the previous run if it did not finish
+        cache (bool): Reuse cleaning step results stored in CACHE_DIR
+        workers (int): Worker processes for the row-wise cleaning steps
+        sql_sink (str, optional): SQLite or DuckDB file the silver tables
+            are also loaded into
+        memory_budget (str, optional): Memory the chunked stages should fit
+            in, e.g. '2GB' or 'auto'. Chunk sizes and workers are planned
+            from a sample of each source and saved in the run report.
+        shadow (str, optional): Engine to compare with the reference
+            cleaning functions before the run, e.g. 'vectorized'
+        shadow_sample (int, optional): Rows the shadow comparison uses,
+            None for every row
     """
+    global SQL_SINK
+    SQL_SINK = sql_sink
     print("\n" + "=" * 60)
     print("  LIBRARY DATA PIPELINE")
     print("  Starting pipeline execution...")
@@ -273,13 +899,66 @@ def run_pipeline():
     # Track pipeline metrics
     start_time = datetime.now()
     results = {}
+    journal = start_run(str(CHECKPOINT_DIR), inputs=BRONZE_FILES,
+                        options={'csv_engine': csv_engine, 'memory_budget': memory_budget,
+                                 'shadow': shadow, 'shadow_sample': shadow_sample,
+                                 'sql_sink': sql_sink},
+                        resume=resume)
+    # The features' as-of date is kept in the journal, so a resumed run
+    # started on a later day still produces the same output
+    as_of = journal.setdefault('as_of', start_time.strftime('%Y-%m-%d'))
+    cache_dir = CACHE_DIR if cache else None
+    bronze_plan = resource_plan(journal, 'snapshot_changes', BRONZE_FILES['circulation'],
+                                memory_budget, dtype=str)
+    if bronze_plan is not None and workers > 1:
+        from src.data_processing.resources import plan_workers
+
+        dataset_bytes = bronze_plan['bytes_per_row'] * (bronze_plan['estimated_rows'] or 0)
+        journal['resources'].setdefault('circulation', {
+            'requested_workers': workers,
+            'dataset_bytes': dataset_bytes,
+            'workers': plan_workers(dataset_bytes, memory_budget, workers),
+        })
+        workers = journal['resources']['circulation']['workers']
+
+    def silver_plan(name, **read_kwargs):
+        return resource_plan(journal, name, SILVER_DIR / 'circulation_clean.csv',
+                             memory_budget, **read_kwargs)
 
     try:
         # Process each data source
-        results['circulation'] = process_circulation_data()
-        results['events'] = process_events_data()
-        results['catalogue'] = process_catalogue_data()
-        results['feedback'] = process_feedback_data()
+        run_stage(journal, 'branches', save_branch_dictionary)
+        if shadow is not None:
+            shadow_summary = run_stage(journal, 'shadow', process_shadow_checks, shadow,
+                                       sample_rows=shadow_sample)
+        changes = run_stage(journal, 'snapshot_changes', process_snapshot_changes,
+                            plan=bronze_plan, journal=journal)
+        results['circulation'] = run_stage(journal, 'circulation', process_circulation_data,
+                                           csv_engine=csv_engine, cache_dir=cache_dir,
+                                           workers=workers)
+        results.update(run_stage(journal, 'events', process_events_data))
+        results['catalogue'] = run_stage(journal, 'catalogue', process_catalogue_data,
+                                         cache_dir=cache_dir)
+        results['feedback'] = run_stage(journal, 'feedback', process_feedback_data)
+        feedback_analysis = run_stage(journal, 'feedback_analytics',
+                                      process_feedback_analytics, results)
+        quality_report = run_stage(journal, 'quality', process_quality_checks, results)
+        integrity_report = run_stage(journal, 'integrity', process_integrity_checks, results,
+                                     plan=silver_plan('integrity', columns=['isbn'],
+                                                      dtype={'isbn': str}))
+        near_duplicates = run_stage(journal, 'near_duplicates', process_near_duplicates, results)
+        enrichment_stats = run_stage(journal, 'enrichment', process_enrichment, results,
+                                     journal=journal,
+                                     plan=silver_plan('enrichment',
+                                                      dtype=CIRCULATION_SILVER_DTYPES))
+        features = run_stage(journal, 'circulation_features', process_circulation_features,
+                             journal=journal, as_of=as_of,
+                             plan=silver_plan('circulation_features',
+                                              dtype=CIRCULATION_SILVER_DTYPES))
+        neighbours = run_stage(journal, 'recommendations', process_recommendations, results)
+        gold_tables = run_stage(journal, 'gold', process_gold_data, results, as_of=as_of)
+        finish_run(journal)
+        run_report = save_run_report(journal, start_time, memory_budget)
 
         # Calculate pipeline statistics
         end_time = datetime.now()
@@ -289,8 +968,29 @@ def run_pipeline():
         print_section_header("PIPELINE SUMMARY")
         print("\n✓ Pipeline completed successfully!")
         print(f"  - Duration: {duration:.2f} seconds")
-        print(f"  - Files processed: {len(results)}")
+        print(f"  - Files processed: {sum(name in results for name in BRONZE_FILES)}")
         print(f"  - Output directory: {SILVER_DIR}")
+        print(f"  - Gold tables updated: {len(gold_tables)}")
+        for name, counts in changes.items():
+            print(f"  - {name.capitalize()} changes: {counts['inserts']:,} new, "
+                  f"{counts['updates']:,} updated, {counts['deletes']:,} deleted")
+        print(f"  - Quality rule violations: {quality_report['violations'].sum():,}")
+        print(f"  - Orphaned references: {integrity_report['orphan_rows'].sum():,}")
+        print(f"  - Near-duplicate catalogue records: {len(near_duplicates):,}")
+        print(f"  - Negative feedback comments: "
+              f"{(feedback_analysis['comments']['label'] == 'negative').sum():,}")
+        print(f"  - Catalogue join hit rate: {enrichment_stats['hit_rate']:.1%}")
+        print(f"  - Item neighbour pairs: {len(neighbours):,}")
+        print(f"  - Days of open-loan history: {len(features['open_loans']):,}")
+        if shadow is not None:
+            print(f"  - Shadow mismatches ({shadow}): "
+                  f"{shadow_summary['mismatched_cells'].sum():,} cells, "
+                  f"{shadow_summary['error'].notna().sum():,} failed checks")
+        for name, plan in journal.get('resources', {}).items():
+            if 'chunksize' in plan:
+                print(f"  - {name} chunks: {plan['chunksize']:,} rows "
+                      f"({plan['bytes_per_row']:,} bytes/row)")
+        print(f"  - Run report: {run_report}")
 
         print("\nCleaned files created:")
         for file in SILVER_DIR.glob("*.csv"):
@@ -309,9 +1009,120 @@ def run_pipeline():
         print(f"\n❌ Pipeline failed with error: {str(e)}")
         print("  - Check your data files exist")
         print("  - Check your functions are working")
+        print("  - Fix the problem and rerun with --resume to continue from the last checkpoint")
         raise
 
 
+# ============================================
+# COMMAND LINE
+# ============================================
+
+def watch_bronze(interval=1.0, concurrency=2, csv_engine='pandas', cache=False, workers=1,
+                 memory_budget=None):
+    """
+    Process bronze files as they land, until interrupted.
+
+    Only the stage of the file that changed runs, e.g. a new
+    circulation_data.csv refreshes circulation_clean.csv.
+
+    Args:
+        interval (float): Seconds between scans of the bronze directory
+        concurrency (int): Files processed at the same time
+        csv_engine, cache, workers, memory_budget: As for run_pipeline(),
+            applied to every file processed
+    """
+    from src.data_processing.watch import watch
+
+    cache_dir = CACHE_DIR if cache else None
+
+    def circulation_workers(path):
+        if memory_budget is None or workers <= 1:
+            return workers
+        from src.data_processing.resources import plan_workers, sample_source
+
+        sample = sample_source(path, dtype=str)
+        dataset_bytes = sample['bytes_per_row'] * (sample['estimated_rows'] or 0)
+        return plan_workers(dataset_bytes, memory_budget, workers)
+
+    handlers = {
+        BRONZE_FILES['circulation'].name: lambda path: process_circulation_data(
+            csv_engine=csv_engine, cache_dir=cache_dir, workers=circulation_workers(path),
+            filepath=path),
+        BRONZE_FILES['events'].name: lambda path: process_events_data(filepath=path),
+        BRONZE_FILES['catalogue'].name: lambda path: process_catalogue_data(
+            cache_dir=cache_dir, filepath=path),
+        BRONZE_FILES['feedback'].name: lambda path: process_feedback_data(filepath=path),
+    }
+    print_section_header("WATCHING BRONZE FILES")
+    print(f"  - Directory: {BRONZE_DIR}")
+    print(f"  - Metrics:   {REPORTS_DIR / 'watch_metrics.json'}")
+    print("  - Press Ctrl+C to stop")
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    return watch(str(BRONZE_DIR), handlers, interval=interval, workers=concurrency,
+                 metrics_path=str(REPORTS_DIR / 'watch_metrics.json'))
+
+
+def dry_run():
+    """Show the stages and their input files without loading any data."""
+    print_section_header("DRY RUN")
+    for name, filepath in BRONZE_FILES.items():
+        if filepath.exists():
+            status = f"{filepath.stat().st_size:,} bytes"
+        else:
+            status = "MISSING"
+        print(f"  - {name:<12} {filepath} ({status})")
+    print(f"\n  Silver output: {SILVER_DIR}")
+    print(f"  Gold output:   {GOLD_DIR}")
+    print(f"  Reports:       {REPORTS_DIR}")
+    return all(filepath.exists() for filepath in BRONZE_FILES.values())
+
+
+def main(argv=None):
+    """Parse command line arguments and run the pipeline."""
+    parser = argparse.ArgumentParser(description='Run the library data pipeline.')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='List stages and input files without processing them')
+    parser.add_argument('--csv-engine', choices=['pandas', 'pyarrow'], default='pandas',
+                        help='CSV reader for circulation data (pyarrow parses on all cores)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue a failed run from its last checkpoint')
+    parser.add_argument('--cache', action='store_true',
+                        help=f'Reuse unchanged cleaning step results cached in {CACHE_DIR}')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for row-wise cleaning of circulation data')
+    parser.add_argument('--sql-sink', metavar='PATH',
+                        help='Also load silver tables into this SQLite (.sqlite) '
+                             'or DuckDB (.duckdb) file')
+    parser.add_argument('--memory-budget', metavar='SIZE',
+                        help="Fit chunk sizes and workers to this much memory, e.g. 2GB, "
+                             "or 'auto' for half of the available memory")
+    parser.add_argument('--shadow', choices=['vectorized', 'polars', 'dask', 'workers'],
+                        help='Compare this engine with the reference cleaning functions '
+                             'and report mismatches and speedup')
+    parser.add_argument('--shadow-sample', type=int, default=10_000,
+                        help='Rows the shadow comparison uses (0 for every row, e.g. in CI)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and process bronze files as they land')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='Seconds between bronze directory scans in watch mode')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.dry_run:
+        return dry_run()
+    if args.watch:
+        global SQL_SINK
+        SQL_SINK = args.sql_sink
+        return watch_bronze(interval=args.poll_interval, csv_engine=args.csv_engine,
+                            cache=args.cache, workers=args.workers,
+                            memory_budget=args.memory_budget)
+    return run_pipeline(csv_engine=args.csv_engine, resume=args.resume, cache=args.cache,
+                        workers=args.workers, sql_sink=args.sql_sink,
+                        memory_budget=args.memory_budget, shadow=args.shadow,
+                        shadow_sample=args.shadow_sample or None)
+
+
 # ============================================
 # SCRIPT ENTRY POINT
 # ============================================
@@ -320,4 +1131,4 @@ if __name__ == "__main__":
     """
     This runs when you execute: python -m src.data_processing.run_pipeline
     """
-    results = run_pipeline()
+    results = main()
@@ -0,0 +1,258 @@
+"""
+Shadow-run faster engines against the reference cleaning functions.
+
+Before a faster path replaces one of the reference functions, both are
+run on the same rows and their outputs are compared cell by cell, so any
+drift in the silver data shows up as a list of mismatching values rather
+than as a surprise downstream. Each comparison reports the mismatches
+with a few examples and how much faster the engine was.
+
+Engines of each function (see ENGINES):
+
+    vectorized  whole-column versions of the per-value functions:
+                format_dates_series() and validate_isbn_series()
+    polars      the Polars backend of backends.py (optional dependency)
+    dask        the Dask backend of backends.py (optional dependency)
+    workers     map_partitions() worker processes (needs pyarrow)
+
+Every function is called as func(df, column) and returns a DataFrame or
+Series. A value the reference function raises on counts as a mismatch,
+with the error as its expected value. Missing values (None, NaN, NaT)
+are equal to each other; dtypes are not compared, only values.
+
+In production, compare on a random sample of rows; in CI, pass sample=None
+to compare every row.
+"""
+
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.data_processing.backends import to_backend, to_pandas
+from src.data_processing.cleaning import (
+    format_dates,
+    format_dates_series,
+    standardise_isbn,
+    standardize_dates
+)
+from src.data_processing.validation import validate_isbn, validate_isbn_series
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ROWS = 10_000
+MAX_EXAMPLES = 5
+
+
+def _map_values(func, values):
+    """values.map(func), with the error in place of a value func raises on."""
+    def call(value):
+        try:
+            return func(value)
+        except Exception as e:
+            return f'<{type(e).__name__}: {e}>'
+    return values.map(call)
+
+
+def _format_dates(df, column):
+    return _map_values(format_dates, df[column])
+
+
+def _validate_isbn(df, column):
+    return _map_values(validate_isbn, df[column])
+
+
+def _format_dates_vectorized(df, column):
+    return format_dates_series(df[column])
+
+
+def _validate_isbn_vectorized(df, column):
+    return validate_isbn_series(df[column])
+
+
+def _on_backend(func, backend):
+    def run(df, column, **kwargs):
+        return to_pandas(func(to_backend(df, backend), column, **kwargs))
+    return run
+
+
+def _on_workers(func):
+    def run(df, column, **kwargs):
+        from src.data_processing.shared import map_partitions
+
+        return map_partitions(func, df, column, workers=os.cpu_count(), **kwargs)
+    return run
+
+
+# Reference implementation of each function
+REFERENCE = {
+    'format_dates': _format_dates,
+    'validate_isbn': _validate_isbn,
+    'standardise_isbn': standardise_isbn,
+    'standardize_dates': standardize_dates,
+}
+
+# Faster engines that can stand in for each function
+ENGINES = {
+    'format_dates': {'vectorized': _format_dates_vectorized},
+    'validate_isbn': {'vectorized': _validate_isbn_vectorized},
+    'standardise_isbn': {'polars': _on_backend(standardise_isbn, 'polars'),
+                         'dask': _on_backend(standardise_isbn, 'dask'),
+                         'workers': _on_workers(standardise_isbn)},
+    'standardize_dates': {'polars': _on_backend(standardize_dates, 'polars'),
+                          'dask': _on_backend(standardize_dates, 'dask'),
+                          'workers': _on_workers(standardize_dates)},
+}
+
+
+def sample_rows(df, sample=SAMPLE_ROWS, seed=0):
+    """Random rows of df in their original order: a row count, a fraction, or None for all."""
+    if sample is None or (isinstance(sample, int) and sample >= len(df)):
+        return df
+    if isinstance(sample, float):
+        return df.sample(frac=sample, random_state=seed).sort_index()
+    return df.sample(n=sample, random_state=seed).sort_index()
+
+
+def _as_frame(output, index, columns):
+    """Output as a DataFrame on the given index; an unnamed Series takes columns[0]."""
+    if isinstance(output, pd.Series):
+        output = output.to_frame(output.name if output.name is not None else columns[0])
+    return output.set_axis(index, axis=0)
+
+
+def compare_outputs(expected, actual):
+    """Mask of the cells where two outputs differ.
+
+    Args:
+        expected (pd.DataFrame or pd.Series): Reference output
+        actual (pd.DataFrame or pd.Series): Engine output, same rows
+
+    Returns:
+        pd.DataFrame: True where the values differ, with the columns of
+            expected. A column missing from actual differs in every row.
+    """
+    if len(expected) != len(actual):
+        raise ValueError(f'Engine returned {len(actual)} rows, reference {len(expected)}')
+    expected = _as_frame(expected, expected.index, [0])
+    actual = _as_frame(actual, expected.index, expected.columns)
+
+    missing = object()
+    mask = {}
+    for col in expected.columns:
+        if col not in actual.columns:
+            mask[col] = np.ones(len(expected), dtype=bool)
+            continue
+        left = expected[col].astype(object).to_numpy()
+        right = actual[col].astype(object).to_numpy()
+        left = np.where(pd.isna(left), missing, left)
+        right = np.where(pd.isna(right), missing, right)
+        mask[col] = ~np.asarray(left == right, dtype=bool)
+    return pd.DataFrame(mask, index=expected.index)
+
+
+def _examples(df, expected, actual, differs, max_examples):
+    """The first mismatching cells with the input, expected and actual values."""
+    expected = _as_frame(expected, df.index, [0])
+    actual = _as_frame(actual, df.index, expected.columns)
+    examples = []
+    rows, cols = np.nonzero(differs.to_numpy())
+    for row, col in zip(rows[:max_examples], cols[:max_examples]):
+        name = differs.columns[col]
+        examples.append({
+            'row': df.index[row],
+            'column': name,
+            'input': df[name].iloc[row] if name in df.columns else None,
+            'expected': expected[name].iloc[row],
+            'actual': actual[name].iloc[row] if name in actual.columns else None,
+        })
+    return examples
+
+
+def _timed(func, df, column, **kwargs):
+    started = time.perf_counter()
+    result = func(df, column, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def shadow_compare(df, function, engine, column, sample=SAMPLE_ROWS, seed=0,
+                   max_examples=MAX_EXAMPLES, **kwargs):
+    """Run a function's reference and a faster engine on the same rows and compare.
+
+    Args:
+        df (pd.DataFrame): Input data
+        function (str): Function name, a key of REFERENCE
+        engine (str): Engine name, a key of ENGINES[function]
+        column (str or list): Column(s) the function works on
+        sample (int, float or None): Rows to compare, a fraction of the
+            rows, or None for every row
+        seed (int): Random seed of the sample
+        max_examples (int): Mismatching cells to report in full
+        **kwargs: Passed to both implementations, e.g. keep_datetime=True
+
+    Returns:
+        dict: function, engine, column, rows, mismatched_rows,
+            mismatched_cells, examples, reference_seconds, engine_seconds,
+            speedup and error (set if the engine failed or is not installed)
+
+    Example:
+        >>> result = shadow_compare(df, 'format_dates', 'vectorized', 'checkout_date',
+        ...                         sample=None)
+        >>> result['mismatched_cells'], result['speedup']
+    """
+    if function not in REFERENCE:
+        raise ValueError(f'Unknown function: {function}')
+    if engine not in ENGINES[function]:
+        raise ValueError(f"No {engine} engine for {function}, choose from "
+                         f"{', '.join(ENGINES[function])}")
+    rows = sample_rows(df, sample, seed)
+    result = {'function': function, 'engine': engine, 'column': column, 'rows': len(rows),
+              'mismatched_rows': 0, 'mismatched_cells': 0, 'examples': [],
+              'reference_seconds': None, 'engine_seconds': None, 'speedup': None,
+              'error': None}
+
+    expected, result['reference_seconds'] = _timed(REFERENCE[function], rows, column, **kwargs)
+    if expected is None:
+        # The reference cleaning functions log their error and return None
+        result['error'] = f'reference {function} failed, see the log'
+        logger.warning(f'Reference {function} failed on {column}, nothing to compare')
+        return result
+    try:
+        actual, result['engine_seconds'] = _timed(ENGINES[function][engine], rows, column,
+                                                  **kwargs)
+        actual = to_pandas(actual)
+        differs = compare_outputs(expected, actual)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+        logger.warning(f'{engine} engine of {function} failed: {result["error"]}')
+        return result
+
+    result['mismatched_rows'] = int(differs.any(axis=1).sum())
+    result['mismatched_cells'] = int(differs.to_numpy().sum())
+    result['examples'] = _examples(rows, expected, actual, differs, max_examples)
+    if result['engine_seconds']:
+        result['speedup'] = result['reference_seconds'] / result['engine_seconds']
+
+    message = (f"Shadow {function}[{column}] on {engine}: {result['mismatched_cells']} "
+               f"mismatched cells in {result['rows']} rows, {result['speedup'] or 0:.1f}x faster")
+    if result['mismatched_cells']:
+        logger.warning(message)
+    else:
+        logger.info(message)
+    return result
+
+
+def shadow_report(results):
+    """Summary and mismatch example tables of several shadow_compare() results.
+
+    Returns:
+        tuple: (summary DataFrame with one row per comparison, examples
+            DataFrame with one row per reported mismatching cell)
+    """
+    summary = pd.DataFrame([{key: value for key, value in result.items() if key != 'examples'}
+                            for result in results])
+    examples = pd.DataFrame([{'function': result['function'], 'engine': result['engine'],
+                              **example} for result in results for example in result['examples']],
+                            columns=['function', 'engine', 'row', 'column', 'input', 'expected',
+                                     'actual'])
+    return summary, examples
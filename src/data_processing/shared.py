@@ -0,0 +1,219 @@
+"""
+Share parsed datasets between worker processes without pickling them.
+
+publish() writes a DataFrame once as an uncompressed Arrow IPC file and
+returns a small handle (path and row count). Any process can attach() to
+the handle: the file is memory-mapped, so the Arrow buffers are read
+straight from the page cache that all processes share instead of being
+copied into each one. With arrow_dtypes=True the attached DataFrame uses
+pd.ArrowDtype columns that point at those buffers, i.e. no copy at all.
+
+map_partitions() runs a cleaning function over row ranges of a published
+dataset in a process pool. Only handles cross the process boundary: each
+worker attaches to its own slice, and publishes its result the same way
+for the parent to attach to. All files are removed when the call ends.
+
+The function must work row by row (e.g. standardise_isbn,
+standardize_dates), since each worker only sees its own partition.
+Results go through Arrow, so object columns come back as Arrow stores
+them: a missing value in a column of Python dates is None, not NaT.
+
+For very large data, pass a directory on tmpfs (e.g. /dev/shm) to keep the
+files in memory; note that containers often cap /dev/shm at 64 MB.
+"""
+
+import functools
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = 'library-pipeline-'
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError('Shared memory workers require pyarrow: pip install pyarrow')
+    return pa
+
+
+def publish(df, directory=None, preserve_index=False):
+    """Write a DataFrame to a memory-mappable Arrow IPC file.
+
+    Args:
+        df (pd.DataFrame or pa.Table): Dataset to share
+        directory (str, optional): Where to write it, defaults to the
+            system temp directory
+        preserve_index (bool): Store the DataFrame index as well
+
+    Returns:
+        dict: Handle with 'path' and 'rows', cheap to pass to other processes
+
+    Example:
+        >>> handle = publish(df_circulation)
+        >>> chunk = attach(handle, 0, 100_000)
+        >>> release(handle)
+    """
+    pa = _pyarrow()
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(
+        df, preserve_index=preserve_index)
+    directory = directory or tempfile.gettempdir()
+    path = os.path.join(directory, f'{FILE_PREFIX}{uuid.uuid4().hex}.arrow')
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return {'path': path, 'rows': table.num_rows}
+
+
+def attach_table(handle, start=None, stop=None, columns=None):
+    """Memory-map a published dataset as an Arrow table (no copy)."""
+    pa = _pyarrow()
+    source = pa.memory_map(handle['path'], 'r')
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    start = start or 0
+    stop = table.num_rows if stop is None else min(stop, table.num_rows)
+    return table.slice(start, stop - start)
+
+
+def attach(handle, start=None, stop=None, columns=None, arrow_dtypes=True):
+    """Attach to a published dataset, or to rows start:stop of it.
+
+    Args:
+        handle (dict): From publish()
+        start (int, optional): First row
+        stop (int, optional): Row after the last one
+        columns (list, optional): Only these columns
+        arrow_dtypes (bool): Return pd.ArrowDtype columns backed by the
+            memory-mapped buffers. If False the columns are converted to
+            the usual pandas dtypes, which copies them into this process.
+
+    Returns:
+        pd.DataFrame: The rows. Unless the index was published, rows are
+            labelled by their position in the whole dataset.
+    """
+    table = attach_table(handle, start, stop, columns)
+    df = table.to_pandas(types_mapper=pd.ArrowDtype if arrow_dtypes else None)
+    if not table.schema.pandas_metadata or not any(
+            isinstance(name, str) for name in table.schema.pandas_metadata['index_columns']):
+        df.index = pd.RangeIndex(start or 0, (start or 0) + len(df))
+    return df
+
+
+def release(handle):
+    """Delete a published dataset's file.
+
+    Processes still attached keep their mapping until they drop it.
+    """
+    try:
+        os.remove(handle['path'])
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def shared_dataset(df, directory=None):
+    """Publish df for the duration of a with block.
+
+    Example:
+        >>> with shared_dataset(df) as handle:
+        ...     result = map_partitions(standardise_isbn, handle, column='isbn')
+    """
+    handle = publish(df, directory)
+    try:
+        yield handle
+    finally:
+        release(handle)
+
+
+def _run_partition(func, handle, start, stop, arrow_dtypes, directory, args, kwargs):
+    """Worker: attach to one partition, apply func and publish the result."""
+    part = attach(handle, start, stop, arrow_dtypes=arrow_dtypes)
+    result = func(part, *args, **kwargs)
+    if result is None:
+        raise ValueError(f'{func.__name__} returned None for rows {start}:{stop}')
+    return publish(result, directory, preserve_index=True)
+
+
+def map_partitions(func, data, *args, workers=None, partitions=None, arrow_dtypes=False,
+                   directory=None, **kwargs):
+    """Apply a row-wise cleaning function to partitions in worker processes.
+
+    Args:
+        func (callable): Module-level function taking a DataFrame first
+        data (pd.DataFrame or dict): DataFrame, or a handle from publish()
+        *args: Passed to func
+        workers (int, optional): Worker processes, defaults to the CPU count
+        partitions (int, optional): Row ranges to split into, defaults to
+            workers
+        arrow_dtypes (bool): Give func pd.ArrowDtype columns read straight
+            from shared memory instead of converting each partition to
+            the usual pandas dtypes
+        directory (str, optional): Where the shared files are written
+        **kwargs: Passed to func
+
+    Returns:
+        pd.DataFrame: The partition results in row order
+
+    Example:
+        >>> df = map_partitions(standardize_dates, df, ['checkout_date', 'return_date'],
+        ...                     workers=4)
+    """
+    pa = _pyarrow()
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers
+    owned = not isinstance(data, dict)
+    handle = publish(data, directory, preserve_index=True) if owned else data
+
+    rows = handle['rows']
+    bounds = [rows * i // partitions for i in range(partitions + 1)]
+    ranges = [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_partition, func, handle, start, stop, arrow_dtypes,
+                                   directory, args, kwargs) for start, stop in ranges]
+            errors = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+        logger.info(f'Ran {func.__name__} on {rows} rows in {len(ranges)} partitions')
+        tables = [attach_table(result) for result in results]
+        if not tables:
+            return attach(handle, arrow_dtypes=arrow_dtypes)
+        table = pa.concat_tables(tables, promote_options='permissive')
+        return table.to_pandas(types_mapper=pd.ArrowDtype if arrow_dtypes else None)
+    finally:
+        for result in results:
+            release(result)
+        if owned:
+            release(handle)
+
+
+def parallel(func, workers=None, **options):
+    """Wrap a row-wise cleaning function so every call uses map_partitions().
+
+    Raises:
+        ImportError: If pyarrow is missing, so callers fail before any work
+
+    Example:
+        >>> standardize_dates = parallel(standardize_dates, workers=4)
+        >>> df = standardize_dates(df, ['checkout_date', 'return_date'])
+    """
+    _pyarrow()
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        return map_partitions(func, df, *args, workers=workers, **options, **kwargs)
+    return wrapper
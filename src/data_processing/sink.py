@@ -0,0 +1,229 @@
+"""
+Embedded SQL sink for silver data.
+
+Each cleaned DataFrame can be loaded into a table of a local SQLite file
+(standard library) or DuckDB file (optional: pip install duckdb), so
+tools can query silver data with SQL instead of re-parsing the CSVs.
+
+A load runs in one transaction. SQLite gets batched executemany()
+inserts; DuckDB scans the DataFrame directly through its Arrow/pandas
+integration. Tables with a primary key (see PRIMARY_KEYS) are upserted,
+so an incremental load only replaces the rows it brings; tables without
+one are replaced as a whole. A full copy of a table (replace=True) also
+replaces it, so rows removed upstream disappear from the database too.
+Lookup columns (isbn, member_id, branch_id
+and dates) are indexed.
+
+Dates are stored as ISO 'YYYY-MM-DD' text in SQLite, matching the CSVs.
+
+Example:
+    >>> write_table(df_circulation, 'circulation_clean', 'data/silver/library.sqlite')
+    >>> query('SELECT branch_id, COUNT(*) AS loans FROM circulation_clean '
+    ...       'GROUP BY branch_id', 'data/silver/library.sqlite')
+"""
+
+import logging
+import os
+import sqlite3
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = 'data/silver/library.sqlite'
+BATCH_SIZE = 50_000
+
+# Primary key of each silver table, used to upsert incremental loads
+PRIMARY_KEYS = {
+    'circulation_clean': ['transaction_id'],
+    'catalogue_clean': ['ISBN'],
+    'events_clean': ['event_id'],
+    'event_attendance': ['event_key'],
+    'age_bands': ['age_band_key'],
+    'event_age_bands': ['event_key', 'age_band_key'],
+    'feedback_summary': ['branch', 'rating'],
+    'feedback_sentiment': ['feedback_id'],
+    'branches': ['branch_key'],
+}
+
+# Columns indexed wherever they appear
+INDEX_COLUMNS = ['isbn', 'ISBN', 'member_id', 'branch_id', 'branch_key', 'checkout_date',
+                 'return_date', 'date', 'Acquisition Date']
+
+
+def _engine(path, engine=None):
+    if engine is None:
+        engine = 'duckdb' if str(path).endswith(('.duckdb', '.ddb')) else 'sqlite'
+    if engine not in ('sqlite', 'duckdb'):
+        raise ValueError(f'Unknown engine: {engine}')
+    return engine
+
+
+def connect(path=DEFAULT_PATH, engine=None):
+    """Open the sink database, 'duckdb' for .duckdb files and 'sqlite' otherwise."""
+    engine = _engine(path, engine)
+    os.makedirs(os.path.dirname(str(path)) or '.', exist_ok=True)
+    if engine == 'duckdb':
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("engine='duckdb' requires duckdb: pip install duckdb")
+        return duckdb.connect(str(path))
+    conn = sqlite3.connect(str(path))
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sqlite_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _sqlite_values(df):
+    """Copy of df with Python values SQLite can bind: ISO dates and None for missing."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            values = df[col]
+            has_time = (values.dropna() != values.dropna().dt.normalize()).any()
+            df[col] = values.dt.strftime('%Y-%m-%d %H:%M:%S' if has_time else '%Y-%m-%d')
+        elif df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v.isoformat() if hasattr(v, 'isoformat') else v)
+    df = df.astype(object)
+    return df.where(df.notna(), None)
+
+
+def _create_indexes(conn, table, columns, key):
+    for col in columns:
+        if col in INDEX_COLUMNS and [col] != key:
+            name = _quote(f'idx_{table}_{col}'.replace(' ', '_'))
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({_quote(col)})')
+
+
+def _write_sqlite(conn, df, table, key, batch_size, replace):
+    existing = [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(table)})')]
+    columns = list(df.columns)
+    cols = ', '.join(_quote(col) for col in columns)
+
+    with conn:
+        if not existing:
+            definition = [f'{_quote(col)} {_sqlite_type(df[col].dtype)}' for col in columns]
+            if key:
+                definition.append(f"PRIMARY KEY ({', '.join(_quote(col) for col in key)})")
+            conn.execute(f"CREATE TABLE {_quote(table)} ({', '.join(definition)})")
+        else:
+            for col in columns:
+                if col not in existing:
+                    conn.execute(f'ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)} '
+                                 f'{_sqlite_type(df[col].dtype)}')
+            if replace or not key:
+                conn.execute(f'DELETE FROM {_quote(table)}')
+
+        insert = f"INSERT INTO {_quote(table)} ({cols}) VALUES ({', '.join('?' * len(columns))})"
+        updates = [col for col in columns if col not in key]
+        if key and updates:
+            insert += (f" ON CONFLICT ({', '.join(_quote(col) for col in key)}) DO UPDATE SET "
+                       + ', '.join(f'{_quote(col)} = excluded.{_quote(col)}' for col in updates))
+        elif key:
+            insert += ' ON CONFLICT DO NOTHING'
+        for start in range(0, len(df), batch_size):
+            batch = _sqlite_values(df.iloc[start:start + batch_size])
+            conn.executemany(insert, batch.itertuples(index=False, name=None))
+        _create_indexes(conn, table, columns, key)
+
+
+def _write_duckdb(conn, df, table, key, replace):
+    columns = list(df.columns)
+    cols = ', '.join(_quote(col) for col in columns)
+    conn.register('incoming', df)
+    try:
+        conn.execute('BEGIN TRANSACTION')
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {_quote(table)} AS '
+                     f'SELECT {cols} FROM incoming LIMIT 0')
+        existing = [row[0] for row in conn.execute(f'DESCRIBE {_quote(table)}').fetchall()]
+        for col in columns:
+            if col not in existing:
+                kind = conn.execute(f'SELECT typeof({_quote(col)}) FROM incoming '
+                                    'LIMIT 1').fetchone()
+                conn.execute(f'ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)} '
+                             f"{kind[0] if kind else 'VARCHAR'}")
+        # Delete and re-insert rather than ON CONFLICT, which DuckDB does not
+        # allow on tables created without a declared key
+        if key and not replace:
+            match = ' AND '.join(f'{_quote(table)}.{_quote(col)} = incoming.{_quote(col)}'
+                                 for col in key)
+            conn.execute(f'DELETE FROM {_quote(table)} WHERE EXISTS '
+                         f'(SELECT 1 FROM incoming WHERE {match})')
+        else:
+            conn.execute(f'DELETE FROM {_quote(table)}')
+        conn.execute(f'INSERT INTO {_quote(table)} ({cols}) SELECT {cols} FROM incoming')
+        _create_indexes(conn, table, columns, key)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.unregister('incoming')
+
+
+def write_table(df, table, path=DEFAULT_PATH, key=None, engine=None, batch_size=BATCH_SIZE,
+                replace=False):
+    """Bulk-load a DataFrame into a table of the sink database.
+
+    Args:
+        df (pd.DataFrame): Cleaned data
+        table (str): Table name, e.g. 'circulation_clean'
+        path (str): SQLite or DuckDB file
+        key (list, optional): Primary key columns, defaults to
+            PRIMARY_KEYS[table]. Without a key the table is replaced.
+        engine (str, optional): 'sqlite' or 'duckdb', from the extension
+            if not given
+        batch_size (int): Rows per executemany() batch for SQLite
+        replace (bool): df is the whole table, so rows missing from it are
+            deleted in the same transaction. Leave False for incremental
+            loads, which are upserted on the key.
+
+    Returns:
+        int: Rows loaded
+
+    Example:
+        >>> write_table(df_catalogue, 'catalogue_clean', replace=True)
+    """
+    engine = _engine(path, engine)
+    key = list(key if key is not None else PRIMARY_KEYS.get(table, []))
+    missing = [col for col in key if col not in df.columns]
+    if missing:
+        raise ValueError(f'Key columns {missing} not found in {table}')
+    if key:
+        # Within one load, the last row of a key wins
+        df = df.drop_duplicates(subset=key, keep='last')
+
+    conn = connect(path, engine)
+    try:
+        if engine == 'duckdb':
+            _write_duckdb(conn, df, table, key, replace)
+        else:
+            _write_sqlite(conn, df, table, key, batch_size, replace)
+    finally:
+        conn.close()
+    logger.info(f'Loaded {len(df)} rows into {table} ({engine}: {path})')
+    return len(df)
+
+
+def query(sql, path=DEFAULT_PATH, params=None, engine=None):
+    """Run a SQL query against the sink database and return a DataFrame."""
+    engine = _engine(path, engine)
+    conn = connect(path, engine)
+    try:
+        if engine == 'duckdb':
+            return conn.execute(sql, params or []).df()
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
@@ -0,0 +1,221 @@
+"""
+Batch text analytics for feedback comments.
+
+All comments of a batch are joined and tokenised with one regex pass into
+a long (document, token) table. Tokens are factorized into term ids, which
+gives a sparse document x term count matrix. Keyword
+frequencies, per-branch top terms and lexicon sentiment are then sparse
+matrix products and reductions, so no Python code runs per comment.
+"""
+
+import logging
+import re
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = r"[a-z]+(?:'[a-z]+)?"
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'i', 'in', 'is', 'it',
+    'my', 'of', 'on', 'or', 'so', 'the', 'this', 'to', 'was', 'were', 'with', 'you',
+])
+
+# Word -> sentiment weight
+SENTIMENT_LEXICON = {
+    'love': 1.0, 'great': 1.0, 'excellent': 1.0, 'wonderful': 1.0, 'impressed': 1.0,
+    'enjoy': 1.0, 'helpful': 1.0, 'appreciate': 1.0, 'thank': 1.0, 'good': 0.5,
+    'better': 0.5, 'happy': 1.0,
+    'terrible': -1.0, 'frustrating': -1.0, 'disappointed': -1.0, 'unacceptable': -1.0,
+    'broken': -1.0, 'unavailable': -0.5, 'overcrowded': -0.5, 'limited': -0.5,
+    'down': -0.5, 'improvement': -0.5, 'fix': -0.5,
+}
+
+# Words that flip the sentiment of the next token
+NEGATIONS = frozenset(['not', 'no', 'never', "isn't", "wasn't", "don't"])
+
+_FEEDBACK_ENTRY = re.compile(
+    r"Feedback #(\d+) - (\S+) - ([A-Za-z\s]+ Branch) ~ (\d)⭐[^\n]*\n?(.*?)(?=\n---|\nFeedback #|\Z)",
+    re.DOTALL)
+
+
+def parse_feedback(content):
+    """Parse the raw feedback text into one row per feedback entry.
+
+    Args:
+        content (str): Contents of feedback.txt
+
+    Returns:
+        pd.DataFrame: feedback_id, date, branch, rating and comment
+    """
+    df = pd.DataFrame(_FEEDBACK_ENTRY.findall(content),
+                      columns=['feedback_id', 'date', 'branch', 'rating', 'comment'])
+    df['feedback_id'] = df['feedback_id'].astype(int)
+    df['rating'] = df['rating'].astype(int)
+    df['comment'] = df['comment'].str.strip()
+    return df
+
+
+def tokenize(comments, stop_words=STOP_WORDS):
+    """Split comments into a long table of tokens.
+
+    The comments are joined into one newline-separated text and scanned
+    with a single regex pass; newlines mark where a comment ends. Stop
+    words and negations are looked up once per distinct token.
+
+    Args:
+        comments (pd.Series): Comment text
+        stop_words (set): Tokens dropped from the result
+
+    Returns:
+        pd.DataFrame: doc (position of the comment), token (categorical)
+            and negated (whether the previous token is a negation), in
+            text order
+    """
+    comments = pd.Series(comments).reset_index(drop=True).fillna('').astype(str)
+    text = '\n'.join(comments.str.replace('\n', ' ', regex=False)).lower()
+    found = np.array(re.findall(f'{TOKEN_PATTERN}|\n', text), dtype=object)
+    codes, uniques = pd.factorize(found)
+    uniques = pd.Index(uniques)
+
+    breaks = (uniques == '\n')[codes]
+    docs = np.cumsum(breaks)
+    is_negation = uniques.isin(NEGATIONS)[codes]
+    negated = np.r_[False, is_negation[:-1]]
+    keep = ~uniques.isin(stop_words | NEGATIONS | {'\n'})
+
+    # Renumber the kept distinct tokens 0..k-1
+    renumber = np.full(len(uniques), -1)
+    renumber[keep] = np.arange(keep.sum())
+    mask = keep[codes]
+    token = pd.Categorical.from_codes(renumber[codes[mask]], categories=uniques[keep])
+    return pd.DataFrame({'doc': docs[mask], 'token': token, 'negated': negated[mask]})
+
+
+def term_document_matrix(tokens, n_docs):
+    """Build a sparse document x term count matrix from tokenize() output.
+
+    Args:
+        tokens (pd.DataFrame): Result of tokenize()
+        n_docs (int): Number of comments
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of shape (n_docs, n_terms), pd.Index
+            of terms in column order)
+    """
+    term_ids, vocabulary = pd.factorize(tokens['token'].astype(object), sort=True)
+    matrix = sparse.coo_matrix(
+        (np.ones(len(term_ids), dtype=np.int32), (tokens['doc'].to_numpy(), term_ids)),
+        shape=(n_docs, len(vocabulary)),
+    ).tocsr()
+    matrix.sum_duplicates()
+    return matrix, pd.Index(vocabulary, name='term')
+
+
+def keyword_frequencies(matrix, vocabulary):
+    """Total and document frequency of each term, most frequent first."""
+    frequencies = pd.DataFrame({
+        'term': vocabulary,
+        'count': np.asarray(matrix.sum(axis=0)).ravel(),
+        'documents': np.diff(matrix.tocsc().indptr),
+    })
+    return frequencies.sort_values(['count', 'term'], ascending=[False, True],
+                                   ignore_index=True)
+
+
+def top_terms_by_group(matrix, vocabulary, groups, n=5):
+    """Most frequent terms within each group of documents.
+
+    Args:
+        matrix (scipy.sparse matrix): Document x term counts
+        vocabulary (pd.Index): Terms in column order
+        groups (pd.Series): Group label of each document, e.g. branch
+        n (int): Terms kept per group
+
+    Returns:
+        pd.DataFrame: group, rank, term and count
+    """
+    codes, labels = pd.factorize(pd.Series(groups).reset_index(drop=True), sort=True)
+    valid = codes >= 0
+    # Group indicator matrix: (groups x docs) @ (docs x terms) -> groups x terms
+    indicator = sparse.csr_matrix(
+        (np.ones(valid.sum(), dtype=np.int32), (codes[valid], np.flatnonzero(valid))),
+        shape=(len(labels), matrix.shape[0]),
+    )
+    counts = (indicator @ matrix).toarray()
+
+    n = min(n, counts.shape[1])
+    # Stable sort on descending counts keeps ties in alphabetical term order
+    top = np.argsort(-counts, axis=1, kind='stable')[:, :n]
+    rows = np.repeat(np.arange(len(labels)), n)
+    result = pd.DataFrame({
+        'group': np.asarray(labels)[rows],
+        'rank': np.tile(np.arange(1, n + 1), len(labels)),
+        'term': vocabulary.to_numpy()[top.ravel()],
+        'count': counts[rows, top.ravel()],
+    })
+    return result[result['count'] > 0].reset_index(drop=True)
+
+
+def sentiment_scores(tokens, n_docs, lexicon=None):
+    """Lexicon sentiment per comment.
+
+    A token after a negation ('not happy') counts with the opposite sign.
+    The score is the summed weight divided by the number of tokens.
+
+    Args:
+        tokens (pd.DataFrame): Result of tokenize()
+        n_docs (int): Number of comments
+        lexicon (dict, optional): Word -> weight, defaults to SENTIMENT_LEXICON
+
+    Returns:
+        pd.DataFrame: sentiment (score) and label (positive, negative or
+            neutral) per comment
+    """
+    lexicon = SENTIMENT_LEXICON if lexicon is None else lexicon
+    token = tokens['token'].astype('category')
+    weights = token.cat.categories.map(lexicon).to_numpy(dtype=float, na_value=0.0)
+    weights = weights[token.cat.codes.to_numpy()]
+    weights = np.where(tokens['negated'].to_numpy(), -weights, weights)
+    docs = tokens['doc'].to_numpy()
+
+    totals = np.bincount(docs, weights=weights, minlength=n_docs)
+    lengths = np.bincount(docs, minlength=n_docs)
+    scores = totals / np.maximum(lengths, 1)
+    labels = np.select([scores > 0, scores < 0], ['positive', 'negative'], 'neutral')
+    return pd.DataFrame({'sentiment': scores, 'label': labels})
+
+
+def analyse_feedback(feedback, text='comment', group='branch', top_n=5, lexicon=None):
+    """Run all feedback analytics on one batch of comments.
+
+    Args:
+        feedback (pd.DataFrame): Feedback rows, e.g. from parse_feedback()
+        text (str): Comment column
+        group (str): Column to compute top terms for
+        top_n (int): Top terms kept per group
+        lexicon (dict, optional): Sentiment lexicon
+
+    Returns:
+        dict: 'comments' (feedback with sentiment and label), 'keywords'
+            (keyword_frequencies()) and 'top_terms' (top_terms_by_group())
+
+    Example:
+        >>> feedback = parse_feedback(open('data/feedback.txt').read())
+        >>> analysis = analyse_feedback(feedback)
+        >>> analysis['top_terms'].query('rank == 1')
+    """
+    feedback = feedback.reset_index(drop=True)
+    tokens = tokenize(feedback[text])
+    matrix, vocabulary = term_document_matrix(tokens, len(feedback))
+    logger.info(f'{matrix.nnz:,} term entries over {len(feedback):,} comments '
+                f'and {len(vocabulary):,} terms')
+
+    comments = pd.concat([feedback, sentiment_scores(tokens, len(feedback), lexicon)], axis=1)
+    return {
+        'comments': comments,
+        'keywords': keyword_frequencies(matrix, vocabulary),
+        'top_terms': top_terms_by_group(matrix, vocabulary, feedback[group], n=top_n),
+    }
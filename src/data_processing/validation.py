@@ -26,4 +26,20 @@ def validate_isbn(isbn):
     if not isbn.isdigit():
         return False
 
-    return True
\ No newline at end of file
+    return True
+
+def validate_isbn_series(values):
+    """Vectorized validate_isbn() over a whole column.
+
+    Gives the same result as values.map(validate_isbn) but with pandas
+    string methods instead of a Python call per value.
+
+    Args:
+        values (pd.Series): ISBN values
+
+    Returns:
+        pd.Series: Boolean Series, same index as values
+    """
+    text = values.astype(str).str.replace('-', '', regex=False)
+    valid = (text.str.len() == 13) & text.str.isdigit()
+    return valid.fillna(False).astype(bool)
@@ -0,0 +1,203 @@
+"""
+Watch the bronze directory and process files as they land.
+
+Each handler is registered under a filename pattern, e.g.
+'circulation_data.csv' -> process_circulation_data. The directory is
+scanned for the size and modification time of matching files; a file
+whose signature differs from the one last processed is pending, and it
+is dispatched once its signature has stayed the same for `settle`
+seconds, so a file that is still being copied is not read half-written.
+
+With inotify_simple installed (Linux), the watcher sleeps until the
+kernel reports a write, move or delete in the directory; otherwise it
+polls every `interval` seconds. Either way the same debounce applies.
+
+Handlers run in a thread pool. A file that changes again while its
+handler is running is queued once more after that run finishes, so the
+same file is never processed twice at the same time.
+
+Metrics (queue depth, files in flight, per-file latency from first
+detection to finished processing) are kept in a dict and, if
+metrics_path is given, written there as JSON after every change.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.data_processing.checkpoint import atomic_write
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0
+SETTLE_SECONDS = 2.0
+WORKERS = 2
+
+
+def match_handler(filename, handlers):
+    """Pattern of the first handler whose pattern matches filename, or None."""
+    for pattern in handlers:
+        if fnmatch.fnmatch(filename, pattern):
+            return pattern
+    return None
+
+
+def scan(directory, handlers):
+    """Signatures of the files in directory that have a handler."""
+    signatures = {}
+    for entry in os.scandir(directory):
+        if entry.is_file() and match_handler(entry.name, handlers) is not None:
+            stat = entry.stat()
+            signatures[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+def _open_inotify(directory):
+    """An inotify watch on directory, or None to fall back to polling."""
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return None
+    inotify = INotify()
+    inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MODIFY | flags.MOVED_TO
+                      | flags.CREATE | flags.DELETE)
+    return inotify
+
+
+def _new_metrics():
+    return {'mode': None, 'queue_depth': 0, 'in_flight': 0, 'processed': 0, 'failed': 0,
+            'latency_seconds': {'count': 0, 'mean': 0.0, 'max': 0.0}, 'files': {}}
+
+
+def _record_latency(metrics, latency):
+    stats = metrics['latency_seconds']
+    stats['count'] += 1
+    stats['mean'] += (latency - stats['mean']) / stats['count']
+    stats['max'] = max(stats['max'], latency)
+
+
+def _write_metrics(metrics, metrics_path):
+    with atomic_write(metrics_path) as file:
+        json.dump(metrics, file, indent=2)
+
+
+def watch(directory, handlers, interval=POLL_INTERVAL, settle=SETTLE_SECONDS,
+          workers=WORKERS, metrics_path=None, process_existing=False, stop_event=None):
+    """Dispatch each new or changed file to its handler until stopped.
+
+    Args:
+        directory (str): Directory to watch, e.g. the bronze directory
+        handlers (dict): Filename pattern -> callable taking the file path
+        interval (float): Seconds between scans when polling, and the
+            longest wait between scans with inotify
+        settle (float): Seconds a file must stay unchanged before it is
+            processed
+        workers (int): Handlers that may run at the same time
+        metrics_path (str, optional): JSON file the metrics are written to
+        process_existing (bool): Also process the files already there at
+            start, instead of only later changes
+        stop_event (threading.Event, optional): Set to stop watching;
+            otherwise runs until interrupted
+
+    Returns:
+        dict: The final metrics
+
+    Example:
+        >>> watch('data', {'circulation_data.csv*': process_circulation_data},
+        ...       metrics_path='data/reports/watch_metrics.json')
+    """
+    stop_event = stop_event or threading.Event()
+    metrics = _new_metrics()
+    lock = threading.Lock()
+    known = {} if process_existing else scan(directory, handlers)
+    pending = {}
+    running = {}
+
+    inotify = _open_inotify(directory)
+    metrics['mode'] = 'inotify' if inotify is not None else 'polling'
+    logger.info(f"Watching {directory} ({metrics['mode']}) for {', '.join(handlers)}")
+
+    def run(path, pattern, detected):
+        with lock:
+            metrics['queue_depth'] -= 1
+            metrics['in_flight'] += 1
+        started = time.time()
+        status = 'ok'
+        try:
+            handlers[pattern](path)
+        except Exception as e:
+            status = f'failed: {e}'
+            logger.exception(f'Processing {path} failed')
+        finished = time.time()
+        with lock:
+            metrics['in_flight'] -= 1
+            metrics['processed' if status == 'ok' else 'failed'] += 1
+            _record_latency(metrics, finished - detected)
+            metrics['files'][path] = {
+                'handler': pattern,
+                'status': status,
+                'detected': datetime.fromtimestamp(detected).isoformat(timespec='seconds'),
+                'wait_seconds': round(started - detected, 3),
+                'processing_seconds': round(finished - started, 3),
+                'latency_seconds': round(finished - detected, 3),
+            }
+        logger.info(f'Processed {os.path.basename(path)} in {finished - started:.2f}s '
+                    f'({finished - detected:.2f}s after it was detected)')
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    written = None
+    try:
+        while not stop_event.is_set():
+            now = time.monotonic()
+            current = scan(directory, handlers)
+            for path in (set(known) | set(pending)) - set(current):
+                known.pop(path, None)
+                pending.pop(path, None)
+            for path, signature in current.items():
+                if signature == known.get(path):
+                    continue
+                entry = pending.get(path)
+                if entry is None:
+                    pending[path] = {'signature': signature, 'changed': now,
+                                     'detected': time.time()}
+                elif entry['signature'] != signature:
+                    entry.update(signature=signature, changed=now)
+
+            for path, future in list(running.items()):
+                if future.done():
+                    del running[path]
+            for path, entry in list(pending.items()):
+                if path in running or now - entry['changed'] < settle:
+                    continue
+                pattern = match_handler(os.path.basename(path), handlers)
+                with lock:
+                    metrics['queue_depth'] += 1
+                running[path] = pool.submit(run, path, pattern, entry['detected'])
+                known[path] = entry['signature']
+                del pending[path]
+
+            with lock:
+                snapshot = json.dumps(metrics, sort_keys=True)
+            if metrics_path is not None and snapshot != written:
+                _write_metrics(json.loads(snapshot), metrics_path)
+                written = snapshot
+
+            # Rescan sooner while a file is settling
+            timeout = min(interval, settle / 4) if pending else interval
+            if inotify is not None:
+                inotify.read(timeout=int(timeout * 1000))
+            else:
+                stop_event.wait(timeout)
+    except KeyboardInterrupt:
+        logger.info('Stopping watch')
+    finally:
+        pool.shutdown(wait=True)
+        if inotify is not None:
+            inotify.close()
+        if metrics_path is not None:
+            _write_metrics(metrics, metrics_path)
+    return metrics
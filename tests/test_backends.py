@@ -0,0 +1,89 @@
+"""
+Run the cleaning functions on every backend and compare with pandas.
+"""
+
+import pytest
+import pandas as pd
+import pandas.testing as pdt
+from src.data_processing.backends import get_backend, to_backend, to_pandas
+from src.data_processing.cleaning import (
+    remove_duplicates,
+    handle_missing_values,
+    standardize_dates,
+    standardise_isbn
+)
+
+def available_backends():
+    backends = [pytest.param('pandas')]
+    # Converting to and from pandas goes through pyarrow for both backends
+    for name, modules in [('dask', ['dask.dataframe', 'pyarrow']),
+                          ('polars', ['polars', 'pyarrow'])]:
+        try:
+            for module in modules:
+                __import__(module)
+            backends.append(pytest.param(name))
+        except ImportError:
+            backends.append(pytest.param(name, marks=pytest.mark.skip(reason=f'{module} not installed')))
+    return backends
+
+@pytest.fixture(params=available_backends())
+def backend(request):
+    return request.param
+
+@pytest.fixture
+def sample_circulation():
+    return pd.DataFrame({
+        'transaction_id': ['TXN1', 'TXN2', 'TXN2', 'TXN3', 'TXN4', 'TXN5'],
+        'member_id': ['M1', 'M2', 'M2', 'M1', 'M2', 'M1'],
+        'isbn': ['978-0-43-321819-7', '978-1-02-654235-4', '978-1-02-654235-4',
+                 '9780338908384', '978-0-43-321819-7', '978-1-02-654235-4'],
+        'checkout_date': ['2024-08-17', '17/08/2024', '17/08/2024', '2024_08_19', '08-20-2024', '2024-08-21'],
+        'value': [1.0, None, None, None, 4.0, 5.0]
+    })
+
+def run(func, df, backend, **kwargs):
+    frame = to_backend(df, backend, npartitions=2)
+    result = func(frame, **kwargs)
+    assert get_backend(result) == backend
+    return to_pandas(result)
+
+def normalise(df, sort_by=None):
+    """Make frames from different backends comparable."""
+    df = df.reset_index(drop=True)
+    if sort_by:
+        df = df.sort_values(sort_by, ignore_index=True)
+    return df.astype(object).where(df.notna(), None)
+
+def test_remove_duplicates_backend(sample_circulation, backend):
+    expected = remove_duplicates(sample_circulation, subset=['transaction_id'])
+    result = run(remove_duplicates, sample_circulation, backend, subset=['transaction_id'])
+    pdt.assert_frame_equal(normalise(result, 'transaction_id'), normalise(expected, 'transaction_id'))
+
+def test_standardise_isbn_backend(sample_circulation, backend):
+    expected = standardise_isbn(sample_circulation, 'isbn')
+    result = run(standardise_isbn, sample_circulation, backend, column='isbn')
+    assert result['isbn'].tolist() == expected['isbn'].tolist()
+
+def test_standardise_isbn_missing_column_backend(sample_circulation, backend):
+    with pytest.raises(ValueError):
+        run(standardise_isbn, sample_circulation, backend, column='missing')
+
+def test_standardize_dates_backend(sample_circulation, backend):
+    expected = standardize_dates(sample_circulation, ['checkout_date'])
+    result = run(standardize_dates, sample_circulation, backend, date_columns=['checkout_date'])
+    # Polars dates come back to pandas as datetime64, so compare calendar dates
+    assert pd.to_datetime(result['checkout_date']).dt.date.tolist() == expected['checkout_date'].tolist()
+
+@pytest.mark.parametrize('strategy', ['drop', 'forward_fill', 'backward_fill'])
+def test_handle_missing_values_backend(sample_circulation, backend, strategy):
+    expected = handle_missing_values(sample_circulation, strategy=strategy, columns=['value'])
+    result = run(handle_missing_values, sample_circulation, backend, strategy=strategy, columns=['value'])
+    pdt.assert_frame_equal(normalise(result), normalise(expected))
+
+@pytest.mark.parametrize('strategy', ['forward_fill', 'median', 'mode', 'interpolate'])
+def test_handle_missing_values_grouped_backend(sample_circulation, backend, strategy):
+    df = sample_circulation.drop_duplicates('transaction_id')
+    kwargs = dict(strategy=strategy, columns=['value'], group_by='member_id', order_by='checkout_date')
+    expected = handle_missing_values(df, **kwargs)
+    result = run(handle_missing_values, df, backend, **kwargs)
+    pdt.assert_frame_equal(normalise(result, 'transaction_id'), normalise(expected, 'transaction_id'))
@@ -0,0 +1,53 @@
+import pandas as pd
+from src.data_processing.branches import (
+    add_branch_key,
+    build_branch_index,
+    load_branch_aliases,
+    normalise_branch,
+    resolve_branches
+)
+
+def test_normalise_branch():
+    assert normalise_branch(' br12 ') == 'BR012'
+    assert normalise_branch('Plaistow Branch') == 'plaistow'
+    assert normalise_branch('Manor  Park!') == 'manor park'
+
+def test_sources_share_one_key():
+    keys = resolve_branches(['Plaistow', 'Plaistow Branch', ' plaistow branch', 'Plaistw Branch'])
+    assert keys.nunique() == 1
+    assert keys.dtype == 'Int16'
+
+def test_ids_resolve_exactly():
+    index = build_branch_index()
+    keys = resolve_branches(['  BR012 ', 'BR012', 'BR099'], index=index)
+    dictionary = index['dictionary'].set_index('branch_key')['branch']
+    assert dictionary[keys[0]] == 'BR012'
+    assert keys[1] == keys[0]
+    assert pd.isna(keys[2])
+
+def test_unknown_and_missing_values():
+    keys = resolve_branches(['Nowhere', None, 'Stratford'])
+    assert keys.isna().tolist() == [True, True, False]
+
+def test_aliases_override_fuzzy_match():
+    index = build_branch_index(names=['Stratford', 'East Ham'], ids=['BR001'],
+                               aliases={'Stratford Library': 'BR001'})
+    keys = resolve_branches(['Stratford Library', 'Stratford'], index=index)
+    assert keys.tolist() == [3, 1]
+
+def test_aliased_ids_share_the_name_key(tmp_path):
+    filepath = tmp_path / 'branch_aliases.csv'
+    filepath.write_text('alias,branch\nBR006,Plaistow\n')
+    index = build_branch_index(aliases=load_branch_aliases(str(filepath)))
+    keys = resolve_branches([' BR006 ', 'Plaistow Branch', 'BR007'], index=index)
+    assert keys[0] == keys[1]
+    assert keys[2] != keys[0]
+    assert 'BR006' not in index['dictionary']['branch'].tolist()
+    assert 'BR006' not in index['unmapped_ids'] and 'BR007' in index['unmapped_ids']
+
+def test_add_branch_key_keeps_raw_column():
+    df = pd.DataFrame({'branch': ['East Ham', 'East Ham Branch']})
+    result = add_branch_key(df, 'branch')
+    assert result['branch'].tolist() == df['branch'].tolist()
+    assert result['branch_key'].nunique() == 1
+    assert 'branch_key' not in df.columns
@@ -0,0 +1,70 @@
+import functools
+import os
+import pandas as pd
+import pytest
+from src.data_processing.cache import (
+    cache_size,
+    cached_call,
+    code_version,
+    evict,
+    frame_hash,
+    memoize
+)
+from src.data_processing.cleaning import remove_duplicates
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'id': ['T1', 'T1', 'T2'], 'value': [1.0, 1.0, None]})
+
+def counting(calls):
+    def step(df, column):
+        calls.append(column)
+        return df.dropna(subset=[column])
+    return step
+
+def test_frame_hash_tracks_values_and_dtypes(df):
+    assert frame_hash(df) == frame_hash(df.copy())
+    assert frame_hash(df) != frame_hash(df.astype({'value': 'float32'}))
+    changed = df.copy()
+    changed.loc[0, 'id'] = 'T3'
+    assert frame_hash(df) != frame_hash(changed)
+
+def test_cached_call_reuses_result(tmp_path, df):
+    pytest.importorskip('pyarrow')
+    calls = []
+    step = counting(calls)
+    first = cached_call(step, df, 'value', cache_dir=str(tmp_path))
+    second = cached_call(step, df, 'value', cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(first, second)
+    assert calls == ['value']
+
+    # New parameters or new input data are recomputed
+    cached_call(step, df, 'id', cache_dir=str(tmp_path))
+    cached_call(step, df.iloc[:2], 'value', cache_dir=str(tmp_path))
+    assert calls == ['value', 'id', 'value']
+
+def test_memoize_cleaning_step(tmp_path, df):
+    pytest.importorskip('pyarrow')
+    cached = memoize(remove_duplicates, cache_dir=str(tmp_path))
+    expected = remove_duplicates(df, subset=['id'])
+    pd.testing.assert_frame_equal(cached(df, subset=['id']), expected)
+    pd.testing.assert_frame_equal(cached(df, subset=['id']), expected)
+    assert len(os.listdir(tmp_path)) == 1
+
+def test_evict_least_recently_used(tmp_path, df):
+    pytest.importorskip('pyarrow')
+    step = counting([])
+    for column in ['id', 'value']:
+        cached_call(step, df, column, cache_dir=str(tmp_path))
+    first, second = sorted(tmp_path.iterdir(), key=lambda path: path.stat().st_mtime_ns)
+    os.utime(second, ns=(1, 1))  # least recently used
+
+    evict(str(tmp_path), max_bytes=cache_size(str(tmp_path)) - 1)
+    assert [path.name for path in tmp_path.iterdir()] == [first.name]
+
+def test_code_version_unwraps_decorators():
+    @functools.wraps(remove_duplicates)
+    def wrapper(df, *args, **kwargs):
+        return remove_duplicates(df, *args, **kwargs)
+    assert code_version(wrapper) == code_version(remove_duplicates)
+    assert code_version(wrapper) != code_version(counting)
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+from src.data_processing.cdc import diff_snapshot, row_hashes
+
+@pytest.fixture
+def snapshot():
+    return pd.DataFrame({
+        'transaction_id': ['T1', 'T2', 'T3', 'T3'],
+        'return_date': ['2024-01-10', None, '2024-01-12', '2024-02-01'],
+    })
+
+def test_row_hashes_ignore_column_order_and_types():
+    df = pd.DataFrame({'id': ['A', 'B'], 'year': [2020, 2021], 'copies': [1, 2]})
+    text = df[['id', 'copies', 'year']].astype(str)
+    assert (row_hashes(df, 'id')[1] == row_hashes(text, 'id')[1]).all()
+    with pytest.raises(ValueError, match='Key column'):
+        row_hashes(df, 'ISBN')
+
+def test_first_snapshot_is_all_inserts(tmp_path, snapshot):
+    changes, stats = diff_snapshot(snapshot, 'transaction_id', str(tmp_path / 'index.csv'))
+    assert changes['op'].tolist() == ['insert'] * 3
+    assert changes['return_date'].tolist()[2] == '2024-01-12'
+    assert stats['skipped'] == 1
+
+def test_diff_emits_inserts_updates_deletes(tmp_path, snapshot):
+    index = str(tmp_path / 'index.csv')
+    diff_snapshot(snapshot, 'transaction_id', index)
+
+    new = pd.DataFrame({
+        'transaction_id': ['T1', 'T2', 'T4'],
+        'return_date': ['2024-01-10', '2024-01-20', None],
+    })
+    output = tmp_path / 'changes.csv'
+    _, stats = diff_snapshot([new.iloc[:2], new.iloc[2:]], 'transaction_id', index,
+                             output_path=str(output))
+    changes = pd.read_csv(output)
+    assert changes[['op', 'transaction_id']].values.tolist() == [
+        ['update', 'T2'], ['insert', 'T4'], ['delete', 'T3']]
+    assert (stats['unchanged'], stats['deletes']) == (1, 1)
+
+    # The index now describes the new snapshot
+    changes, stats = diff_snapshot(new, 'transaction_id', index)
+    assert changes.empty
+    assert stats['unchanged'] == 3
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+from src.data_processing.checkpoint import (
+    atomic_write,
+    chunk_checkpoint,
+    finish_run,
+    run_stage,
+    stage_file,
+    start_run
+)
+from src.data_processing.features import compute_features
+
+@pytest.fixture
+def loans():
+    return pd.DataFrame({
+        'branch_id': ['BR001', 'BR002', 'BR001', 'BR003', 'BR002', 'BR001'],
+        'checkout_date': ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-03',
+                          '2024-01-05', '2024-01-06'],
+        'return_date': ['2024-01-04', None, '2024-01-10', '2024-01-04', None, '2024-01-07'],
+    })
+
+def test_atomic_write_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / 'out.csv'
+    path.write_text('old')
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as file:
+            file.write('partial')
+            raise RuntimeError('crash')
+    assert path.read_text() == 'old'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.csv']
+
+def test_resume_skips_completed_stages(tmp_path):
+    calls = []
+    def stage(value):
+        calls.append(value)
+        return value * 2
+
+    journal = start_run(str(tmp_path))
+    assert run_stage(journal, 'double', stage, 21) == 42
+
+    journal = start_run(str(tmp_path), resume=True)
+    assert run_stage(journal, 'double', stage, 21) == 42
+    assert calls == [21]
+
+    finish_run(journal)
+    journal = start_run(str(tmp_path), resume=True)
+    assert journal['stages'] == {}
+
+def test_changed_inputs_start_a_new_run(tmp_path):
+    source = tmp_path / 'input.csv'
+    source.write_text('a\n1\n')
+    checkpoints = str(tmp_path / 'checkpoints')
+    journal = start_run(checkpoints, inputs={'input': source})
+    run_stage(journal, 'stage', lambda: 1)
+
+    source.write_text('a\n1\n2\n')
+    journal = start_run(checkpoints, inputs={'input': source}, resume=True)
+    assert journal['stages'] == {}
+
+def test_staged_file_replaces_target_when_run_finishes(tmp_path):
+    target = tmp_path / 'index.csv'
+    target.write_text('old')
+    checkpoints = str(tmp_path / 'checkpoints')
+    journal = start_run(checkpoints)
+    with open(stage_file(journal, target), 'w') as file:
+        file.write('new')
+    assert target.read_text() == 'old'
+
+    # A failed run leaves the target alone; a resumed one commits it
+    journal = start_run(checkpoints, resume=True)
+    finish_run(journal)
+    assert target.read_text() == 'new'
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == ['index.csv']
+
+def test_chunked_stage_resumes_from_last_chunk(tmp_path, loans):
+    chunks = [loans.iloc[i:i + 2] for i in range(0, len(loans), 2)]
+    expected = compute_features(chunks, output_path=str(tmp_path / 'full.csv'))
+
+    output = str(tmp_path / 'features.csv')
+    journal = start_run(str(tmp_path / 'checkpoints'))
+    start, on_chunk = chunk_checkpoint(journal, 'features')
+
+    def fail_after_two(chunks, state, paths):
+        on_chunk(chunks, state, paths)
+        if chunks == 2:
+            # Simulate a crash after part of the next chunk was written
+            with open(output, 'a') as file:
+                file.write('BR999,partial')
+            raise RuntimeError('crash')
+
+    with pytest.raises(RuntimeError):
+        compute_features(chunks, output_path=output, on_chunk=fail_after_two)
+
+    journal = start_run(str(tmp_path / 'checkpoints'), resume=True)
+    start, on_chunk = chunk_checkpoint(journal, 'features')
+    assert start['chunks'] == 2
+    result = compute_features(chunks, output_path=output, start=start, on_chunk=on_chunk)
+
+    assert open(output).read() == open(tmp_path / 'full.csv').read()
+    pd.testing.assert_frame_equal(result['open_loans'], expected['open_loans'])
@@ -12,7 +12,9 @@ from src.data_processing.cleaning import (
     handle_missing_values,
     standardize_dates,
     standardise_isbn,
-    format_dates
+    format_dates,
+    format_dates_series,
+    impute_chunks
 )
 
 # ========================================
@@ -145,6 +147,12 @@ def test_standardize_dates(sample_df_with_dates):
     expected.date = expected.date.dt.date
     pdt.assert_frame_equal(result, expected)
 
+def test_standardize_dates_keep_datetime(sample_df_with_dates):
+    result = standardize_dates(sample_df_with_dates, date_columns='date', keep_datetime=True)
+    assert pd.api.types.is_datetime64_any_dtype(result['date'])
+    assert result['date'].dt.strftime('%Y-%m-%d').tolist() == [
+        '2025-10-01', '2025-11-01', '2025-12-01', '2026-01-01']
+
 def test_format_dates():
     samples = [
         '2025-01-16',
@@ -167,6 +175,15 @@ def test_format_dates():
     for sample in samples_incorrect:
         assert format_dates(sample) == sample
 
+def test_format_dates_series_matches_format_dates():
+    values = pd.Series(['2025/01/16', '16_01_2025', '01-16-2025', 'Unknown', None, 10,
+                        '16/01/2025'], index=list('abcdefg'))
+    result = format_dates_series(values)
+    assert result.index.tolist() == list('abcdefg')
+    assert result.tolist() == [format_dates(value) for value in values]
+    # format_dates raises on this one; the series version leaves it as it is
+    assert format_dates_series(pd.Series(['5-x-2024'])).tolist() == ['5-x-2024']
+
 # ========================================
 # TESTS FOR standardize_isbn()
 # ========================================
@@ -179,4 +196,70 @@ def test_standardise_isbn(sample_with_isbn):
 
     })
     pdt.assert_frame_equal(result, expected)
-    
\ No newline at end of file
+    
+# ========================================
+# TESTS FOR grouped imputation
+# ========================================
+
+@pytest.fixture
+def sample_df_grouped_missing():
+    """Loans of two members with gaps, not in date order."""
+    return pd.DataFrame({
+        'member_id': ['M1', 'M2', 'M1', 'M2', 'M1', 'M1'],
+        'date': ['2025-01-02', '2025-01-01', '2025-01-01', '2025-01-02', '2025-01-03', '2025-01-04'],
+        'branch_id': [None, 'BR002', 'BR001', None, None, 'BR003'],
+        'value': [None, 5.0, 1.0, None, 7.0, None]
+    })
+
+def test_handle_missing_forward_fill_grouped(sample_df_grouped_missing):
+    result = handle_missing_values(sample_df_grouped_missing, strategy='forward_fill',
+                                   group_by='member_id', order_by='date')
+    # Values never leak from M2 into M1, and row order is preserved
+    assert result['branch_id'].tolist() == ['BR001', 'BR002', 'BR001', 'BR002', 'BR001', 'BR003']
+    assert result['member_id'].tolist() == sample_df_grouped_missing['member_id'].tolist()
+
+def test_handle_missing_backward_fill_grouped(sample_df_grouped_missing):
+    result = handle_missing_values(sample_df_grouped_missing, strategy='backward_fill',
+                                   columns=['branch_id'], group_by='member_id', order_by='date')
+    assert result['branch_id'].iloc[[0, 1, 2, 4, 5]].tolist() == ['BR003', 'BR002', 'BR001', 'BR003', 'BR003']
+    assert pd.isna(result['branch_id'].iloc[3])
+
+def test_handle_missing_median_and_mode_grouped():
+    df = pd.DataFrame({
+        'branch_id': ['A', 'A', 'A', 'B', 'B'],
+        'value': [1.0, 3.0, None, 10.0, None],
+        'genre': ['x', 'x', None, 'y', None]
+    })
+    median = handle_missing_values(df, strategy='median', columns=['value'], group_by='branch_id')
+    assert median['value'].tolist() == [1.0, 3.0, 2.0, 10.0, 10.0]
+    mode = handle_missing_values(df, strategy='mode', columns=['genre'], group_by='branch_id')
+    assert mode['genre'].tolist() == ['x', 'x', 'x', 'y', 'y']
+
+def test_handle_missing_interpolate_grouped(sample_df_grouped_missing):
+    result = handle_missing_values(sample_df_grouped_missing, strategy='interpolate',
+                                   columns=['value'], group_by='member_id', order_by='date')
+    # M1 in date order: 1.0, NaN, 7.0, NaN -> 1.0, 4.0, 7.0, NaN (trailing gap kept)
+    assert result['value'].iloc[0] == 4.0
+    assert np.isnan(result['value'].iloc[5])
+    assert np.isnan(result['value'].iloc[3])
+
+def test_impute_chunks_matches_full_forward_fill(sample_df_grouped_missing):
+    df = sample_df_grouped_missing.sort_values('date', kind='mergesort')
+    expected = handle_missing_values(df, strategy='forward_fill', group_by='member_id')
+    chunks = [df.iloc[:2], df.iloc[2:3], df.iloc[3:]]
+    result = pd.concat(impute_chunks(chunks, strategy='forward_fill', group_by='member_id'))
+    pdt.assert_frame_equal(result, expected)
+
+def test_impute_chunks_rejects_whole_group_strategy():
+    with pytest.raises(ValueError, match="chunk by chunk"):
+        list(impute_chunks([pd.DataFrame({'a': [1]})], strategy='median'))
+
+def test_impute_chunks_keeps_untouched_dtypes():
+    df = pd.DataFrame({'member_id': ['M1', 'M1', 'M2', 'M1'],
+                       'quantity': [1, 2, 3, 4],
+                       'value': [1.0, np.nan, 2.0, np.nan]})
+    chunks = [df.iloc[:2], df.iloc[2:]]
+    result = pd.concat(impute_chunks(chunks, strategy='forward_fill', columns=['value'],
+                                     group_by='member_id'))
+    assert result['quantity'].dtype == np.int64
+    assert result['value'].tolist() == [1.0, 1.0, 2.0, 1.0]
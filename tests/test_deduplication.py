@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from src.data_processing.deduplication import (
+    find_near_duplicates,
+    lsh_candidate_pairs,
+    minhash_signatures,
+    normalise_text
+)
+
+def catalogue():
+    return pd.DataFrame({
+        'ISBN': ['1', '2', '3', '4', '5'],
+        'Title': ['The Great Gatsby', 'The Great Gatsbyy', 'the great gatsby!',
+                  'War and Peace', 'Moby Dick'],
+        'Author': ['F. Scott Fitzgerald', 'F Scott Fitzgerald', 'F. Scott Fitzgerald',
+                   'Leo Tolstoy', 'Herman Melville'],
+    })
+
+def test_normalise_text():
+    assert normalise_text(['  The Great-Gatsby! ', None]).tolist() == ['the great gatsby', '']
+
+def test_identical_texts_have_identical_signatures():
+    signatures = minhash_signatures(pd.Series(['moby dick', 'moby dick', 'war and peace']))
+    assert signatures.shape == (3, 64)
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[0] == signatures[2]).mean() < 0.5
+
+def test_blocking_separates_candidates():
+    signatures = np.zeros((3, 8), dtype=np.uint32)
+    pairs = lsh_candidate_pairs(signatures, blocks=['a', 'a', 'b'], bands=4)
+    assert pairs.tolist() == [[0, 1]]
+
+def test_find_near_duplicates_groups_typos():
+    groups = find_near_duplicates(catalogue())
+    assert sorted(groups['ISBN']) == ['1', '2', '3']
+    assert groups['cluster_id'].nunique() == 1
+    assert groups['similarity'].between(0.7, 1.0).all()
+
+def test_find_near_duplicates_none_found():
+    result = find_near_duplicates(catalogue().iloc[3:])
+    assert result.empty
+    assert {'cluster_id', 'similarity'} <= set(result.columns)
+
+def test_large_bucket_is_chained_not_skipped():
+    df = pd.DataFrame({'ISBN': [str(i) for i in range(60)],
+                       'Title': ['The Great Gatsby'] * 60,
+                       'Author': ['F. Scott Fitzgerald'] * 60})
+    signatures = minhash_signatures(normalise_text(df['Title']))
+    pairs = lsh_candidate_pairs(signatures, max_bucket_size=10)
+    assert pairs.tolist() == [[i, i + 1] for i in range(59)]
+
+    groups = find_near_duplicates(df)
+    assert len(groups) == 60
+    assert groups['cluster_id'].nunique() == 1
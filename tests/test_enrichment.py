@@ -0,0 +1,38 @@
+import pytest
+import pandas as pd
+from src.data_processing.enrichment import enrich_circulation
+
+@pytest.fixture
+def catalogue():
+    return pd.DataFrame({
+        'ISBN': ['9780433218197', '978-0-33-890838-4', '9780433218197'],
+        'Title': ['Book A', 'Book B', 'Book A duplicate'],
+        'Author': ['Ann', 'Bob', 'Ann'],
+        'Genre': ['Fiction', 'History', 'Fiction']
+    })
+
+@pytest.fixture
+def circulation():
+    return pd.DataFrame({
+        'transaction_id': ['TXN1', 'TXN2', 'TXN3', 'TXN4'],
+        'isbn': ['9780433218197', '9780338908384', '9781111111111', None],
+        'branch_id': ['BR001', 'BR002', 'BR001', 'BR002']
+    })
+
+def test_enrich_circulation_matches_merge(catalogue, circulation):
+    chunks = [circulation.iloc[:2], circulation.iloc[2:]]
+    result, stats = enrich_circulation(chunks, catalogue)
+
+    assert result['Title'].tolist()[:2] == ['Book A', 'Book B']
+    assert result['Title'].isna().tolist() == [False, False, True, True]
+    assert isinstance(result['Genre'].dtype, pd.CategoricalDtype)
+    assert stats == {'rows': 4, 'matched': 2, 'hit_rate': 0.5}
+
+def test_enrich_circulation_partitioned(tmp_path, catalogue, circulation):
+    chunks = [circulation.iloc[:2], circulation.iloc[2:]]
+    result, stats = enrich_circulation(chunks, catalogue, output_path=str(tmp_path),
+                                       partition_by='branch_id')
+    assert result is None
+    br001 = pd.read_csv(tmp_path / 'branch_id=BR001' / 'part.csv')
+    assert br001['transaction_id'].tolist() == ['TXN1', 'TXN3']
+    assert br001['Author'].tolist()[0] == 'Ann'
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+from src.data_processing.event_tables import age_band_attendance, normalise_events
+
+@pytest.fixture
+def records():
+    return [
+        {'event_id': 'EVT1', 'branch': 'Plaistow', 'date': '2025-01-01',
+         'attendance': {'registered': 10, 'actual': 12,
+                        'age_breakdown': {'0-5': 3, '18+': 9}},
+         'feedback_score': 4.0},
+        {'event_id': 'EVT2', 'branch': 'Beckton', 'date': '2025-01-02',
+         'attendance': {'registered': 5, 'age_breakdown': {'18+': 4, '6-12': None}}},
+        {'event_id': 'EVT3', 'branch': 'Beckton', 'date': '2025-01-03'},
+    ]
+
+def test_normalise_events_splits_tables(records):
+    tables = normalise_events(records)
+    assert tables['events']['event_key'].tolist() == [1, 2, 3]
+    assert tables['events']['event_key'].dtype == 'int32'
+    assert tables['age_bands']['age_band'].tolist() == ['0-5', '18+']
+    assert tables['event_age_bands'].values.tolist() == [[1, 1, 3], [1, 2, 9], [2, 2, 4]]
+
+def test_missing_nested_fields_keep_event(records):
+    tables = normalise_events(records)
+    assert pd.isna(tables['events'].loc[1, 'feedback_score'])
+    attendance = tables['attendance'].set_index('event_key')
+    assert attendance.index.tolist() == [1, 2]
+    assert pd.isna(attendance.loc[2, 'actual'])
+
+def test_age_band_attendance_long_form(records):
+    tables = normalise_events(records)
+    events = tables['events'][tables['events']['event_id'] != 'EVT1']
+    long = age_band_attendance(tables, events)
+    assert long[['event_id', 'branch', 'age_band', 'attendees']].values.tolist() == [
+        ['EVT2', 'Beckton', '18+', 4]]
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+from src.data_processing.features import (
+    compute_features,
+    daily_counts,
+    loan_features,
+    open_loans_per_day,
+    rolling_branch_volumes
+)
+
+@pytest.fixture
+def loans():
+    return pd.DataFrame({
+        'branch_id': ['BR001', 'BR001', 'BR002'],
+        'checkout_date': ['2024-01-01', '2024-01-03', '2024-01-02'],
+        'return_date': ['2024-01-30', '2024-01-04', None],
+    })
+
+def test_loan_features(loans):
+    result = loan_features(loans, loan_period_days=21, as_of='2024-02-01')
+    assert pd.api.types.is_datetime64_any_dtype(result['checkout_date'])
+    assert result['loan_days'].tolist()[:2] == [29, 1]
+    assert result['is_open'].tolist() == [False, False, True]
+    assert result['days_overdue'].tolist() == [8, 0, 9]
+    assert result['overdue'].tolist() == [True, False, True]
+
+def test_open_loans_are_not_overdue_without_as_of(loans):
+    result = loan_features(loans, loan_period_days=21)
+    assert not result.loc[2, 'overdue']
+
+def test_open_loans_per_day(loans):
+    daily = open_loans_per_day(daily_counts(loans)['loans'])
+    assert len(daily) == 30
+    assert daily['open_loans'].tolist()[:5] == [1, 2, 3, 2, 2]
+    assert daily['open_loans'].iloc[-1] == 1
+
+def test_rolling_branch_volumes(loans):
+    volumes = rolling_branch_volumes(daily_counts(loans)['branches'], window=2)
+    br001 = volumes[volumes['branch'] == 'BR001']
+    assert br001['checkouts'].tolist() == [1, 0, 1]
+    assert br001['rolling_checkouts'].tolist() == [1, 1, 1]
+    assert len(volumes) == 6
+
+def test_compute_features_chunks_match_single_frame(loans, tmp_path):
+    whole = compute_features(loans, as_of='2024-02-01')
+    output = tmp_path / 'features.csv'
+    chunked = compute_features(iter([loans.iloc[:1], loans.iloc[1:]]), output_path=str(output),
+                               as_of='2024-02-01')
+
+    assert chunked['loans'] is None
+    assert len(pd.read_csv(output)) == 3
+    pd.testing.assert_frame_equal(whole['open_loans'], chunked['open_loans'])
+    pd.testing.assert_frame_equal(whole['branch_volumes'], chunked['branch_volumes'])
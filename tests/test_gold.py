@@ -0,0 +1,126 @@
+import pytest
+import pandas as pd
+from src.data_processing.gold import (
+    aggregate_circulation,
+    aggregate_loan_durations,
+    aggregate_event_attendance,
+    merge_rollup,
+    update_gold,
+    load_gold_table
+)
+
+@pytest.fixture
+def sample_circulation():
+    return pd.DataFrame({
+        'transaction_id': ['TXN1', 'TXN2', 'TXN3'],
+        'isbn': ['9780433218197', '9780433218197', '9780338908384'],
+        'checkout_date': ['2024-08-17', '2024-08-17', '2024-08-18'],
+        'return_date': ['2024-08-25', '2024-09-30', None],
+        'branch_id': ['BR001', 'BR001', 'BR002']
+    })
+
+def test_aggregate_circulation(sample_circulation):
+    result = aggregate_circulation(sample_circulation)
+    assert len(result) == 2
+    assert result['loans'].sum() == 3
+    assert result.loc[result.branch_id == 'BR001', 'loans'].item() == 2
+
+def test_aggregate_loan_durations(sample_circulation):
+    result = aggregate_loan_durations(sample_circulation, loan_period_days=21)
+    br001 = result[result.branch_id == 'BR001'].iloc[0]
+    assert br001['returned_loans'] == 2
+    assert br001['total_loan_days'] == 8 + 44
+    assert br001['overdue_loans'] == 1
+    br002 = result[result.branch_id == 'BR002'].iloc[0]
+    assert br002['returned_loans'] == 0
+
+def test_aggregate_event_attendance():
+    events = pd.DataFrame({
+        'event_id': ['EVT1', 'EVT2'],
+        'branch': ['Plaistow', 'Plaistow'],
+        'attendance.age_breakdown.0-5': [9, 1],
+        'attendance.age_breakdown.18+': [16, 4]
+    })
+    result = aggregate_event_attendance(events)
+    assert set(result['age_band']) == {'0-5', '18+'}
+    assert result.loc[result.age_band == '18+', 'attendees'].item() == 20
+    assert (result['events'] == 2).all()
+
+def test_aggregate_event_attendance_long_form():
+    events = pd.DataFrame({
+        'event_id': ['EVT1', 'EVT1', 'EVT2'],
+        'branch': ['Plaistow'] * 3,
+        'age_band': ['0-5', '18+', '18+'],
+        'attendees': [9, 16, 4]
+    })
+    result = aggregate_event_attendance(events)
+    assert result.loc[result.age_band == '18+', 'attendees'].item() == 20
+    assert result.loc[result.age_band == '0-5', 'events'].item() == 1
+
+def test_update_gold_events_composite_key(tmp_path):
+    events = pd.DataFrame({
+        'event_id': ['EVT1', 'EVT1'],
+        'branch': ['Plaistow', 'Plaistow'],
+        'age_band': ['0-5', '18+'],
+        'attendees': [9, 16]
+    })
+    update_gold(events, 'events', gold_dir=tmp_path)
+    tables = update_gold(events, 'events', gold_dir=tmp_path)
+    assert tables['event_attendance']['attendees'].sum() == 25
+
+def test_merge_rollup_adds_measures():
+    existing = pd.DataFrame({'branch': ['A', 'B'], 'count': [1, 2]})
+    delta = pd.DataFrame({'branch': ['B', 'C'], 'count': [3, 4]})
+    result = merge_rollup(existing, delta, ['branch'])
+    assert result['count'].tolist() == [1, 5, 4]
+
+def test_update_gold_incremental(tmp_path, sample_circulation):
+    update_gold(sample_circulation.iloc[:2], 'circulation', gold_dir=tmp_path)
+    # Re-applying rows that were already rolled up must not double count
+    tables = update_gold(sample_circulation, 'circulation', gold_dir=tmp_path)
+
+    assert tables['circulation_daily']['loans'].sum() == 3
+    stored = load_gold_table('circulation_daily', gold_dir=tmp_path)
+    assert stored['loans'].sum() == 3
+    assert set(stored['isbn']) == {'9780433218197', '9780338908384'}
+
+def test_update_gold_unknown_dataset(tmp_path):
+    with pytest.raises(ValueError, match="Unknown dataset"):
+        update_gold(pd.DataFrame(), 'catalogue', gold_dir=tmp_path)
+
+def test_update_gold_replaces_changed_rows(tmp_path, sample_circulation):
+    update_gold(sample_circulation, 'circulation', gold_dir=tmp_path, as_of='2024-08-20')
+    # A later snapshot fills in the return date of the open loan
+    returned = sample_circulation.assign(return_date=['2024-08-25', '2024-09-30', '2024-09-28'])
+    tables = update_gold(returned, 'circulation', gold_dir=tmp_path, as_of='2024-10-01')
+
+    durations = tables['loan_durations'].set_index('branch_id')
+    assert durations.loc['BR002', 'returned_loans'] == 1
+    assert durations.loc['BR002', 'total_loan_days'] == 41
+    assert durations.loc['BR002', 'overdue_loans'] == 1
+    assert tables['loan_durations']['loans'].sum() == 3
+    assert tables['circulation_daily']['loans'].sum() == 3
+
+def test_update_gold_counts_open_loans_overdue(tmp_path, sample_circulation):
+    tables = update_gold(sample_circulation, 'circulation', gold_dir=tmp_path, as_of='2024-08-20')
+    assert tables['loan_durations']['overdue_loans'].sum() == 1
+    # The open loan passes its due date without any change to the row
+    tables = update_gold(sample_circulation, 'circulation', gold_dir=tmp_path, as_of='2024-10-01')
+    assert tables['loan_durations']['overdue_loans'].sum() == 2
+    assert tables['loan_durations']['loans'].sum() == 3
+
+def test_update_gold_finishes_interrupted_commit(tmp_path, sample_circulation, monkeypatch):
+    import src.data_processing.checkpoint as checkpoint
+    import src.data_processing.gold as gold
+
+    update_gold(sample_circulation.iloc[:2], 'circulation', gold_dir=tmp_path)
+    # Crash after the commit point, before the staged files are moved into place
+    monkeypatch.setattr(checkpoint, 'recover_files', lambda directory: None)
+    monkeypatch.setattr(gold, 'recover_files', lambda directory: None)
+    update_gold(sample_circulation, 'circulation', gold_dir=tmp_path)
+    monkeypatch.undo()
+    assert load_gold_table('circulation_daily', gold_dir=tmp_path)['loans'].sum() == 2
+
+    tables = update_gold(sample_circulation, 'circulation', gold_dir=tmp_path)
+    assert tables['circulation_daily']['loans'].sum() == 3
+    assert load_gold_table('circulation_daily', gold_dir=tmp_path)['loans'].sum() == 3
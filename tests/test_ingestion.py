@@ -1,7 +1,15 @@
 import pytest
 import pandas as pd
 from pathlib import Path
-from src.data_processing.ingestion import load_csv, load_json, load_excel, load_text
+from src.data_processing.ingestion import (
+    load_csv, load_json, load_excel, load_text, load_silver, detect_compression,
+    CIRCULATION_DTYPES
+)
+import bz2
+import gzip
+import lzma
+import shutil
+from src.data_processing.lookup import build_index
 
 # Test with actual sample files
 def test_load_csv_success():
@@ -25,6 +33,54 @@ def test_load_csv_exception():
     with pytest.raises(FileNotFoundError):
         load_csv('data/circulation_data_non_existent.csv', verify_fp=False)
 
+def test_load_csv_pyarrow_matches_pandas():
+    pytest.importorskip('pyarrow')
+    expected = load_csv('data/circulation_data.csv')
+    df = load_csv('data/circulation_data.csv', engine='pyarrow', dtype=CIRCULATION_DTYPES)
+
+    assert isinstance(df['isbn'].dtype, pd.ArrowDtype)
+    assert df.shape == expected.shape
+    assert df['transaction_id'].tolist() == expected['transaction_id'].tolist()
+    assert df['return_date'].isna().sum() == expected['return_date'].isna().sum()
+
+@pytest.mark.parametrize('engine', ['pandas', 'pyarrow'])
+def test_load_csv_python_dtypes(tmp_path, engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    filepath = tmp_path / 'loans.csv'
+    filepath.write_text('isbn,copies,fee,branch_key\n0123,2,1.5,3\n0456,1,,\n')
+    dtype = {'isbn': str, 'copies': int, 'fee': float, 'branch_key': 'Int16'}
+    df = load_csv(str(filepath), engine=engine, dtype=dtype)
+
+    assert df['isbn'].tolist() == ['0123', '0456']
+    assert df['copies'].tolist() == [2, 1]
+    assert df['fee'].isna().tolist() == [False, True]
+    assert df['branch_key'].isna().tolist() == [False, True]
+
+@pytest.mark.parametrize('engine', ['pandas', 'pyarrow'])
+def test_load_csv_chunked(engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    chunks = list(load_csv('data/circulation_data.csv', engine=engine, chunksize=1000,
+                           block_size=16384 if engine == 'pyarrow' else None))
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+    assert sum(len(chunk) for chunk in chunks) == len(load_csv('data/circulation_data.csv'))
+
+@pytest.mark.parametrize('engine', ['pandas', 'pyarrow'])
+def test_load_csv_empty(tmp_path, engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    header_only = tmp_path / 'header_only.csv'
+    header_only.write_text('transaction_id,isbn\n')
+    with pytest.raises(ValueError):
+        load_csv(str(header_only), engine=engine)
+    with pytest.raises(ValueError):
+        list(load_csv(str(header_only), engine=engine, chunksize=10))
+
+def test_load_csv_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        load_csv('data/circulation_data.csv', engine='spark')
+
 def test_load_json_success():
     """Test loading real JSON file."""
     df = load_json('data/events_data.json')
@@ -57,3 +113,95 @@ def test_load_text():
 
     df_missing_path = load_excel('data/catalogue_incorrect.txt')
     assert df_missing_path is None
+
+@pytest.mark.parametrize('engine', ['pandas', 'pyarrow'])
+def test_load_csv_columns_and_filters(engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    df = load_csv('data/circulation_data.csv', engine=engine, columns=['transaction_id', 'isbn'],
+                  filters={'branch_id': ['BR001', 'BR002']})
+    full = load_csv('data/circulation_data.csv')
+
+    assert df.columns.tolist() == ['transaction_id', 'isbn']
+    assert len(df) == full['branch_id'].isin(['BR001', 'BR002']).sum()
+
+def test_load_json_filters():
+    df = load_json('data/events_data.json', columns=['event_id', 'attendance.actual'],
+                   filters={'branch': 'Plaistow', 'attendance.actual': (20, None)})
+    full = load_json('data/events_data.json')
+    expected = full[(full['branch'] == 'Plaistow') & (full['attendance.actual'] >= 20)]
+
+    assert df.columns.tolist() == ['event_id', 'attendance.actual']
+    assert df['event_id'].tolist() == expected['event_id'].tolist()
+
+def test_load_excel_columns():
+    df = load_excel('data/catalogue.xlsx', columns=['ISBN', 'Title'])
+    assert df.columns.tolist() == ['ISBN', 'Title']
+
+@pytest.fixture
+def silver_dir(tmp_path):
+    df = pd.DataFrame({
+        'transaction_id': [f'TXN{i:03d}' for i in range(20)],
+        'isbn': ['0123456789012'] * 20,
+        'checkout_date': [f'2024-01-{i + 1:02d}' for i in range(20)],
+        'branch_id': ['BR001', 'BR002'] * 10
+    })
+    df.to_csv(tmp_path / 'circulation_clean.csv', index=False)
+    return tmp_path
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_load_silver_filters(silver_dir, indexed):
+    if indexed:
+        build_index(str(silver_dir / 'circulation_clean.csv'), row_group_size=5)
+    df = load_silver('circulation_clean', silver_dir=silver_dir, columns=['transaction_id', 'isbn'],
+                     filters={'checkout_date': ('2024-01-03', '2024-01-06'), 'branch_id': ['BR002']})
+
+    assert df['transaction_id'].tolist() == ['TXN003', 'TXN005']
+    # Id columns keep their leading zeros
+    assert df['isbn'].iloc[0] == '0123456789012'
+
+COMPRESSORS = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+def compress(source, target, suffix):
+    with open(source, 'rb') as src, COMPRESSORS[suffix](target, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    return str(target)
+
+@pytest.mark.parametrize('suffix', ['gz', 'bz2', 'xz'])
+def test_load_compressed(tmp_path, suffix):
+    expected_csv = load_csv('data/circulation_data.csv')
+    csv_path = compress('data/circulation_data.csv', tmp_path / f'circ.csv.{suffix}', suffix)
+    pd.testing.assert_frame_equal(load_csv(csv_path), expected_csv)
+    chunks = list(load_csv(csv_path, chunksize=1000))
+    assert sum(len(chunk) for chunk in chunks) == len(expected_csv)
+
+    json_path = compress('data/events_data.json', tmp_path / f'events.json.{suffix}', suffix)
+    assert len(load_json(json_path)) == len(load_json('data/events_data.json'))
+
+    text_path = compress('data/feedback.txt', tmp_path / f'feedback.txt.{suffix}', suffix)
+    assert load_text(text_path) == load_text('data/feedback.txt')
+
+def test_load_compressed_pyarrow(tmp_path):
+    pytest.importorskip('pyarrow')
+    csv_path = compress('data/circulation_data.csv', tmp_path / 'circ.csv.gz', 'gz')
+    df = load_csv(csv_path, engine='pyarrow', dtype=CIRCULATION_DTYPES)
+    assert len(df) == len(load_csv('data/circulation_data.csv'))
+
+def test_load_excel_compressed(tmp_path):
+    xlsx_path = compress('data/catalogue.xlsx', tmp_path / 'catalogue.xlsx.gz', 'gz')
+    assert len(load_excel(xlsx_path)) == len(load_excel('data/catalogue.xlsx'))
+
+def test_detect_compression_by_magic_bytes(tmp_path):
+    # A gzip file without a .gz suffix is still recognised
+    path = compress('data/circulation_data.csv', tmp_path / 'circ.csv', 'gz')
+    assert detect_compression(path) == 'gzip'
+    assert detect_compression('data/circulation_data.csv') is None
+    assert len(load_csv(path)) > 0
+
+def test_load_json_zstd(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    path = tmp_path / 'events.json.zst'
+    with open('data/events_data.json', 'rb') as src, pa.output_stream(str(path), compression='zstd') as dst:
+        dst.write(src.read())
+    assert detect_compression(str(path)) == 'zstd'
+    assert len(load_json(str(path))) == len(load_json('data/events_data.json'))
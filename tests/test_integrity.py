@@ -0,0 +1,23 @@
+import pandas as pd
+from src.data_processing.integrity import (
+    build_key_set,
+    check_references,
+    normalise_isbn
+)
+
+def test_build_key_set_normalises_and_dedupes():
+    keys = build_key_set(['978-0-43-321819-7', '9780433218197', None], normalise_isbn)
+    assert keys.tolist() == ['9780433218197']
+
+def test_check_references_streaming():
+    catalogue = build_key_set(['9780433218197', '9780338908384'])
+    circulation = pd.DataFrame({'isbn': ['978-0-43-321819-7', '9781111111111', None,
+                                         '9781111111111', '9782222222222']})
+    chunks = [circulation.iloc[:2], circulation.iloc[2:]]
+    result = check_references(iter(chunks), 'isbn', catalogue, normalise_isbn)
+
+    assert result['rows'] == 5
+    assert result['missing_keys'] == 1
+    assert result['orphan_rows'] == 3
+    assert result['orphan_keys'] == 2
+    assert result['orphans'].iloc[0].tolist() == ['9781111111111', 2]
@@ -0,0 +1,88 @@
+import os
+import pytest
+import pandas as pd
+import src.data_processing.lookup as lookup_module
+from src.data_processing.lookup import build_index, lookup
+
+@pytest.fixture
+def silver_table(tmp_path):
+    df = pd.DataFrame({
+        'transaction_id': [f'TXN{i:03d}' for i in range(10)],
+        'member_id': ['M10000', 'M20000'] * 5,
+        'isbn': [f'97800000000{i % 3}' for i in range(10)],
+        'checkout_date': [f'2024-01-{i + 1:02d}' for i in range(10)],
+        'return_date': [f'2024-02-{i + 1:02d}' for i in range(10)],
+        'branch_id': ['BR001'] * 5 + ['BR002'] * 5
+    })
+    filepath = tmp_path / 'circulation_clean.csv'
+    df.to_csv(filepath, index=False)
+    return str(filepath), df
+
+def test_lookup_point(silver_table):
+    filepath, df = silver_table
+    build_index(filepath, row_group_size=3)
+    result = lookup('member_id', 'M20000', filepath=filepath)
+    assert len(result) == 5
+    assert (result['member_id'] == 'M20000').all()
+
+def test_lookup_range(silver_table):
+    filepath, df = silver_table
+    result = lookup('checkout_date', start='2024-01-03', end='2024-01-05', filepath=filepath)
+    assert result['transaction_id'].tolist() == ['TXN002', 'TXN003', 'TXN004']
+
+def test_lookup_reads_only_matching_row_groups(tmp_path, silver_table):
+    filepath, df = silver_table
+    build_index(filepath, row_group_size=3)
+    index = pd.read_csv(tmp_path / '_index' / 'circulation_clean' / 'branch_id.csv')
+    # BR001 rows 0-4 live in row groups 0 and 1 only
+    assert sorted(index.loc[index.key == 'BR001', 'row_group']) == [0, 1]
+
+def test_build_index_incremental(silver_table):
+    filepath, df = silver_table
+    meta = build_index(filepath, row_group_size=3)
+    assert meta['row_groups'] == 4
+
+    extra = df.head(2).assign(transaction_id=['TXN100', 'TXN101'], isbn='9781111111111')
+    extra.to_csv(filepath, mode='a', index=False, header=False)
+    meta = build_index(filepath, row_group_size=3)
+    assert meta['row_groups'] == 5
+
+    result = lookup('isbn', '9781111111111', filepath=filepath)
+    assert result['transaction_id'].tolist() == ['TXN100', 'TXN101']
+
+def test_lookup_unindexed_column(silver_table):
+    filepath, df = silver_table
+    with pytest.raises(ValueError, match="not indexed"):
+        lookup('return_date', '2024-02-01', filepath=filepath)
+
+def test_build_index_rebuilds_after_rewrite_past_first_block(tmp_path):
+    filepath = str(tmp_path / 'circulation_clean.csv')
+    df = pd.DataFrame({
+        'transaction_id': [f'TXN{i:05d}' for i in range(4000)],
+        'member_id': [f'M{i % 7:05d}' for i in range(4000)],
+        'isbn': ['9780000000000'] * 4000,
+        'branch_id': ['BR001'] * 4000
+    })
+    df.to_csv(filepath, index=False)
+    build_index(filepath, row_group_size=500)
+
+    # Same size and same leading bytes, different rows near the end
+    rewritten = df.copy()
+    rewritten.loc[3990:, 'isbn'] = '9781111111111'
+    rewritten.to_csv(filepath, index=False)
+
+    result = lookup('isbn', '9781111111111', filepath=filepath)
+    assert result['transaction_id'].tolist() == [f'TXN{i:05d}' for i in range(3990, 4000)]
+
+def test_lookup_on_unchanged_table_does_not_rebuild(monkeypatch, tmp_path, silver_table):
+    filepath, df = silver_table
+    os.utime(filepath, ns=(10 ** 18, 10 ** 18))  # long enough ago to trust the mtime
+    build_index(filepath, row_group_size=3)
+    index_dir = tmp_path / '_index' / 'circulation_clean'
+    written = {path.name: path.stat().st_mtime_ns for path in index_dir.iterdir()}
+
+    def fail(*args):
+        raise AssertionError('table was hashed')
+    monkeypatch.setattr(lookup_module, '_fingerprints', fail)
+    assert len(lookup('member_id', 'M20000', filepath=filepath)) == 5
+    assert {path.name: path.stat().st_mtime_ns for path in index_dir.iterdir()} == written
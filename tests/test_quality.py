@@ -0,0 +1,55 @@
+import pytest
+import pandas as pd
+from src.data_processing.quality import compile_rule, check_rules, DEFAULT_RULES
+
+@pytest.fixture
+def sample_circulation():
+    return pd.DataFrame({
+        'transaction_id': ['TXN1', 'TXN2', 'TXN3', 'TXN4'],
+        'member_id': ['M12345', 'M1234', 'M54321', None],
+        'isbn': ['9780433218197', '9780433218197', '978043321819X', '9780338908384'],
+        'checkout_date': ['2024-08-17', '2024-08-17', '2024-08-20', '2024-08-18'],
+        'return_date': ['2024-08-25', '2024-08-01', None, '2024-08-18'],
+        'branch_id': ['BR001', 'BR01', 'BR002', 'BR003']
+    })
+
+def test_compile_range():
+    check = compile_rule({'name': 'r', 'type': 'range', 'column': 'rating', 'min': 1, 'max': 5})
+    df = pd.DataFrame({'rating': [0, 1, 5, 6, None]})
+    assert check(df).tolist() == [True, False, False, True, False]
+
+def test_compile_ratio():
+    check = compile_rule({'name': 'r', 'type': 'ratio', 'column': 'actual',
+                          'other': 'registered', 'max_ratio': 1.5})
+    df = pd.DataFrame({'actual': [10, 16, 5], 'registered': [10, 10, None]})
+    assert check(df).tolist() == [False, True, False]
+
+def test_compile_unknown_type():
+    with pytest.raises(ValueError, match="Unknown rule type"):
+        compile_rule({'name': 'r', 'type': 'nonsense'})
+
+def test_check_rules_counts_and_samples(sample_circulation):
+    report, samples = check_rules(sample_circulation, DEFAULT_RULES['circulation'])
+    violations = dict(zip(report['rule'], report['violations']))
+
+    assert violations == {
+        'return_after_checkout': 1,
+        'member_id_format': 1,
+        'branch_id_format': 1,
+        'isbn_13_digits': 1,
+    }
+    assert samples['return_after_checkout']['transaction_id'].tolist() == ['TXN2']
+    assert (report['rows'] == 4).all()
+
+def test_check_rules_chunks_match_full(sample_circulation):
+    full, _ = check_rules(sample_circulation, DEFAULT_RULES['circulation'], sample_size=1)
+    chunks = [sample_circulation.iloc[:1], sample_circulation.iloc[1:3], sample_circulation.iloc[3:]]
+    chunked, samples = check_rules(iter(chunks), DEFAULT_RULES['circulation'], sample_size=1)
+
+    pd.testing.assert_frame_equal(full, chunked)
+    assert all(len(sample) == 1 for sample in samples.values())
+
+def test_check_rules_missing_column_skipped():
+    report, _ = check_rules(pd.DataFrame({'x': [1]}), DEFAULT_RULES['feedback'])
+    assert report['skipped'].all()
+    assert report['violations'].sum() == 0
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+from src.data_processing.recommendations import (
+    loans_matrix,
+    top_neighbours,
+    update_recommendations
+)
+
+@pytest.fixture
+def loans():
+    return pd.DataFrame({
+        'member_id': ['M1', 'M1', 'M2', 'M2', 'M3', 'M3', 'M3'],
+        'isbn': ['A', 'B', 'A', 'B', 'A', 'C', 'B'],
+    })
+
+def test_loans_matrix_is_binary():
+    matrix = loans_matrix([0, 0, 1], [1, 1, 0], (2, 2))
+    assert matrix.toarray().tolist() == [[0, 1], [1, 0]]
+
+def test_top_neighbours_blocked(loans):
+    matrix = loans_matrix([0, 0, 1, 1, 2, 2, 2], [0, 1, 0, 1, 0, 2, 1], (3, 3))
+    result = top_neighbours(matrix, k=1, block_size=2)
+    assert result[['item', 'neighbour', 'co_borrowers']].values.tolist() == [
+        [0, 1, 3], [1, 0, 3], [2, 0, 1]]
+
+def test_update_recommendations(loans, tmp_path):
+    result = update_recommendations(loans, state_dir=str(tmp_path))
+    a = result[result['isbn'] == 'A']
+    assert a['neighbour_isbn'].tolist() == ['B', 'C']
+    assert a['co_borrowers'].tolist() == [3, 1]
+    assert a['similarity'].iloc[0] == pytest.approx(1.0)
+
+def test_rerun_is_idempotent(loans, tmp_path):
+    first = update_recommendations(loans, state_dir=str(tmp_path))
+    second = update_recommendations(loans, state_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+def test_incremental_update_matches_full_build(loans, tmp_path):
+    new_loans = pd.DataFrame({'member_id': ['M4', 'M4', 'M1'], 'isbn': ['C', 'D', 'C']})
+    update_recommendations(loans, state_dir=str(tmp_path / 'incremental'))
+    incremental = update_recommendations(new_loans, state_dir=str(tmp_path / 'incremental'))
+    full = update_recommendations(pd.concat([loans, new_loans]), state_dir=str(tmp_path / 'full'))
+    pd.testing.assert_frame_equal(incremental, full, check_dtype=False)
+
+def test_interrupted_save_keeps_previous_state(loans, tmp_path, monkeypatch):
+    from scipy import sparse
+
+    state_dir = str(tmp_path)
+    first = update_recommendations(loans, state_dir=state_dir)
+    new_loans = pd.DataFrame({'member_id': ['M4', 'M4'], 'isbn': ['C', 'D']})
+
+    def crash(file, matrix):
+        raise OSError('disk full')
+    monkeypatch.setattr(sparse, 'save_npz', crash)
+    with pytest.raises(OSError):
+        update_recommendations(new_loans, state_dir=state_dir)
+    monkeypatch.undo()
+
+    # Codes and matrix still describe the first load only
+    assert pd.read_csv(tmp_path / 'members.csv')['member_id'].tolist() == ['M1', 'M2', 'M3']
+    assert update_recommendations(loans, state_dir=state_dir).equals(first)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'item_neighbours.csv', 'items.csv', 'loans.npz', 'members.csv']
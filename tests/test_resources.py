@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from src.data_processing.resources import (
+    MIN_CHUNK_ROWS,
+    bounded,
+    parse_size,
+    plan_chunks,
+    plan_workers
+)
+
+@pytest.fixture
+def loans_csv(tmp_path):
+    path = tmp_path / 'loans.csv'
+    pd.DataFrame({
+        'transaction_id': [f'TX{i:06d}' for i in range(20_000)],
+        'isbn': ['9780433218197'] * 20_000,
+        'checkout_date': ['2024-01-01'] * 20_000,
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_parse_size():
+    assert parse_size('512MB') == 512 * 1024 ** 2
+    assert parse_size('1.5g') == int(1.5 * 1024 ** 3)
+    assert parse_size(1000) == 1000
+    with pytest.raises(ValueError):
+        parse_size('lots')
+
+def test_plan_chunks_scales_with_budget(loans_csv):
+    small = plan_chunks(loans_csv, '2MB', sample_rows=1_000, dtype=str)
+    large = plan_chunks(loans_csv, '1GB', sample_rows=1_000, dtype=str)
+
+    assert small['bytes_per_row'] > 0
+    assert abs(small['estimated_rows'] - 20_000) < 200
+    assert MIN_CHUNK_ROWS <= small['chunksize'] < large['chunksize']
+    # Never more than the file holds
+    assert large['chunksize'] == large['estimated_rows']
+
+def test_plan_workers_fits_budget():
+    assert plan_workers(10 * 1024 ** 2, '4GB', requested=4) == 4
+    assert plan_workers(10 * 1024 ** 2, '200MB', requested=4) == 1
+
+def test_bounded_keeps_order_and_records_backpressure():
+    stats = {}
+    assert list(bounded(iter(range(10)), queue_size=2, stats=stats)) == list(range(10))
+    assert stats['chunks'] == 10
+    assert 1 <= stats['max_queue_depth'] <= 2
+
+def test_bounded_raises_reader_errors():
+    def chunks():
+        yield 1
+        raise OSError('disk gone')
+
+    with pytest.raises(OSError, match='disk gone'):
+        list(bounded(chunks()))
+
+def test_bounded_stops_reader_when_consumer_stops():
+    read = []
+    def chunks():
+        for i in range(1_000):
+            read.append(i)
+            yield i
+
+    reader = bounded(chunks(), queue_size=1)
+    assert next(reader) == 0
+    reader.close()
+    assert len(read) < 1_000
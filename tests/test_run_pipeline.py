@@ -0,0 +1,26 @@
+import subprocess
+import sys
+import pytest
+import src.data_processing as data_processing
+from src.data_processing import run_pipeline
+
+def test_import_has_no_heavy_dependencies():
+    """Importing the package and the CLI must not load pandas or numpy."""
+    code = ('import sys, src.data_processing, src.data_processing.run_pipeline; '
+            'print(any(m in sys.modules for m in ("pandas", "numpy", "openpyxl")))')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
+
+def test_lazy_attribute_access():
+    from src.data_processing.validation import validate_isbn
+    assert data_processing.validate_isbn is validate_isbn
+    with pytest.raises(AttributeError):
+        data_processing.not_a_function
+
+def test_dry_run_has_no_side_effects(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(run_pipeline, 'SILVER_DIR', tmp_path / 'silver')
+    monkeypatch.setattr(run_pipeline, 'BRONZE_FILES', {'circulation': tmp_path / 'missing.csv'})
+
+    assert run_pipeline.main(['--dry-run']) is False
+    assert 'MISSING' in capsys.readouterr().out
+    assert not (tmp_path / 'silver').exists()
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from src.data_processing.shadow import compare_outputs, shadow_compare, shadow_report
+
+@pytest.fixture
+def raw_loans():
+    return pd.DataFrame({
+        'isbn': ['978-0-433-21819-7', '978-0-338-90838-4', None, 'invalid'] * 50,
+        'checkout_date': ['2024-08-17', '17/08/2024', '08/17/2024', None] * 50,
+    })
+
+def test_compare_outputs_treats_missing_values_as_equal():
+    expected = pd.DataFrame({'a': [1, None, 3], 'b': ['x', 'y', None]})
+    actual = pd.DataFrame({'a': [1.0, float('nan'), 4.0], 'b': ['x', 'z', pd.NA]})
+    differs = compare_outputs(expected, actual)
+    assert differs['a'].tolist() == [False, False, True]
+    assert differs['b'].tolist() == [False, True, False]
+
+def test_vectorized_engines_match_reference(raw_loans):
+    results = [shadow_compare(raw_loans, 'format_dates', 'vectorized', 'checkout_date',
+                              sample=None),
+               shadow_compare(raw_loans, 'validate_isbn', 'vectorized', 'isbn', sample=None)]
+    for result in results:
+        assert result['error'] is None
+        assert result['rows'] == 200
+        assert result['mismatched_cells'] == 0
+        assert result['speedup'] > 0
+
+def test_mismatches_are_reported_with_examples(raw_loans):
+    raw_loans.loc[5, 'checkout_date'] = '5-x-2024'
+    result = shadow_compare(raw_loans, 'format_dates', 'vectorized', 'checkout_date',
+                            sample=None)
+    assert result['mismatched_rows'] == 1
+    example = result['examples'][0]
+    assert example['row'] == 5 and example['input'] == '5-x-2024'
+    assert example['expected'].startswith('<UnboundLocalError')
+
+    summary, examples = shadow_report([result])
+    assert summary['mismatched_cells'].tolist() == [1]
+    assert examples['actual'].tolist() == ['5-x-2024']
+
+def test_sample_and_missing_engine(raw_loans):
+    result = shadow_compare(raw_loans, 'validate_isbn', 'vectorized', 'isbn', sample=20)
+    assert result['rows'] == 20
+    with pytest.raises(ValueError, match='No polars engine'):
+        shadow_compare(raw_loans, 'validate_isbn', 'polars', 'isbn')
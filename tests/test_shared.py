@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from src.data_processing.cleaning import standardise_isbn, standardize_dates
+from src.data_processing.shared import attach, map_partitions, publish, release, shared_dataset
+
+pytest.importorskip('pyarrow')
+
+@pytest.fixture
+def loans():
+    return pd.DataFrame({
+        'isbn': ['978-0-43', '978-0-33', '978-1-11', '978-2-22', '978-3-33'],
+        'checkout_date': ['2024-01-05', '05/01/2024', '2024-02-01', None, '2024-03-10'],
+    }, index=[10, 11, 13, 14, 17])
+
+def fail(df):
+    raise RuntimeError('bad partition')
+
+def test_attach_slice_is_arrow_backed(tmp_path, loans):
+    handle = publish(loans, str(tmp_path))
+    part = attach(handle, 1, 3)
+    assert part.index.tolist() == [1, 2]
+    assert part['isbn'].tolist() == ['978-0-33', '978-1-11']
+    assert isinstance(part['isbn'].dtype, pd.ArrowDtype)
+    release(handle)
+    assert list(tmp_path.iterdir()) == []
+
+def test_map_partitions_matches_serial(tmp_path, loans):
+    result = map_partitions(standardize_dates, loans, ['checkout_date'], workers=2,
+                            partitions=3, directory=str(tmp_path), keep_datetime=True)
+    expected = standardize_dates(loans, ['checkout_date'], keep_datetime=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+    with shared_dataset(loans, str(tmp_path)) as handle:
+        result = map_partitions(standardise_isbn, handle, workers=2, column='isbn',
+                                directory=str(tmp_path))
+    assert result['isbn'].tolist() == ['978043', '978033', '978111', '978222', '978333']
+    assert list(tmp_path.iterdir()) == []
+
+def test_map_partitions_cleans_up_on_error(tmp_path, loans):
+    with pytest.raises(RuntimeError, match='bad partition'):
+        map_partitions(fail, loans, workers=2, directory=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,77 @@
+import datetime
+import pandas as pd
+import pytest
+from src.data_processing.sink import query, write_table
+
+@pytest.fixture
+def loans():
+    return pd.DataFrame({
+        'transaction_id': ['T1', 'T2'],
+        'isbn': ['9780433218197', '9780338908384'],
+        'checkout_date': pd.to_datetime(['2024-01-01', '2024-01-02']),
+        'return_date': pd.to_datetime(['2024-01-10', None]),
+        'branch_key': [1, 2],
+    })
+
+def test_write_table_creates_indexes_and_iso_dates(tmp_path, loans):
+    path = str(tmp_path / 'silver.sqlite')
+    assert write_table(loans, 'circulation_clean', path) == 2
+
+    rows = query('SELECT * FROM circulation_clean ORDER BY transaction_id', path)
+    assert rows['checkout_date'].tolist() == ['2024-01-01', '2024-01-02']
+    assert rows['return_date'].isna().tolist() == [False, True]
+    indexes = set(query("SELECT name FROM sqlite_master WHERE type = 'index'", path)['name'])
+    assert {'idx_circulation_clean_isbn', 'idx_circulation_clean_checkout_date'} <= indexes
+
+def test_upsert_on_primary_key(tmp_path, loans):
+    path = str(tmp_path / 'silver.sqlite')
+    write_table(loans, 'circulation_clean', path)
+    update = pd.DataFrame({
+        'transaction_id': ['T2', 'T3'],
+        'isbn': ['9780338908384', '9780000000001'],
+        'checkout_date': pd.to_datetime(['2024-01-02', '2024-01-05']),
+        'return_date': pd.to_datetime(['2024-01-20', None]),
+        'branch_key': [2, 3],
+    })
+    write_table(update, 'circulation_clean', path)
+
+    rows = query('SELECT transaction_id, return_date FROM circulation_clean '
+                 'ORDER BY transaction_id', path)
+    assert rows['transaction_id'].tolist() == ['T1', 'T2', 'T3']
+    assert rows['return_date'].tolist()[:2] == ['2024-01-10', '2024-01-20']
+
+def test_replace_deletes_rows_missing_upstream(tmp_path, loans):
+    path = str(tmp_path / 'silver.sqlite')
+    write_table(loans, 'circulation_clean', path)
+    write_table(loans.iloc[:1], 'circulation_clean', path, replace=True)
+    rows = query('SELECT transaction_id FROM circulation_clean', path)
+    assert rows['transaction_id'].tolist() == ['T1']
+
+def test_table_without_key_is_replaced(tmp_path):
+    path = str(tmp_path / 'silver.sqlite')
+    events = pd.DataFrame({'name': ['Story Time'], 'date': [datetime.date(2025, 1, 9)]})
+    write_table(events, 'events_report', path)
+    write_table(events.assign(name='Code Club'), 'events_report', path)
+    assert query('SELECT * FROM events_report', path).values.tolist() == [
+        ['Code Club', '2025-01-09']]
+
+def test_missing_key_column(tmp_path, loans):
+    with pytest.raises(ValueError, match='Key columns'):
+        write_table(loans.drop(columns='transaction_id'), 'circulation_clean',
+                    str(tmp_path / 'silver.sqlite'))
+
+def test_duckdb_upsert(tmp_path, loans):
+    pytest.importorskip('duckdb')
+    path = str(tmp_path / 'silver.duckdb')
+    write_table(loans, 'circulation_clean', path)
+    write_table(loans.assign(branch_key=[5, 6]), 'circulation_clean', path)
+    rows = query('SELECT branch_key FROM circulation_clean ORDER BY transaction_id', path)
+    assert rows['branch_key'].tolist() == [5, 6]
+
+def test_duckdb_replace(tmp_path, loans):
+    pytest.importorskip('duckdb')
+    path = str(tmp_path / 'silver.duckdb')
+    write_table(loans, 'circulation_clean', path)
+    write_table(loans.iloc[1:], 'circulation_clean', path, replace=True)
+    rows = query('SELECT transaction_id FROM circulation_clean', path)
+    assert rows['transaction_id'].tolist() == ['T2']
@@ -0,0 +1,63 @@
+import pandas as pd
+from src.data_processing.text_analytics import (
+    analyse_feedback,
+    keyword_frequencies,
+    parse_feedback,
+    sentiment_scores,
+    term_document_matrix,
+    tokenize
+)
+
+FEEDBACK = """Member Feedback - Library Services
+==================================================
+
+Feedback #1 - 2025-09-27 - Manor Park Branch ~ 5⭐
+I love the wifi! The staff were so helpful.
+---
+
+Feedback #2 - 2025-09-30 - Manor Park Branch ~ 2⭐
+Not happy with wifi. Needs improvement.
+---
+
+Feedback #3 - 2025-10-14 - Beckton Branch ~ 4⭐
+Great selection of books. Great staff!
+---
+"""
+
+def test_parse_feedback_keeps_comments():
+    df = parse_feedback(FEEDBACK)
+    assert df['feedback_id'].tolist() == [1, 2, 3]
+    assert df['rating'].tolist() == [5, 2, 4]
+    assert df['comment'][1] == 'Not happy with wifi. Needs improvement.'
+
+def test_tokenize_tracks_documents_and_negation():
+    tokens = tokenize(pd.Series(['Not happy!', None, 'Happy days']))
+    assert tokens['doc'].tolist() == [0, 2, 2]
+    assert tokens['token'].astype(str).tolist() == ['happy', 'happy', 'days']
+    assert tokens['negated'].tolist() == [True, False, False]
+
+def test_term_document_matrix_counts():
+    comments = pd.Series(['great great staff', 'staff'])
+    matrix, vocabulary = term_document_matrix(tokenize(comments), len(comments))
+    assert vocabulary.tolist() == ['great', 'staff']
+    assert matrix.toarray().tolist() == [[2, 1], [0, 1]]
+
+    keywords = keyword_frequencies(matrix, vocabulary)
+    assert keywords.values.tolist() == [['great', 2, 1], ['staff', 2, 2]]
+
+def test_sentiment_follows_lexicon_and_negation():
+    comments = pd.Series(['Great staff', 'Not great', 'Open today'])
+    scores = sentiment_scores(tokenize(comments), len(comments))
+    assert scores['label'].tolist() == ['positive', 'negative', 'neutral']
+    assert scores['sentiment'][0] == 0.5
+
+def test_analyse_feedback():
+    analysis = analyse_feedback(parse_feedback(FEEDBACK))
+    labels = analysis['comments'].set_index('feedback_id')['label']
+    assert labels.to_dict() == {1: 'positive', 2: 'negative', 3: 'positive'}
+
+    top = analysis['top_terms']
+    beckton = top[(top['group'] == 'Beckton Branch') & (top['rank'] == 1)].iloc[0]
+    assert (beckton['term'], beckton['count']) == ('great', 2)
+    manor = top[top['group'] == 'Manor Park Branch']
+    assert manor.iloc[0]['term'] == 'wifi'
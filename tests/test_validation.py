@@ -1,6 +1,8 @@
 import pytest
+import pandas as pd
 from src.data_processing.validation import (
-validate_isbn
+validate_isbn,
+validate_isbn_series
 )
 
 def test_validate_isbn():
@@ -9,3 +11,7 @@ def test_validate_isbn():
     assert validate_isbn('123') == False  # Too short
     assert validate_isbn('') == False
     assert validate_isbn(None) == False
+
+def test_validate_isbn_series():
+    values = pd.Series(['978-0-123456-78-9', 'invalid', '123', '', None, 9780123456789])
+    assert validate_isbn_series(values).tolist() == [validate_isbn(v) for v in values]
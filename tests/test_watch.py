@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+from src.data_processing.watch import match_handler, scan, watch
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_match_handler_and_scan(tmp_path):
+    handlers = {'circulation_data.csv': None, 'events_*.json': None}
+    (tmp_path / 'circulation_data.csv').write_text('a\n')
+    (tmp_path / 'events_2025.json').write_text('[]')
+    (tmp_path / 'notes.txt').write_text('')
+    assert match_handler('events_2025.json', handlers) == 'events_*.json'
+    assert match_handler('notes.txt', handlers) is None
+    assert sorted(p.split('/')[-1] for p in scan(str(tmp_path), handlers)) == [
+        'circulation_data.csv', 'events_2025.json']
+
+def test_watch_debounces_and_dispatches(tmp_path):
+    (tmp_path / 'feedback.txt').write_text('old')
+    seen = []
+    handlers = {'circulation_data.csv': lambda path: seen.append(open(path).read()),
+                'feedback.txt': lambda path: seen.append('feedback')}
+    stop = threading.Event()
+    metrics_path = tmp_path / 'metrics.json'
+    thread = threading.Thread(target=watch, args=(str(tmp_path), handlers),
+                              kwargs={'interval': 0.02, 'settle': 0.3, 'stop_event': stop,
+                                      'metrics_path': str(metrics_path)})
+    thread.start()
+    try:
+        # A file written in pieces is only processed once it stops changing
+        target = tmp_path / 'circulation_data.csv'
+        target.write_text('part')
+        time.sleep(0.1)
+        with open(target, 'a') as file:
+            file.write('+rest')
+        assert wait_for(lambda: seen)
+        time.sleep(0.4)
+        assert seen == ['part+rest']
+        assert wait_for(lambda: json.loads(metrics_path.read_text())['processed'] == 1)
+    finally:
+        stop.set()
+        thread.join()
+
+    metrics = json.loads(metrics_path.read_text())
+    assert metrics['queue_depth'] == 0
+    assert metrics['mode'] in ('polling', 'inotify')
+    entry = metrics['files'][str(target)]
+    assert entry['status'] == 'ok'
+    assert entry['latency_seconds'] >= 0.3